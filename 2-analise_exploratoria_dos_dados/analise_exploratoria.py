@@ -1,30 +1,32 @@
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
-import pytz
 import numpy as np
 from wordcloud import WordCloud
 import nltk
-from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 
+# Permite importar o pacote 'comum' a partir da raiz do repositório
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.agregados import carregar_agregados
+from comum.dataset import iterar_lotes
+from comum.frequencia import contar_palavras_paralelo
+
 # # Download de recursos do NLTK (executar somente na primeira vez que rodar o script)
 # nltk.download('punkt')
 # nltk.download('punkt_tab')
 # nltk.download('stopwords')
 
-# Carrega dataset
-df = pd.read_csv("/home/israel/Documentos/GitHub/dataset_unificado.csv")
-df['canal'] = df['canal'].astype(str).str.strip()
-
-# Calcula o tamanho de cada mensagem (em caracteres)
-df['tamanho_mensagem'] = df['mensagem'].str.len()
+ARQUIVO_DE_DADOS = "/home/israel/Documentos/GitHub/dataset_unificado.csv"
+N_PROCESSOS = None  # Processos usados na contagem de palavras (None = todos os núcleos)
 
-# Criação global de quantidade_mensagens
-mensagens_por_live = df.groupby('id_video').size().reset_index(name='quantidade_mensagens')
-canal_por_live = df[['id_video', 'canal']].drop_duplicates()
-mensagens_por_live = mensagens_por_live.merge(canal_por_live, on='id_video')
-mensagens_por_live = mensagens_por_live[mensagens_por_live['quantidade_mensagens'] > 0]
-df = df.merge(mensagens_por_live[['id_video', 'quantidade_mensagens']], on='id_video', how='left')
+# Tabelas agregadas por live, por canal e por canal/dia (dias em UTC), calculadas
+# em uma passada pelo dataset e guardadas em cache; os gráficos e tabelas leem apenas delas
+agregados = carregar_agregados(ARQUIVO_DE_DADOS)
+mensagens_por_live = agregados['por_live']
+mensagens_por_canal = agregados['por_canal']
+mensagens_por_canal_dia = agregados['por_canal_dia']
 
 # # HISTOGRAMA - MENSAGENS POR LIVE
 # plt.hist(mensagens_por_live['quantidade_mensagens'])
@@ -60,10 +62,7 @@ df = df.merge(mensagens_por_live[['id_video', 'quantidade_mensagens']], on='id_v
 # plt.close()
 
 # # HEATMAP - MENSAGENS POR CANAL E DIA
-# df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-# df['dia'] = df['timestamp'].dt.date
-# mensagens_por_dia = df.groupby(['canal', 'dia']).size().reset_index(name='quantidade_mensagens')
-# pivot_data = mensagens_por_dia.pivot(index='canal', columns='dia', values='quantidade_mensagens').fillna(0)
+# pivot_data = mensagens_por_canal_dia.pivot(index='canal', columns='dia', values='quantidade_mensagens').fillna(0)
 
 # plt.figure()
 # plt.imshow(pivot_data, aspect='auto', cmap='YlOrRd')
@@ -80,15 +79,11 @@ df = df.merge(mensagens_por_live[['id_video', 'quantidade_mensagens']], on='id_v
 # plt.close()
 
 # # HEATMAP - TAMANHO MÉDIO DAS MENSAGENS (CONTEXTO GLOBAL)
-# df['timestamp'] = pd.to_datetime(df['timestamp'], format='ISO8601', utc=True)
-# tz_local = pytz.timezone('America/Sao_Paulo')
-# df['timestamp_local'] = df['timestamp'].dt.tz_convert(tz_local)
-# tamanho_medio_por_dia = df.groupby(['canal', df['timestamp_local'].dt.date])['tamanho_mensagem'].mean().reset_index()
-# pivot_data = tamanho_medio_por_dia.pivot(index='canal', columns='timestamp_local', values='tamanho_mensagem').fillna(0)
+# pivot_data = mensagens_por_canal_dia.pivot(index='canal', columns='dia', values='tamanho_medio').fillna(0)
 
 # plt.figure()
 # plt.imshow(pivot_data, aspect='auto', cmap='YlOrRd')
-# plt.title('Tamanho médio das mensagens por canal e dia')
+# plt.title('Tamanho médio das mensagens por canal e dia (UTC)')
 # plt.xlabel('Dia')
 # plt.ylabel('Canal')
 # plt.xticks(ticks=range(len(pivot_data.columns)), 
@@ -101,8 +96,6 @@ df = df.merge(mensagens_por_live[['id_video', 'quantidade_mensagens']], on='id_v
 # plt.close()
 
 # WORDCLOUD - PALAVRAS MAIS FREQUENTES NOS CHATS
-import re
-
 # Carrega a lista padrão de stopwords do NLTK.
 stop_words = set(stopwords.words('portuguese'))
 
@@ -177,19 +170,14 @@ stop_words.update(custom_stop_words)
 
 print(f"Lista de stopwords customizadas carregada e organizada. Total de {len(custom_stop_words)} palavras adicionadas.")
 
-texto_completo = ' '.join(df['mensagem'].dropna().astype(str).tolist())
-palavras = word_tokenize(texto_completo.lower())
-
-palavras_filtradas = []
-for palavra in palavras:
-    if re.fullmatch(r'k{2,}', palavra):
-        continue
-
-    if palavra.isalpha() and len(palavra) > 1 and palavra not in stop_words:
-        palavras_filtradas.append(palavra)
+# Contagem em streaming: o dataset é lido em lotes do cache colunar e cada lote é
+# tokenizado e somado a um Counter, sem montar o texto completo nem a lista de tokens.
+lotes_de_mensagens = (lote['mensagem'] for lote in iterar_lotes(ARQUIVO_DE_DADOS, colunas=['mensagem']))
+frequencia_palavras = nltk.FreqDist(
+    contar_palavras_paralelo(lotes_de_mensagens, stop_words, tamanho_minimo=2, ignorar_risadas=True, n_processos=N_PROCESSOS)
+)
 
 # Geração da WordCloud
-frequencia_palavras = nltk.FreqDist(palavras_filtradas)
 wordcloud = WordCloud(
     width=1200, 
     height=600, 
@@ -209,73 +197,34 @@ print("10 palavras mais frequentes (após a limpeza final):")
 print(frequencia_palavras.most_common(10))
 
 # # TABELA - COMPARAÇÃO ENTRE CANAIS GRANDES E PEQUENOS
-# volume_medio_por_canal = df.groupby('canal')['quantidade_mensagens'].mean().reset_index()
-# quantil_60 = volume_medio_por_canal['quantidade_mensagens'].quantile(0.60)  # Ajuste para top 40%
-# canais_grandes = volume_medio_por_canal[volume_medio_por_canal['quantidade_mensagens'] >= quantil_60]['canal'].tolist()
-# canais_pequenos = volume_medio_por_canal[volume_medio_por_canal['quantidade_mensagens'] < quantil_60]['canal'].tolist()
+# from comum.agregados import comparar_grupos
+# # Média de mensagens por live ponderada pelo volume de cada live (mesmo critério da média linha a linha)
+# volume_medio_por_canal = mensagens_por_canal[['canal', 'media_mensagens_por_live_ponderada']]
+# quantil_60 = volume_medio_por_canal['media_mensagens_por_live_ponderada'].quantile(0.60)  # Ajuste para top 40%
+# canais_grandes = volume_medio_por_canal[volume_medio_por_canal['media_mensagens_por_live_ponderada'] >= quantil_60]['canal'].tolist()
+# canais_pequenos = volume_medio_por_canal[volume_medio_por_canal['media_mensagens_por_live_ponderada'] < quantil_60]['canal'].tolist()
 # print("Canais grandes:", canais_grandes)
 # print("Canais pequenos:", canais_pequenos)
 
-# # Volume médio de mensagens por live
-# volume_medio_grandes = df[df['canal'].isin(canais_grandes)].groupby('id_video')['quantidade_mensagens'].mean().mean()
-# volume_medio_pequenos = df[df['canal'].isin(canais_pequenos)].groupby('id_video')['quantidade_mensagens'].mean().mean()
-# print(f"Volume médio por live - Grandes: {volume_medio_grandes:.2f}, Pequenos: {volume_medio_pequenos:.2f}")
-
-# # Número médio de mensagens por usuário
-# mensagens_por_usuario = df.groupby(['canal', 'autor']).size().reset_index(name='quantidade_mensagens_usuario')
-# mensagens_por_usuario_grandes = mensagens_por_usuario[mensagens_por_usuario['canal'].isin(canais_grandes)].groupby('canal')['quantidade_mensagens_usuario'].mean().mean()
-# mensagens_por_usuario_pequenos = mensagens_por_usuario[mensagens_por_usuario['canal'].isin(canais_pequenos)].groupby('canal')['quantidade_mensagens_usuario'].mean().mean()
-# # Substitui NaN por 0 para evitar barras em branco
-# mensagens_por_usuario_grandes = 0 if pd.isna(mensagens_por_usuario_grandes) else mensagens_por_usuario_grandes
-# mensagens_por_usuario_pequenos = 0 if pd.isna(mensagens_por_usuario_pequenos) else mensagens_por_usuario_pequenos
-# print(f"Mensagens por usuário - Grandes: {mensagens_por_usuario_grandes:.2f}, Pequenos: {mensagens_por_usuario_pequenos:.2f}")
-
-# # Tempo médio entre mensagens
-# df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-# df = df.sort_values(['canal', 'timestamp'])
-# df['tempo_entre_mensagens'] = df.groupby('canal')['timestamp'].diff().dt.total_seconds()
-# tempo_medio_grandes = df[df['canal'].isin(canais_grandes)]['tempo_entre_mensagens'].mean()
-# tempo_medio_pequenos = df[df['canal'].isin(canais_pequenos)]['tempo_entre_mensagens'].mean()
-# # Substitui NaN por 0 para evitar barras em branco
-# tempo_medio_grandes = 0 if pd.isna(tempo_medio_grandes) else tempo_medio_grandes
-# tempo_medio_pequenos = 0 if pd.isna(tempo_medio_pequenos) else tempo_medio_pequenos
-# print(f"Tempo médio entre mensagens (segundos) - Grandes: {tempo_medio_grandes:.2f}, Pequenos: {tempo_medio_pequenos:.2f}")
+# # Volume médio por live, mensagens por usuário e tempo médio entre mensagens (grupos vazios ficam com 0)
+# comparacao = comparar_grupos(agregados, {'Grandes': canais_grandes, 'Pequenos': canais_pequenos}).set_index('grupo')
+# print(f"Volume médio por live - Grandes: {comparacao.loc['Grandes', 'volume_medio_por_live']:.2f}, Pequenos: {comparacao.loc['Pequenos', 'volume_medio_por_live']:.2f}")
+# print(f"Mensagens por usuário - Grandes: {comparacao.loc['Grandes', 'mensagens_por_usuario']:.2f}, Pequenos: {comparacao.loc['Pequenos', 'mensagens_por_usuario']:.2f}")
+# print(f"Tempo médio entre mensagens (segundos) - Grandes: {comparacao.loc['Grandes', 'tempo_medio_entre_mensagens_s']:.2f}, Pequenos: {comparacao.loc['Pequenos', 'tempo_medio_entre_mensagens_s']:.2f}")
 
 # # TABELA - COMPARAÇÃO ENTRE TRANSMISSÕES DE STREAMERS HOMENS E MULHERES
-# df['genero_streamer'] = df['canal'].apply(lambda x: 'Mulher' if x == 'BiahKov' else 'Homem')
-
-# # Volume médio de mensagens por live
-# volume_medio_homens = df[df['genero_streamer'] == 'Homem'].groupby('id_video')['quantidade_mensagens'].mean().mean()
-# volume_medio_mulheres = df[df['genero_streamer'] == 'Mulher'].groupby('id_video')['quantidade_mensagens'].mean().mean()
-# print(f"Volume médio por live - Homens: {volume_medio_homens:.2f}, Mulheres: {volume_medio_mulheres:.2f}")
-
-# # Intensidade do chat (mensagens por usuário)
-# mensagens_por_usuario = df.groupby(['canal', 'autor']).size().reset_index(name='quantidade_mensagens_usuario')
-# mensagens_por_usuario_homens = mensagens_por_usuario[mensagens_por_usuario['canal'] != 'BiahKov'].groupby('canal')['quantidade_mensagens_usuario'].mean().mean()
-# mensagens_por_usuario_mulheres = mensagens_por_usuario[mensagens_por_usuario['canal'] == 'BiahKov'].groupby('canal')['quantidade_mensagens_usuario'].mean().mean()
-# mensagens_por_usuario_homens = 0 if pd.isna(mensagens_por_usuario_homens) else mensagens_por_usuario_homens
-# mensagens_por_usuario_mulheres = 0 if pd.isna(mensagens_por_usuario_mulheres) else mensagens_por_usuario_mulheres
-# print(f"Mensagens por usuário - Homens: {mensagens_por_usuario_homens:.2f}, Mulheres: {mensagens_por_usuario_mulheres:.2f}")
-
-# # Tempo médio entre mensagens (intensidade)
-# df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-# df = df.sort_values(['canal', 'timestamp'])
-# df['tempo_entre_mensagens'] = df.groupby('canal')['timestamp'].diff().dt.total_seconds()
-# tempo_medio_homens = df[df['genero_streamer'] == 'Homem']['tempo_entre_mensagens'].mean()
-# tempo_medio_mulheres = df[df['genero_streamer'] == 'Mulher']['tempo_entre_mensagens'].mean()
-# tempo_medio_homens = 0 if pd.isna(tempo_medio_homens) else tempo_medio_homens
-# tempo_medio_mulheres = 0 if pd.isna(tempo_medio_mulheres) else tempo_medio_mulheres
-# print(f"Tempo médio entre mensagens (segundos) - Homens: {tempo_medio_homens:.2f}, Mulheres: {tempo_medio_mulheres:.2f}")
-
-# # Uso de termos e emojis (exemplo simplificado: contagem de "kkkk" e emojis)
-# df['contem_kkkk'] = df['mensagem'].str.contains('kkkk', case=False, na=False)
-# df['contem_emoji'] = df['mensagem'].str.contains('[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F700-\U0001F77F\U0001F780-\U0001F7FF\U0001F800-\U0001F8FF\U0001F900-\U0001F9FF\U0001FA00-\U0001FA6F\U0001FA70-\U0001FAFF\U00002702-\U000027B0\U000024C2-\U0001F251]', na=False)
-# percentual_kkkk_homens = df[df['genero_streamer'] == 'Homem']['contem_kkkk'].mean() * 100
-# percentual_kkkk_mulheres = df[df['genero_streamer'] == 'Mulher']['contem_kkkk'].mean() * 100
-# percentual_emoji_homens = df[df['genero_streamer'] == 'Homem']['contem_emoji'].mean() * 100
-# percentual_emoji_mulheres = df[df['genero_streamer'] == 'Mulher']['contem_emoji'].mean() * 100
-# print(f"Percentual de mensagens com 'kkkk' - Homens: {percentual_kkkk_homens:.2f}%, Mulheres: {percentual_kkkk_mulheres:.2f}%")
-# print(f"Percentual de mensagens com emojis - Homens: {percentual_emoji_homens:.2f}%, Mulheres: {percentual_emoji_mulheres:.2f}%")
+# canais_mulheres = ['BiahKov']
+# canais_homens = [canal for canal in mensagens_por_canal['canal'] if canal not in canais_mulheres]
+# comparacao = comparar_grupos(agregados, {'Homens': canais_homens, 'Mulheres': canais_mulheres}).set_index('grupo')
+
+# # Volume médio por live, intensidade do chat (mensagens por usuário) e tempo médio entre mensagens
+# print(f"Volume médio por live - Homens: {comparacao.loc['Homens', 'volume_medio_por_live']:.2f}, Mulheres: {comparacao.loc['Mulheres', 'volume_medio_por_live']:.2f}")
+# print(f"Mensagens por usuário - Homens: {comparacao.loc['Homens', 'mensagens_por_usuario']:.2f}, Mulheres: {comparacao.loc['Mulheres', 'mensagens_por_usuario']:.2f}")
+# print(f"Tempo médio entre mensagens (segundos) - Homens: {comparacao.loc['Homens', 'tempo_medio_entre_mensagens_s']:.2f}, Mulheres: {comparacao.loc['Mulheres', 'tempo_medio_entre_mensagens_s']:.2f}")
+
+# # Uso de termos e emojis (percentual de mensagens com "kkkk" e com emojis)
+# print(f"Percentual de mensagens com 'kkkk' - Homens: {comparacao.loc['Homens', 'percentual_risadas']:.2f}%, Mulheres: {comparacao.loc['Mulheres', 'percentual_risadas']:.2f}%")
+# print(f"Percentual de mensagens com emojis - Homens: {comparacao.loc['Homens', 'percentual_emojis']:.2f}%, Mulheres: {comparacao.loc['Mulheres', 'percentual_emojis']:.2f}%")
 
 # from fitter import Fitter
 
@@ -321,7 +270,7 @@ print(frequencia_palavras.most_common(10))
 # inscritos = [32400, 37800, 7470, 151000, 1440000]
 
 # # Calcular média de mensagens por transmissão a partir do DataFrame
-# mensagens_media = df.groupby('canal')['quantidade_mensagens'].mean().reindex(canais).fillna(0).values
+# mensagens_media = mensagens_por_canal.set_index('canal')['media_mensagens_por_live_ponderada'].reindex(canais).fillna(0).values
 
 # # Verificar os valores calculados
 # print("Média de mensagens por canal:", mensagens_media)
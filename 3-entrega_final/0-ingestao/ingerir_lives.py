@@ -0,0 +1,100 @@
+"""
+Inclui lives novas no armazém particionado e atualiza os artefatos derivados.
+
+Cada arquivo em ARQUIVOS_ENTRADA (CSV com as colunas do dataset unificado ou
+JSONL com um objeto por mensagem; diretórios são percorridos) é dividido por
+`id_video` e gravado como uma partição do armazém em DIR_ARMAZEM. Lives que
+já estão no armazém com o mesmo conteúdo são ignoradas.
+
+Na primeira execução, aponte ARQUIVOS_ENTRADA para o `dataset_unificado.csv`
+para migrar o dataset inteiro; depois, basta apontar para os arquivos das
+lives novas. Mensagens por live, hotspots, frequência de palavras e as
+tabelas agregadas por live e por canal/dia são recalculados apenas para as
+lives novas ou alteradas e combinados com os resultados das demais.
+"""
+import os
+import sys
+
+import pandas as pd
+from nltk.corpus import stopwords
+
+# Permite importar o pacote 'comum' a partir da raiz do repositório
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from comum.armazem_particionado import (
+    ArmazemParticionado, agregado_estatisticas_por_live, agregado_frequencia_palavras, agregado_hotspots,
+    agregado_mensagens_por_live, agregado_por_canal_dia, filtrar_frequencia,
+)
+
+# --- PARÂMETROS DE CONFIGURAÇÃO ---
+ARQUIVOS_ENTRADA = ["dataset_unificado.csv"]  # Arquivos .csv/.jsonl ou diretórios com eles
+DIR_ARMAZEM = "armazem_lives"
+ACRESCENTAR = False  # True: mensagens de lives já existentes são somadas às gravadas (ex.: coleta parcial)
+TAMANHO_JANELA = "10s"  # Mesmos parâmetros de 1-encontrar_hotspots.py
+TOP_N_HOTSPOTS = 10
+CALCULAR_FREQUENCIA_PALAVRAS = True  # Requer os recursos 'punkt' e 'stopwords' do NLTK
+# --- FIM DA CONFIGURAÇÃO ---
+
+
+def listar_arquivos(entradas):
+    """Expande diretórios em arquivos .csv/.jsonl, em ordem alfabética."""
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos += sorted(os.path.join(entrada, nome) for nome in os.listdir(entrada)
+                               if nome.endswith(('.csv', '.jsonl')))
+        else:
+            arquivos.append(entrada)
+    return arquivos
+
+
+def ler_arquivo(caminho):
+    """Lê um arquivo de mensagens em CSV ou JSONL."""
+    if caminho.endswith('.jsonl'):
+        return pd.read_json(caminho, lines=True, dtype=False)
+    return pd.read_csv(caminho)
+
+
+def main():
+    armazem = ArmazemParticionado(DIR_ARMAZEM)
+    print(f"Armazém '{DIR_ARMAZEM}': {len(armazem.particoes)} lives registradas.")
+
+    total_novas, total_alteradas = 0, 0
+    for caminho in listar_arquivos(ARQUIVOS_ENTRADA):
+        df = ler_arquivo(caminho)
+        novas, alteradas = armazem.adicionar(df, acrescentar=ACRESCENTAR)
+        total_novas += len(novas)
+        total_alteradas += len(alteradas)
+        print(f"'{os.path.basename(caminho)}': {len(df)} mensagens, "
+              f"{len(novas)} lives novas, {len(alteradas)} alteradas.")
+    print(f"\nTotal: {total_novas} lives novas e {total_alteradas} alteradas; "
+          f"{len(armazem.particoes)} lives no armazém.\n")
+
+    # --- ARTEFATOS DERIVADOS ---
+    mensagens_por_live = armazem.atualizar_agregado(agregado_mensagens_por_live())
+    mensagens_por_live.to_csv("mensagens_por_live.csv", index=False)
+    print(f"Mensagens por live salvas em 'mensagens_por_live.csv' ({len(mensagens_por_live)} lives).")
+
+    estatisticas = armazem.atualizar_agregado(agregado_estatisticas_por_live())
+    por_canal_dia = armazem.atualizar_agregado(agregado_por_canal_dia())
+    print(f"Tabelas agregadas atualizadas: {len(estatisticas)} lives, {len(por_canal_dia)} pares canal/dia.")
+
+    hotspots_df = armazem.atualizar_agregado(agregado_hotspots(TAMANHO_JANELA, TOP_N_HOTSPOTS))
+    hotspots_df.sort_values(by='mensagens_na_janela', ascending=False).to_csv("hotspots_encontrados.csv", index=False)
+    print(f"Hotspots salvos em 'hotspots_encontrados.csv' ({len(hotspots_df)} instantes).")
+
+    if CALCULAR_FREQUENCIA_PALAVRAS:
+        frequencia = armazem.atualizar_agregado(agregado_frequencia_palavras())
+        frequencia_filtrada = filtrar_frequencia(frequencia, set(stopwords.words('portuguese')),
+                                                 tamanho_minimo=2, ignorar_risadas=True)
+        print("\n10 palavras mais frequentes (sem stopwords do NLTK):")
+        print(frequencia_filtrada.most_common(10))
+
+
+# --- EXECUÇÃO DO SCRIPT ---
+if __name__ == "__main__":
+    try:
+        main()
+    except FileNotFoundError as e:
+        print(f"ERRO: O arquivo '{e.filename}' não foi encontrado.")
+    except KeyError as e:
+        print(f"ERRO: Uma coluna necessária não foi encontrada no arquivo: {e}")
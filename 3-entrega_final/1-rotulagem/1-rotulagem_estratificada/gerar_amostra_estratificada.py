@@ -1,13 +1,18 @@
-import pandas as pd
+import os
+import sys
 
-# Carrega o dataset unificado
-df = pd.read_csv("dataset_unificado.csv")
+# Permite importar o pacote 'comum' a partir da raiz do repositório
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.dataset import carregar_dataset
+
+# Carrega o dataset unificado (via cache colunar)
+df = carregar_dataset("dataset_unificado.csv")
 
 # Número de amostras por canal
 n_por_canal = 500
 
 # Seleciona a amostra estratificada (500 mensagens aleatórias de cada canal)
-amostra = df.groupby('canal', group_keys=False).sample(n=n_por_canal, random_state=42)
+amostra = df.groupby('canal', group_keys=False, observed=True).sample(n=n_por_canal, random_state=42)
 
 # Garante que a coluna 'canal' está presente
 amostra['canal'] = amostra['canal']
@@ -1,48 +1,51 @@
-import pandas as pd
+import os
+import sys
+
+# Permite importar o pacote 'comum' a partir da raiz do repositório
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.dataset import carregar_dataset
+from comum.hotspots import calcular_densidade, ordenar_por_live, top_hotspots_por_live
 
 # --- PARÂMETROS DE CONFIGURAÇÃO ---
 ARQUIVO_DE_DADOS = "dataset_unificado.csv"
-CANAIS_ALVO = ["LUANGAMEPLAY", "REnanPLAY"]
+COLUNAS_NECESSARIAS = ["canal", "id_video", "titulo", "timestamp"]
+CANAIS_ALVO = ["LUANGAMEPLAY", "REnanPLAY"]  # Use None para considerar todos os canais
 TAMANHO_JANELA = "10s"
 TOP_N_HOTSPOTS = 10
 # --- FIM DA CONFIGURAÇÃO ---
 
 
-def encontrar_hotspots(df):
+def encontrar_hotspots(df, canais=CANAIS_ALVO):
+    """
+    Encontra os TOP_N_HOTSPOTS instantes de maior densidade de cada live.
+
+    Todas as lives são processadas em uma única passada ordenada (ver
+    `comum.hotspots`). Use `canais=None` para analisar todos os canais.
+    """
     print("Iniciando a análise de densidade de mensagens...")
-    print("Convertendo coluna de timestamp...")
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df.sort_values(by=['id_video', 'timestamp'], inplace=True)
-    
-    todos_os_hotspots = []
-    videos_unicos = df[df['canal'].isin(CANAIS_ALVO)]['id_video'].unique()
-    print(f"Encontrados {len(videos_unicos)} vídeos para os canais {CANAIS_ALVO}.")
+    if canais is not None:
+        videos_alvo = df.loc[df['canal'].isin(canais), 'id_video'].unique()
+        df = df[df['id_video'].isin(videos_alvo)]
+    df = ordenar_por_live(df)
+
+    descricao_canais = canais if canais is not None else "(todos)"
+    print(f"Encontrados {df['id_video'].nunique()} vídeos para os canais {descricao_canais}.")
+
+    densidade = calcular_densidade(df, TAMANHO_JANELA)
+    top_hotspots = top_hotspots_por_live(df[['id_video', 'timestamp']], densidade, TOP_N_HOTSPOTS)
 
-    for video_id in videos_unicos:
-        live_df = df[df['id_video'] == video_id].copy()
-        canal_nome = live_df['canal'].iloc[0]
-        titulo_live = live_df['titulo'].iloc[0]
-        print(f"\nAnalisando live: '{titulo_live}' ({canal_nome})...")
-        live_df.set_index('timestamp', inplace=True)
-        live_df['contagem'] = 1
-        densidade = live_df['contagem'].rolling(window=TAMANHO_JANELA).sum()
-        top_hotspots = densidade.nlargest(TOP_N_HOTSPOTS)
+    # Canal e título são os da primeira mensagem de cada live
+    info_lives = df.drop_duplicates(subset='id_video')[['id_video', 'canal', 'titulo']]
+    hotspots_df = top_hotspots.merge(info_lives, on='id_video', how='left')
+    hotspots_df = hotspots_df.rename(columns={'titulo': 'titulo_live', 'timestamp': 'timestamp_hotspot'})
+    hotspots_df['mensagens_na_janela'] = hotspots_df['mensagens_na_janela'].astype(int)
 
-        for timestamp_hotspot, contagem_msg in top_hotspots.items():
-            todos_os_hotspots.append({
-                "canal": canal_nome,
-                "titulo_live": titulo_live,
-                "timestamp_hotspot": timestamp_hotspot,
-                "mensagens_na_janela": int(contagem_msg),
-                "id_video": video_id
-            })
-    
-    return pd.DataFrame(todos_os_hotspots)
+    return hotspots_df[['canal', 'titulo_live', 'timestamp_hotspot', 'mensagens_na_janela', 'id_video']]
 
 # --- EXECUÇÃO DO SCRIPT ---
 if __name__ == "__main__":
     try:
-        df_completo = pd.read_csv(ARQUIVO_DE_DADOS)
+        df_completo = carregar_dataset(ARQUIVO_DE_DADOS, colunas=COLUNAS_NECESSARIAS)
         hotspots_df = encontrar_hotspots(df_completo)
         
         print("\n\n--- RESULTADO FINAL: TOP HOTSPOTS ENCONTRADOS ---")
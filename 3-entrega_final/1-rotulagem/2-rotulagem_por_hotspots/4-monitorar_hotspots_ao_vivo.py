@@ -0,0 +1,150 @@
+"""
+Acompanha um arquivo de chat enquanto o coletor ainda está escrevendo nele e
+aponta os hotspots na hora, sem recarregar o `dataset_unificado.csv`.
+
+O arquivo pode ser CSV (com cabeçalho, mesmas colunas do dataset unificado)
+ou JSONL (um objeto por linha). As linhas novas são lidas a cada
+INTERVALO_LEITURA segundos e passadas ao `DetectorDeHotspots` (mesma janela e
+mesmo TOP_N de `1-encontrar_hotspots.py`). O top atual é salvo em
+ARQUIVO_SAIDA a cada leitura com mensagens novas; interrompa com Ctrl+C.
+"""
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Permite importar o pacote 'comum' a partir da raiz do repositório
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.hotspots_streaming import DetectorDeHotspots
+
+# --- PARÂMETROS DE CONFIGURAÇÃO ---
+ARQUIVO_CHAT = "chat_ao_vivo.csv"  # .csv ou .jsonl
+ARQUIVO_SAIDA = "hotspots_ao_vivo.csv"
+CANAIS_ALVO = None  # Ex.: ["LUANGAMEPLAY", "REnanPLAY"]. None considera todos os canais
+TAMANHO_JANELA = "10s"
+TOP_N_HOTSPOTS = 10
+LIMIAR_ALERTA = 50  # Densidade mínima para avisar na tela quando uma live bate seu próprio recorde
+INTERVALO_LEITURA = 1.0  # Segundos entre leituras do arquivo
+SEGUIR_ARQUIVO = True  # False: processa o que já existe no arquivo e termina
+# --- FIM DA CONFIGURAÇÃO ---
+
+
+def ler_linhas_novas(arquivo, pendente):
+    """
+    Lê as linhas completas acrescentadas desde a última leitura.
+
+    Uma linha sem '\\n' no fim ainda está sendo escrita e fica em `pendente`
+    para a próxima leitura. Retorna (linhas completas, novo pendente).
+    """
+    pendente += arquivo.read()
+    if '\n' not in pendente:
+        return [], pendente
+    completo, _, pendente = pendente.rpartition('\n')
+    return completo.split('\n'), pendente
+
+
+def interpretar_csv(linhas, colunas, registro_aberto):
+    """
+    Converte linhas CSV em registros.
+
+    Mensagens com quebra de linha ficam entre aspas e ocupam várias linhas; o
+    registro só é interpretado quando as aspas fecham (número par de aspas).
+    Retorna (registros, parte do registro ainda aberta).
+    """
+    registros = []
+    for linha in linhas:
+        registro_aberto = f"{registro_aberto}\n{linha}" if registro_aberto else linha
+        if registro_aberto.count('"') % 2:
+            continue
+        if registro_aberto.strip():
+            valores = next(csv.reader(io.StringIO(registro_aberto)))
+            registros.append(dict(zip(colunas, valores)))
+        registro_aberto = ''
+    return registros, registro_aberto
+
+
+def interpretar_jsonl(linhas):
+    """Converte linhas JSONL em registros, ignorando linhas vazias ou inválidas."""
+    registros = []
+    for linha in linhas:
+        try:
+            registros.append(json.loads(linha))
+        except json.JSONDecodeError:
+            continue
+    return registros
+
+
+def processar_registros(detector, registros, recordes):
+    """Passa os registros ao detector e avisa quando uma live atinge um novo pico acima de LIMIAR_ALERTA."""
+    if not registros:
+        return 0
+    lote = pd.DataFrame.from_records(registros)
+    if CANAIS_ALVO is not None:
+        lote = lote[lote['canal'].isin(CANAIS_ALVO)]
+    lote = lote.assign(timestamp=pd.to_datetime(lote['timestamp'], utc=True, errors='coerce'))
+    lote = lote.dropna(subset=['id_video', 'timestamp'])
+
+    canais = lote['canal'].tolist() if 'canal' in lote else [None] * len(lote)
+    titulos = lote['titulo'].tolist() if 'titulo' in lote else [None] * len(lote)
+    for id_video, t, canal, titulo in zip(lote['id_video'].tolist(), lote['timestamp'].tolist(), canais, titulos):
+        densidade, entrou_no_top = detector.processar(id_video, t, canal, titulo)
+        if entrou_no_top and densidade >= LIMIAR_ALERTA and densidade > recordes.get(id_video, 0):
+            recordes[id_video] = densidade
+            print(f"[{t:%H:%M:%S}] HOTSPOT {canal} / {id_video}: {densidade} mensagens em {TAMANHO_JANELA}")
+    return len(lote)
+
+
+def monitorar():
+    detector = DetectorDeHotspots(TAMANHO_JANELA, TOP_N_HOTSPOTS)
+    eh_jsonl = ARQUIVO_CHAT.endswith(('.jsonl', '.json'))
+    colunas, pendente, registro_aberto = None, '', ''
+    recordes = {}  # Maior densidade já avisada de cada live
+    total = 0
+
+    print(f"Acompanhando '{ARQUIVO_CHAT}' (janela de {TAMANHO_JANELA}, top {TOP_N_HOTSPOTS} por live)...")
+    with open(ARQUIVO_CHAT, 'r', encoding='utf-8', newline='') as arquivo:
+        try:
+            while True:
+                linhas, pendente = ler_linhas_novas(arquivo, pendente)
+                if not linhas:
+                    if not SEGUIR_ARQUIVO:
+                        break
+                    time.sleep(INTERVALO_LEITURA)
+                    continue
+
+                linhas = [l.rstrip('\r') for l in linhas]
+                if eh_jsonl:
+                    registros = interpretar_jsonl(linhas)
+                else:
+                    if colunas is None:
+                        colunas = next(csv.reader([linhas.pop(0)]))
+                    registros, registro_aberto = interpretar_csv(linhas, colunas, registro_aberto)
+
+                n = processar_registros(detector, registros, recordes)
+                if n:
+                    total += n
+                    detector.hotspots().to_csv(ARQUIVO_SAIDA, index=False)
+        except KeyboardInterrupt:
+            print("\nMonitoramento interrompido.")
+
+    hotspots_df = detector.hotspots()
+    hotspots_df.to_csv(ARQUIVO_SAIDA, index=False)
+    print(f"\n{total} mensagens processadas em {len(detector.lives)} lives.")
+    if detector.mensagens_atrasadas:
+        print(f"Aviso: {detector.mensagens_atrasadas} mensagens chegaram fora de ordem.")
+    print(f"Hotspots salvos em '{ARQUIVO_SAIDA}'.")
+    return hotspots_df
+
+
+# --- EXECUÇÃO DO SCRIPT ---
+if __name__ == "__main__":
+    try:
+        monitorar()
+    except FileNotFoundError:
+        print(f"ERRO: O arquivo '{ARQUIVO_CHAT}' não foi encontrado.")
+    except KeyError as e:
+        print(f"ERRO: Uma coluna necessária não foi encontrada no arquivo: {e}")
@@ -1,9 +1,16 @@
-import pandas as pd
-import re
+import os
+import sys
 import nltk
-from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 
+# Permite importar o pacote 'comum' a partir da raiz do repositório
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.dataset import iterar_lotes
+from comum.frequencia import contar_palavras_paralelo
+
+# Processos usados na contagem de palavras (None = todos os núcleos)
+N_PROCESSOS = None
+
 # # Downloads do NLTK (só precisa uma vez)
 # nltk.download('punkt')
 # nltk.download('stopwords')
@@ -13,22 +20,13 @@ stop_words_basicas = set(stopwords.words('portuguese'))
 # Adicionamos algumas palavras muito comuns que poluem a análise
 stop_words_basicas.update(['q', 'pra', 'tá', 'ta', 'https', 'https://', 'http', 'http://'])
 
-# Carrega o dataset completo
-print("Carregando dataset completo...")
-df = pd.read_csv("/home/israel/Documentos/GitHub/dataset_unificado.csv")
-
-print("Processando texto...")
-texto_completo = ' '.join(df['mensagem'].dropna().astype(str).tolist())
-palavras = word_tokenize(texto_completo.lower())
-
-palavras_filtradas = []
-for palavra in palavras:
-    # Mantém apenas palavras com letras e que não estejam na lista BÁSICA de stopwords
-    if palavra.isalpha() and len(palavra) > 2 and palavra not in stop_words_basicas:
-        palavras_filtradas.append(palavra)
-
-# Calcula a frequência das palavras
-frequencia_palavras = nltk.FreqDist(palavras_filtradas)
+# Conta as palavras do dataset completo em streaming: as mensagens são lidas em
+# lotes do cache colunar, sem montar o texto completo nem a lista de tokens
+print("Processando texto do dataset completo em lotes...")
+lotes_de_mensagens = (
+    lote['mensagem'] for lote in iterar_lotes("/home/israel/Documentos/GitHub/dataset_unificado.csv", colunas=['mensagem'])
+)
+frequencia_palavras = nltk.FreqDist(contar_palavras_paralelo(lotes_de_mensagens, stop_words_basicas, tamanho_minimo=3, n_processos=N_PROCESSOS))
 
 # --- RESULTADO PRINCIPAL ---
 print("\n--- AS 200 PALAVRAS MAIS FREQUENTES (ANTES DA LIMPEZA AGRESSIVA) ---")
@@ -1,5 +1,11 @@
-import pandas as pd
-import re
+import os
+import sys
+
+# Permite importar o pacote 'comum' a partir da raiz do repositório
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.dataset import carregar_linhas
+from comum.dicionario import CasadorDeTermos, carregar_dicionario
+from comum.indice_termos import amostrar, linhas_com_algum_termo, obter_indice
 
 # --- PARÂMETROS DE CONFIGURAÇÃO ---
 
@@ -12,6 +18,17 @@ ARQUIVO_DICIONARIO = "TCC-1/dicionario.txt"
 # O tamanho da nova amostra que você quer gerar para rotular
 TAMANHO_AMOSTRA_FINAL = 1000
 
+# Modo de sorteio da amostra:
+#   'uniforme'    -> sorteio simples entre todas as mensagens encontradas
+#   'termo'       -> mesma cota para cada termo do dicionário
+#   'canal'       -> mesma cota para cada canal
+#   'termo_canal' -> mesma cota para cada combinação de termo e canal
+MODO_AMOSTRAGEM = 'uniforme'
+SEMENTE = 42
+
+# Índice invertido termo -> linhas do dataset (reconstruído automaticamente quando necessário)
+ARQUIVO_INDICE = "indice_termos.npz"
+
 # Nome do arquivo de saída com a nova amostra
 ARQUIVO_SAIDA = "amostra_por_palavra_chave.csv"
 
@@ -20,37 +37,32 @@ ARQUIVO_SAIDA = "amostra_por_palavra_chave.csv"
 try:
     # 1. Carregar o dicionário de palavras-chave
     print(f"Carregando dicionário do arquivo: {ARQUIVO_DICIONARIO}")
-    with open(ARQUIVO_DICIONARIO, 'r', encoding='utf-8') as f:
-        # Lê cada linha, remove espaços em branco extras e ignora linhas vazias
-        palavras_chave = [line.strip() for line in f if line.strip()]
+    # Lê cada linha, remove espaços em branco extras e ignora linhas vazias
+    palavras_chave = carregar_dicionario(ARQUIVO_DICIONARIO)
     
     if not palavras_chave:
         print("ERRO: O arquivo de dicionário está vazio ou não foi encontrado.")
     else:
         print(f"{len(palavras_chave)} palavras-chave carregadas com sucesso.")
 
-        # 2. Carregar o dataset completo
-        print(f"Carregando dataset completo: {ARQUIVO_DE_DADOS}...")
-        df_completo = pd.read_csv(ARQUIVO_DE_DADOS)
-        
-        # 3. Criar um padrão de regex para buscar todas as palavras-chave de uma vez
-        # O `re.escape` garante que caracteres especiais nas palavras não quebrem o regex
-        # O `|` funciona como um "OU"
-        # `case=False` torna a busca insensível a maiúsculas/minúsculas
-        padrao_regex = '|'.join(re.escape(palavra) for palavra in palavras_chave)
-        print("Buscando por mensagens que contenham as palavras-chave...")
-        
-        # Filtra o dataframe, mantendo apenas as linhas que contêm pelo menos uma das palavras
-        df_filtrado = df_completo[df_completo['mensagem'].str.contains(padrao_regex, case=False, na=False)].copy()
-        
-        print(f"Encontradas {len(df_filtrado)} mensagens contendo os termos do dicionário.")
+        # 2. Obter o índice invertido termo -> linhas do dataset
+        # O índice é construído uma única vez com um autômato de Aho–Corasick (busca sem
+        # diferenciar maiúsculas/minúsculas) e reconstruído apenas quando o dataset ou o
+        # dicionário mudam. Mudar o tamanho, a semente ou o modo não exige nova busca.
+        indice = obter_indice(ARQUIVO_DE_DADOS, palavras_chave, ARQUIVO_INDICE)
+        total_encontradas = len(linhas_com_algum_termo(indice))
+        print(f"Encontradas {total_encontradas} mensagens contendo os termos do dicionário.")
 
-        # 4. Criar a subamostra aleatória a partir dos resultados filtrados
-        if len(df_filtrado) > 0:
-            n_amostras = min(len(df_filtrado), TAMANHO_AMOSTRA_FINAL)
-            
-            print(f"Selecionando uma subamostra aleatória de {n_amostras} mensagens para rotulagem...")
-            subamostra = df_filtrado.sample(n=n_amostras, random_state=42)
+        # 3. Sortear as linhas da subamostra a partir do índice
+        if total_encontradas > 0:
+            print(f"Selecionando uma subamostra de até {TAMANHO_AMOSTRA_FINAL} mensagens (modo '{MODO_AMOSTRAGEM}')...")
+            linhas_sorteadas = amostrar(indice, TAMANHO_AMOSTRA_FINAL, modo=MODO_AMOSTRAGEM, random_state=SEMENTE)
+
+            # 4. Recuperar apenas as linhas sorteadas do cache colunar e registrar quais termos cada uma contém
+            subamostra = carregar_linhas(ARQUIVO_DE_DADOS, linhas_sorteadas)
+            casador = CasadorDeTermos(palavras_chave)
+            subamostra['termos_encontrados'] = subamostra['mensagem'].map(lambda texto: '|'.join(casador.encontrar(texto)))
+            print(f"Subamostra com {len(subamostra)} mensagens.")
             
             # Adiciona colunas para rotulagem
             subamostra['classificacao_binaria'] = ''
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Cache persistente (SQLite) dos scores da Perspective API.
+
+A chave é (texto normalizado, atributo, idiomas). Com isso:
+- mensagens repetidas ("k", "kkkkk", ...) são consultadas uma única vez;
+- textos que ficam iguais após o pré-processamento são reaproveitados entre
+  os cenários 'bruto' e 'padrao';
+- reexecutar o experimento (ex.: com outro LIMIAR_TOXICIDADE) não faz
+  nenhuma chamada à API.
+
+A normalização (Unicode NFC e remoção de espaços nas pontas) vale só para a
+chave: o texto enviado à API é o do cenário, sem alterações. Textos que a API
+recusa (erro permanente, ex.: idioma não suportado) são gravados com
+SCORE_ERRO, para não serem reenviados nas próximas execuções.
+"""
+import sqlite3
+import unicodedata
+
+SCORE_ERRO = -1.0  # Score gravado para textos recusados pela API
+
+
+def normalizar_texto(texto):
+    """Normaliza o texto usado como chave do cache."""
+    if not isinstance(texto, str):
+        return ""
+    return unicodedata.normalize('NFC', texto).strip()
+
+
+class CacheScores(object):
+    """Armazena scores por (texto, atributo, idiomas) em um arquivo SQLite."""
+    def __init__(self, caminho, intervalo_commit=50):
+        self.conexao = sqlite3.connect(caminho)
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " texto TEXT NOT NULL, atributo TEXT NOT NULL, idiomas TEXT NOT NULL,"
+            " score REAL NOT NULL, PRIMARY KEY (texto, atributo, idiomas))"
+        )
+        self.conexao.commit()
+        self.intervalo_commit = intervalo_commit
+        self._pendentes = 0
+
+    def obter(self, textos, atributo, idiomas):
+        """Retorna um dicionário texto -> score com os textos já presentes no cache."""
+        chave_idiomas = ','.join(idiomas)
+        encontrados = {}
+        textos = list(set(textos))
+        # Consulta em blocos para respeitar o limite de parâmetros do SQLite
+        for inicio in range(0, len(textos), 500):
+            bloco = textos[inicio:inicio + 500]
+            marcadores = ','.join('?' * len(bloco))
+            linhas = self.conexao.execute(
+                f"SELECT texto, score FROM scores WHERE atributo = ? AND idiomas = ? AND texto IN ({marcadores})",
+                [atributo, chave_idiomas, *bloco],
+            )
+            encontrados.update(linhas)
+        return encontrados
+
+    def gravar(self, texto, atributo, idiomas, score):
+        """Grava um score. O commit é feito a cada `intervalo_commit` gravações e em `fechar`."""
+        self.conexao.execute(
+            "INSERT OR REPLACE INTO scores (texto, atributo, idiomas, score) VALUES (?, ?, ?, ?)",
+            (texto, atributo, ','.join(idiomas), float(score)),
+        )
+        self._pendentes += 1
+        if self._pendentes >= self.intervalo_commit:
+            self.conexao.commit()
+            self._pendentes = 0
+
+    def fechar(self):
+        self.conexao.commit()
+        self.conexao.close()
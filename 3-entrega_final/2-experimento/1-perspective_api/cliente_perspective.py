@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Cliente concorrente para a Perspective API, com limite de requisições por segundo.
+
+- Um limitador do tipo "token bucket" garante no máximo `qps` requisições por
+  segundo, somando todas as threads.
+- Até `max_concorrencia` requisições ficam em andamento ao mesmo tempo, o que
+  esconde a latência de rede sem ultrapassar a cota.
+- Respostas 429 e 5xx (e falhas de conexão) são repetidas com backoff
+  exponencial, respeitando o cabeçalho `Retry-After` quando presente. Se as
+  tentativas se esgotam, uma `ErroPerspectiveAPI` é lançada em vez de o texto
+  receber um score fictício.
+- A URL é configurável, então o cliente pode ser apontado para um servidor
+  HTTP local que simula a API. A função que faz a requisição (`abrir_url`), o
+  relógio e a espera (`relogio`, `dormir`) também podem ser substituídos, o
+  que permite testar o cliente sem rede e sem esperar de verdade.
+
+Usa apenas a biblioteca padrão (urllib) para as requisições.
+"""
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+URL_PERSPECTIVE = "https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze"
+CODIGOS_REPETIVEIS = {429, 500, 502, 503, 504}
+
+
+class ErroPerspectiveAPI(Exception):
+    """Erro da API para um texto. `repetivel` indica se as tentativas se esgotaram em um erro temporário."""
+    def __init__(self, mensagem, status=None, repetivel=False):
+        super().__init__(mensagem)
+        self.status = status
+        self.repetivel = repetivel
+
+
+class LimitadorTaxa(object):
+    """Token bucket thread-safe: libera até `qps` requisições por segundo, com rajada de até `capacidade`."""
+    def __init__(self, qps, capacidade=1, relogio=time.monotonic, dormir=time.sleep):
+        self.qps = float(qps)
+        self.capacidade = float(capacidade)
+        self.relogio = relogio
+        self.dormir = dormir
+        self._fichas = self.capacidade
+        self._ultimo = relogio()
+        self._trava = threading.Lock()
+
+    def adquirir(self):
+        """Bloqueia até haver uma ficha disponível. As fichas são reservadas em ordem de chegada."""
+        with self._trava:
+            agora = self.relogio()
+            self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.qps)
+            self._ultimo = agora
+            self._fichas -= 1
+            espera = 0.0 if self._fichas >= 0 else -self._fichas / self.qps
+        if espera > 0:
+            self.dormir(espera)
+
+
+class ClientePerspective(object):
+    """Consulta o score de um atributo (por padrão, TOXICITY) para vários textos em paralelo."""
+    def __init__(self, api_key, qps=1.0, max_concorrencia=4, max_tentativas=6,
+                 backoff_inicial=1.0, backoff_maximo=60.0, timeout=30.0,
+                 atributo='TOXICITY', idiomas=('pt',), url=URL_PERSPECTIVE,
+                 abrir_url=urllib.request.urlopen, relogio=time.monotonic, dormir=time.sleep):
+        self.api_key = api_key
+        self.max_concorrencia = max_concorrencia
+        self.max_tentativas = max_tentativas
+        self.backoff_inicial = backoff_inicial
+        self.backoff_maximo = backoff_maximo
+        self.timeout = timeout
+        self.atributo = atributo
+        self.idiomas = list(idiomas)
+        self.url = url
+        self.abrir_url = abrir_url
+        self.dormir = dormir
+        self.limitador = LimitadorTaxa(qps, relogio=relogio, dormir=dormir)
+
+    def _requisitar(self, texto):
+        corpo = json.dumps({
+            'comment': {'text': texto},
+            'requestedAttributes': {self.atributo: {}},
+            'languages': self.idiomas,
+        }).encode('utf-8')
+        requisicao = urllib.request.Request(
+            f"{self.url}?key={self.api_key}", data=corpo,
+            headers={'Content-Type': 'application/json'}, method='POST',
+        )
+        with self.abrir_url(requisicao, timeout=self.timeout) as resposta:
+            dados = json.loads(resposta.read().decode('utf-8'))
+        return dados['attributeScores'][self.atributo]['summaryScore']['value']
+
+    def _espera_backoff(self, tentativa, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_maximo)
+            except ValueError:
+                pass
+        # Backoff exponencial com "full jitter"
+        return random.uniform(0, min(self.backoff_maximo, self.backoff_inicial * (2 ** tentativa)))
+
+    def pontuar(self, texto):
+        """Retorna o score de um texto, repetindo a requisição em erros temporários."""
+        for tentativa in range(self.max_tentativas):
+            self.limitador.adquirir()
+            try:
+                return self._requisitar(texto)
+            except urllib.error.HTTPError as e:
+                if e.code not in CODIGOS_REPETIVEIS:
+                    detalhe = e.read().decode('utf-8', errors='replace')
+                    raise ErroPerspectiveAPI(f"HTTP {e.code}: {detalhe}", status=e.code) from e
+                ultimo_erro, status = e, e.code
+                espera = self._espera_backoff(tentativa, e.headers.get('Retry-After'))
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                ultimo_erro, status = e, None
+                espera = self._espera_backoff(tentativa)
+            if tentativa + 1 < self.max_tentativas:
+                self.dormir(espera)
+        raise ErroPerspectiveAPI(
+            f"Tentativas esgotadas ({self.max_tentativas}): {ultimo_erro}", status=status, repetivel=True
+        )
+
+    def pontuar_lote(self, textos, desc="Consultando API", ao_concluir=None):
+        """
+        Pontua uma lista de textos com concorrência limitada e barra de progresso.
+
+        Textos vazios recebem score 0.0 sem consulta à API. Se `ao_concluir` for
+        informado, é chamado como `ao_concluir(posicao, score)` na thread principal
+        a cada score obtido, permitindo salvar o progresso durante a execução.
+
+        Returns:
+            (scores, erros): `scores` na mesma ordem de `textos`, com `None` nos
+            textos que a API recusou; `erros` é uma lista de (posição, ErroPerspectiveAPI).
+
+        Raises:
+            ErroPerspectiveAPI: se um erro temporário persistir após todas as tentativas.
+        """
+        scores = [None] * len(textos)
+        erros = []
+
+        def tarefa(i):
+            if not textos[i]:
+                return i, 0.0, None
+            try:
+                return i, self.pontuar(textos[i]), None
+            except ErroPerspectiveAPI as e:
+                if e.repetivel:
+                    raise
+                return i, None, e
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concorrencia)
+        try:
+            futuros = [executor.submit(tarefa, i) for i in range(len(textos))]
+            for futuro in tqdm(as_completed(futuros), total=len(futuros), desc=desc):
+                i, score, erro = futuro.result()
+                scores[i] = score
+                if erro is not None:
+                    erros.append((i, erro))
+                elif ao_concluir is not None:
+                    ao_concluir(i, score)
+        finally:
+            # Em caso de falha, não envia as requisições que ainda não começaram
+            executor.shutdown(wait=True, cancel_futures=True)
+        erros.sort(key=lambda item: item[0])
+        return scores, erros
@@ -1,13 +1,16 @@
 import pandas as pd
 import numpy as np
 import re
-import time
 import os
 import datetime
+import sys
 from sklearn.metrics import f1_score, confusion_matrix
 from tqdm import tqdm
-from googleapiclient import discovery
-from googleapiclient.errors import HttpError
+from cliente_perspective import ClientePerspective
+from cache_scores import SCORE_ERRO, CacheScores, normalizar_texto
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.canonicalizacao import canonizar
 
 # --- PARÂMETROS DO EXPERIMENTO ---
 API_KEY = "SUA_CHAVE_API_AQUI" # IMPORTANTE: Insira sua chave da API aqui
@@ -18,11 +21,21 @@ timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
 ARQUIVO_ROTULADO = os.path.join(script_dir, "amostra_rotulada.csv")
 ARQUIVO_LOG = os.path.join(script_dir, f"log_experimento_persp_api_{timestamp}.txt")
+ARQUIVO_CACHE_SCORES = os.path.join(script_dir, "cache_scores_perspective.sqlite")
+ARQUIVO_SCORES = os.path.join(script_dir, "scores_api.csv")  # Lido por rodar_varredura_limiares.py
 # --- Fim da definição dinâmica ---
 
 N_REPLICACOES = 30
 LIMIAR_TOXICIDADE = 0.60
 
+# Parâmetros do cliente da API
+QPS_API = 1.0            # Cota de requisições por segundo do projeto na Perspective API
+MAX_CONCORRENCIA = 4     # Requisições simultâneas em andamento (esconde a latência de rede)
+MAX_TENTATIVAS = 6       # Tentativas por texto em respostas 429/5xx, com backoff exponencial
+ATRIBUTO_API = 'TOXICITY'
+IDIOMAS_API = ('pt',)
+CANONIZAR_MENSAGENS = False # Envia a forma canônica (risadas/emojis repetidos reduzidos): menos chamadas, mas altera o experimento
+
 # --- INÍCIO DO LOG ---
 log_output = []
 log_output.append("--- INÍCIO DO LOG DO EXPERIMENTO (PERSPECTIVE API) ---")
@@ -37,38 +50,48 @@ def preprocessamento_padrao(texto):
     texto = re.sub(r'[\n\r]+', ' ', texto)
     return texto.strip()
 
-def obter_predicoes_api(dataframe, api_key):
-    # (O conteúdo desta função permanece o mesmo)
-    client = discovery.build("commentanalyzer", "v1alpha1", developerKey=api_key, static_discovery=False)
-    textos = dataframe['mensagem_processada'].tolist()
-    predicoes = []
-    scores = []
-
-    print(f"Iniciando {len(textos)} chamadas à Perspective API...")
-    log_output.append(f"\nIniciando {len(textos)} chamadas à Perspective API...")
-    for texto in tqdm(textos, desc="Consultando API"):
-        if not texto:
-            predicoes.append(0)
-            scores.append(0.0)
-            continue
-
-        analyze_request = {'comment': {'text': texto}, 'requestedAttributes': {'TOXICITY': {}}, 'languages': ['pt']}
-        
-        try:
-            response = client.comments().analyze(body=analyze_request).execute()
-            score = response['attributeScores']['TOXICITY']['summaryScore']['value']
-            predicao = 1 if score > LIMIAR_TOXICIDADE else 0
-            predicoes.append(predicao)
-            scores.append(score)
-        except HttpError as e:
-            error_msg = f"Erro na API para o texto: '{texto[:30]}...'. Erro: {e}. Assumindo predição 'Não Tóxico'."
-            print(error_msg)
-            log_output.append(error_msg)
-            predicoes.append(0)
-            scores.append(-1.0)
-
-        time.sleep(1.1) # Pausa para não exceder o limite de requisições da API
-    
+def obter_predicoes_api(dataframe, api_key, cache):
+    cliente = ClientePerspective(
+        api_key, qps=QPS_API, max_concorrencia=MAX_CONCORRENCIA, max_tentativas=MAX_TENTATIVAS,
+        atributo=ATRIBUTO_API, idiomas=IDIOMAS_API,
+    )
+    # A API recebe o texto do cenário; a normalização vale apenas para a chave do cache
+    enviados = [canonizar(t) if CANONIZAR_MENSAGENS else t for t in dataframe['mensagem_processada']]
+    chaves = [normalizar_texto(t) for t in enviados]
+
+    # Consulta a API apenas para textos distintos que ainda não estão no cache
+    scores_por_chave = cache.obter(chaves, ATRIBUTO_API, IDIOMAS_API)
+    texto_por_chave = {}
+    for chave, texto in zip(chaves, enviados):
+        if chave and chave not in scores_por_chave:
+            texto_por_chave.setdefault(chave, texto)
+    pendentes = sorted(texto_por_chave)
+    recusados_antes = sum(1 for score in scores_por_chave.values() if score == SCORE_ERRO)
+
+    msg = (f"\n{len(chaves)} mensagens, {len(set(chaves))} textos distintos, "
+           f"{len(set(chaves)) - len(pendentes)} já no cache ({recusados_antes} recusados pela API em execuções anteriores). "
+           f"Iniciando {len(pendentes)} chamadas à Perspective API...")
+    print(msg)
+    log_output.append(msg)
+
+    def ao_concluir(i, score):
+        scores_por_chave[pendentes[i]] = score
+        cache.gravar(pendentes[i], ATRIBUTO_API, IDIOMAS_API, score)
+
+    # Erros temporários (429/5xx) são repetidos pelo cliente; se persistirem, o experimento é interrompido
+    # (os scores obtidos até ali ficam salvos no cache)
+    _, erros = cliente.pontuar_lote([texto_por_chave[c] for c in pendentes], ao_concluir=ao_concluir)
+
+    # Textos recusados pela API (ex.: idioma não suportado) ficam registrados no log e no cache
+    for i, erro in erros:
+        error_msg = f"Erro na API para o texto: '{pendentes[i][:30]}...'. Erro: {erro}. Assumindo predição 'Não Tóxico'."
+        print(error_msg)
+        log_output.append(error_msg)
+        scores_por_chave[pendentes[i]] = SCORE_ERRO
+        cache.gravar(pendentes[i], ATRIBUTO_API, IDIOMAS_API, SCORE_ERRO)
+
+    scores = [scores_por_chave.get(c, 0.0) if c else 0.0 for c in chaves]
+    predicoes = [1 if score > LIMIAR_TOXICIDADE else 0 for score in scores]
     return predicoes, scores
 
 # --- EXECUÇÃO DO EXPERIMENTO ---
@@ -89,9 +112,20 @@ df_bruto['mensagem_processada'] = df_bruto['mensagem']
 df_padrao = df_original.copy()
 df_padrao['mensagem_processada'] = df_padrao['mensagem'].apply(preprocessamento_padrao)
 
-# Obtém as predições e scores
-df_bruto['predicao_api'], df_bruto['score_api'] = obter_predicoes_api(df_bruto, API_KEY)
-df_padrao['predicao_api'], df_padrao['score_api'] = obter_predicoes_api(df_padrao, API_KEY)
+# Obtém as predições e scores (reaproveitando o cache entre cenários e execuções)
+cache_scores = CacheScores(ARQUIVO_CACHE_SCORES)
+try:
+    df_bruto['predicao_api'], df_bruto['score_api'] = obter_predicoes_api(df_bruto, API_KEY, cache_scores)
+    df_padrao['predicao_api'], df_padrao['score_api'] = obter_predicoes_api(df_padrao, API_KEY, cache_scores)
+finally:
+    cache_scores.fechar()
+
+# Salva os scores de cada cenário para a varredura de limiares (rodar_varredura_limiares.py)
+pd.concat([
+    df[['classificacao_binaria', 'mensagem_processada', 'score_api']].assign(cenario=nome_cenario)
+    for df, nome_cenario in [(df_bruto, "bruto"), (df_padrao, "padrao")]
+]).to_csv(ARQUIVO_SCORES, index=False)
+print(f"Scores salvos em: '{ARQUIVO_SCORES}'")
 
 # Realiza o Bootstrap
 resultados = {"bruto": [], "padrao": []}
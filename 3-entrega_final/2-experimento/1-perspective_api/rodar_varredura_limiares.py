@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Varredura de limiares de toxicidade sobre os scores já obtidos da Perspective API.
+
+Lê o arquivo `scores_api.csv` salvo por `rodar_experimento_persp_api.py` (nenhuma
+chamada à API é feita) e, para cada cenário de pré-processamento, calcula o
+F1-Score (classe 1) de uma grade de limiares em milhares de réplicas de
+bootstrap, de forma vetorizada (ver `comum/bootstrap.py`). O resultado é a curva
+F1 x limiar com intervalo de confiança, salva em CSV e em gráfico.
+"""
+import os
+import sys
+import datetime
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+# Permite importar o pacote 'comum' a partir da raiz do repositório
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.bootstrap import f1_bootstrap_limiares, f1_por_limiar, resumir_curva
+
+# --- PARÂMETROS DA VARREDURA ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+ARQUIVO_SCORES = os.path.join(script_dir, "scores_api.csv")
+ARQUIVO_CURVA = os.path.join(script_dir, f"curva_f1_limiares_{timestamp}.csv")
+ARQUIVO_GRAFICO = os.path.join(script_dir, f"curva_f1_limiares_{timestamp}.png")
+ARQUIVO_LOG = os.path.join(script_dir, f"log_varredura_limiares_{timestamp}.txt")
+
+LIMIARES = np.round(np.arange(0.0, 1.0, 0.01), 2)
+N_REPLICACOES = 10000
+NIVEL_CONFIANCA = 0.95
+RANDOM_STATE = 42
+# --- FIM DOS PARÂMETROS ---
+
+log_output = []
+log_output.append("--- INÍCIO DO LOG DA VARREDURA DE LIMIARES (PERSPECTIVE API) ---")
+log_output.append(f"Data de execução: {pd.Timestamp.now()}")
+log_output.append(f"Réplicas de bootstrap: {N_REPLICACOES} | Limiares: {LIMIARES[0]} a {LIMIARES[-1]} ({len(LIMIARES)} valores)")
+log_output.append("-" * 30)
+
+try:
+    df_scores = pd.read_csv(ARQUIVO_SCORES)
+except FileNotFoundError:
+    print(f"\nERRO: O arquivo '{os.path.basename(ARQUIVO_SCORES)}' não foi encontrado.")
+    print("Execute antes o 'rodar_experimento_persp_api.py' para obter os scores.")
+    exit()
+
+curvas = []
+plt.figure(figsize=(10, 6))
+for nome_cenario, df in df_scores.groupby('cenario', sort=False):
+    y_true = df['classificacao_binaria'].to_numpy()
+    scores = df['score_api'].to_numpy()
+
+    f1s = f1_bootstrap_limiares(y_true, scores, LIMIARES, n_replicacoes=N_REPLICACOES, random_state=RANDOM_STATE)
+    curva = resumir_curva(f1s, LIMIARES, f1_completo=f1_por_limiar(y_true, scores, LIMIARES), nivel=NIVEL_CONFIANCA)
+    curvas.append(curva.assign(cenario=nome_cenario))
+
+    melhor = curva.loc[curva['f1_medio'].idxmax()]
+    linhas = [
+        f"\nPré-processamento: {nome_cenario.capitalize()}",
+        f"Melhor limiar (F1 médio): {melhor['limiar']:.2f} -> F1 = {melhor['f1_medio']:.4f} "
+        f"(IC {NIVEL_CONFIANCA:.0%}: {melhor['ic_inferior']:.4f} a {melhor['ic_superior']:.4f})",
+    ]
+    for linha in linhas:
+        print(linha)
+        log_output.append(linha)
+
+    plt.plot(curva['limiar'], curva['f1_medio'], label=nome_cenario.capitalize())
+    plt.fill_between(curva['limiar'], curva['ic_inferior'], curva['ic_superior'], alpha=0.2)
+
+plt.xlabel('Limiar de toxicidade')
+plt.ylabel('F1-Score (classe 1)')
+plt.title(f'F1 x limiar (bootstrap com {N_REPLICACOES} réplicas, IC {NIVEL_CONFIANCA:.0%})')
+plt.legend()
+plt.tight_layout()
+plt.savefig(ARQUIVO_GRAFICO, dpi=300)
+plt.close()
+
+pd.concat(curvas).to_csv(ARQUIVO_CURVA, index=False)
+print(f"\nCurva salva em: '{ARQUIVO_CURVA}'")
+print(f"Gráfico salvo em: '{ARQUIVO_GRAFICO}'")
+
+log_output.append("\n--- FIM DO LOG ---")
+with open(ARQUIVO_LOG, 'w', encoding='utf-8') as f:
+    f.write("\n".join(log_output))
+print(f"Log da varredura salvo em: '{ARQUIVO_LOG}'")
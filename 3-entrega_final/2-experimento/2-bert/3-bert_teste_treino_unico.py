@@ -2,6 +2,9 @@
 """
 Script de teste para uma ÚNICA execução de treinamento do modelo BERT.
 Este script serve para depuração e testes rápidos.
+
+O modelo da época com melhor F1 de validação é salvo em DIR_MODELO_TREINADO
+(formato `save_pretrained`), para ser usado na inferência sobre o dataset completo.
 """
 # --------------------------------------------------------------------------
 # 1. IMPORTAÇÃO DAS BIBLIOTECAS
@@ -14,11 +17,11 @@ import torch
 import numpy as np
 import os
 from torch.optim import AdamW
-from transformers import BertTokenizer, BertForSequenceClassification, get_linear_schedule_with_warmup
-from torch.utils.data import TensorDataset, DataLoader, RandomSampler, SequentialSampler
+from transformers import BertForSequenceClassification, BertTokenizer, get_linear_schedule_with_warmup
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import f1_score
 from math import isfinite
+from utilitarios_bert import criar_dataloader, tokenizar_com_cache
 
 # --------------------------------------------------------------------------
 # 2. CONFIGURAÇÕES GLOBAIS
@@ -29,6 +32,8 @@ timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 
 NOME_ARQUIVO_DADOS = os.path.join(script_dir, 'amostra_rotulada.csv')
 ARQUIVO_DE_LOG = os.path.join(script_dir, f'log_teste_treino_unico_{timestamp}.txt')
+DIR_CACHE_TOKENS = os.path.join(script_dir, '.cache_tokens')
+DIR_MODELO_TREINADO = os.path.join(script_dir, 'modelo_treinado')
 
 # Parâmetros do modelo e colunas
 NOME_COLUNA_TEXTO = 'mensagem'
@@ -41,6 +46,7 @@ BATCH_SIZE = 16
 TEST_SIZE = 0.15
 RANDOM_STATE = 42
 EPOCHS = 3
+AGRUPAR_POR_COMPRIMENTO = False # Lotes de treino com mensagens de comprimento parecido (menos padding)
 
 # --------------------------------------------------------------------------
 # 3. CLASSES E FUNÇÕES AUXILIARES
@@ -77,25 +83,18 @@ def main():
     textos = df[NOME_COLUNA_TEXTO].astype(str).tolist()
     rotulos = df[NOME_COLUNA_ROTULO].tolist()
 
-    tokenizer = BertTokenizer.from_pretrained(NOME_MODELO_BERT)
-
-    encoded_data = tokenizer.batch_encode_plus(
-        textos, add_special_tokens=True, return_attention_mask=True,
-        padding='max_length', max_length=MAX_LENGTH, truncation=True, return_tensors='pt'
-    )
-    input_ids, attention_masks, labels = encoded_data['input_ids'], encoded_data['attention_mask'], torch.tensor(rotulos)
+    tensores = tokenizar_com_cache(textos, NOME_MODELO_BERT, MAX_LENGTH, 'bruto', DIR_CACHE_TOKENS)
+    input_ids, attention_masks, labels = tensores['input_ids'], tensores['attention_mask'], torch.tensor(rotulos)
 
     train_inputs, val_inputs, train_labels, val_labels, train_masks, val_masks = train_test_split(
         input_ids, labels, attention_masks, random_state=RANDOM_STATE, test_size=TEST_SIZE, stratify=labels
     )
     
-    train_data = TensorDataset(train_inputs, train_masks, train_labels)
-    train_sampler = RandomSampler(train_data)
-    train_dataloader = DataLoader(train_data, sampler=train_sampler, batch_size=BATCH_SIZE)
-
-    val_data = TensorDataset(val_inputs, val_masks, val_labels)
-    val_sampler = SequentialSampler(val_data)
-    val_dataloader = DataLoader(val_data, sampler=val_sampler, batch_size=BATCH_SIZE)
+    # Padding dinâmico: cada lote é cortado no comprimento da sua maior mensagem
+    train_dataloader = criar_dataloader(train_inputs, train_masks, train_labels, BATCH_SIZE, treino=True,
+                                        agrupar_por_comprimento=AGRUPAR_POR_COMPRIMENTO)
+    val_dataloader = criar_dataloader(val_inputs, val_masks, val_labels, BATCH_SIZE, treino=False,
+                                      agrupar_por_comprimento=AGRUPAR_POR_COMPRIMENTO)
     print("Dados prontos e organizados em DataLoaders.\n")
 
     # --- FASE 2: Treinamento e Validação ---
@@ -110,6 +109,7 @@ def main():
     scheduler = get_linear_schedule_with_warmup(optimizer, num_warmup_steps=0, num_training_steps=total_steps)
 
     print(f"--- FASE 2: Iniciando o treinamento por {EPOCHS} épocas ---")
+    melhor_f1 = -1.0
     
     for epoch_i in range(0, EPOCHS):
         print(f'\n======== Época {epoch_i + 1} / {EPOCHS} ========')
@@ -152,7 +152,15 @@ def main():
         print(f"Tempo da Época: {epoch_time}")
         print(f"Loss Treino: {avg_train_loss:.4f} | Loss Val: {avg_val_loss:.4f} | F1 Val (Binário): {f1:.4f}")
 
+        if f1 > melhor_f1:
+            melhor_f1 = f1
+            model.save_pretrained(DIR_MODELO_TREINADO)
+            print(f"Melhor F1 até agora; modelo salvo em '{os.path.basename(DIR_MODELO_TREINADO)}'.")
+
+    # O tokenizador acompanha o modelo para que a inferência não dependa do nome original
+    BertTokenizer.from_pretrained(NOME_MODELO_BERT, do_lower_case=False).save_pretrained(DIR_MODELO_TREINADO)
     print("\n--- Treinamento Concluído! ---")
+    print(f"Melhor F1 de validação: {melhor_f1:.4f}")
 
 # --------------------------------------------------------------------------
 # 5. PONTO DE ENTRADA DO SCRIPT
@@ -5,12 +5,24 @@ Script final para o experimento fatorial com BERT.
 Executa N repetições de Bootstrap do treinamento e calcula o F1-Score médio.
 Pode ser configurado para rodar com dados 'bruto' ou 'padrao'.
 
+As repetições podem rodar em paralelo, em N_PROCESSOS_PARALELOS processos,
+cada um usando uma parte dos núcleos da CPU (THREADS_POR_PROCESSO). Cada
+repetição i usa a semente i para o sorteio do bootstrap, para a camada de
+classificação e para a ordem dos lotes, então o resultado de uma repetição
+não depende de quantas rodam ao mesmo tempo.
+
+Além do log em texto, métricas de desempenho de cada época (tempo de forward,
+backward, otimizador e avaliação, mensagens e tokens por segundo, fração de
+padding e pico de memória) são gravadas em ARQUIVO_METRICAS, uma linha JSON por
+época. Com REPLICA_PERFILADA, um trace do `torch.profiler` é salvo para essa repetição.
+
 Os caminhos para os arquivos de dados e de log são definidos dinamicamente
 com base na localização do script e incluem um timestamp para evitar sobreescrita.
 """
 # --------------------------------------------------------------------------
 # 1. IMPORTAÇÃO DAS BIBLIOTECAS
 # --------------------------------------------------------------------------
+import io
 import sys
 import time
 import datetime
@@ -19,13 +31,18 @@ import torch
 import numpy as np
 import re
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from torch.optim import AdamW
-from transformers import BertTokenizer, BertForSequenceClassification, get_linear_schedule_with_warmup
-from torch.utils.data import TensorDataset, DataLoader, RandomSampler, SequentialSampler
+from transformers import BertForSequenceClassification, get_linear_schedule_with_warmup
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import f1_score
 from sklearn.utils import resample
 from math import isfinite
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.canonicalizacao import deduplicar
+from utilitarios_bert import (anexar_metricas, carregar_modelo_base, carregar_replicas_concluidas, criar_dataloader,
+                               criar_modelo_da_base, hash_configuracao, pico_memoria_mb, registrar_replica,
+                               sincronizar, tokenizar_com_cache)
 
 
 # --------------------------------------------------------------------------
@@ -49,6 +66,10 @@ nome_arquivo_log = f'log_bert_{TIPO_PREPROCESSAMENTO}_{timestamp}.txt'
 # Constrói o caminho completo para os arquivos
 NOME_ARQUIVO_DADOS = os.path.join(script_dir, nome_arquivo_csv)
 ARQUIVO_DE_LOG = os.path.join(script_dir, nome_arquivo_log)
+DIR_CACHE_TOKENS = os.path.join(script_dir, '.cache_tokens')
+ARQUIVO_RESULTADOS = os.path.join(script_dir, f'resultados_bert_{TIPO_PREPROCESSAMENTO}.jsonl') # Nome fixo para permitir retomar
+ARQUIVO_METRICAS = os.path.join(script_dir, f'metricas_bert_{TIPO_PREPROCESSAMENTO}_{timestamp}.jsonl')
+DIR_PERFIL = os.path.join(script_dir, f'perfil_bert_{TIPO_PREPROCESSAMENTO}_{timestamp}')
 # --- Fim da seção de caminhos dinâmicos ---
 
 # Parâmetros do modelo
@@ -62,8 +83,20 @@ BATCH_SIZE = 16
 TEST_SIZE = 0.15
 RANDOM_STATE = 42
 EPOCHS = 3
+AGRUPAR_POR_COMPRIMENTO = False # Lotes de treino com mensagens de comprimento parecido (menos padding)
+PACIENCIA_EARLY_STOPPING = None # Avaliações seguidas sem melhora antes de parar. None = sempre treina as EPOCHS épocas
+METRICA_EARLY_STOPPING = 'f1' # 'f1' (F1 de validação) ou 'loss' (loss de validação)
+AVALIAR_A_CADA_N_PASSOS = None # Avalia também a cada N passos de treino. None = só ao fim de cada época
+CANONIZAR_MENSAGENS = False # Reduz risadas, emojis repetidos e espaços antes de tokenizar (altera o experimento)
 N_REPLICACOES = 30 # Número de repetições do Bootstrap. Sugestão do professor para experimentos futuros: utilizar valores maiores (50, 100...)
 
+# Paralelismo entre repetições (útil em máquinas só com CPU e muitos núcleos)
+N_PROCESSOS_PARALELOS = 1 # Repetições rodando ao mesmo tempo. 1 = sequencial, no próprio processo
+THREADS_POR_PROCESSO = None # Threads do PyTorch por processo. None = núcleos da CPU divididos entre os processos
+
+# Instrumentação
+REPLICA_PERFILADA = None # Índice (a partir de 0) da repetição perfilada com torch.profiler. None = nenhuma
+
 # --------------------------------------------------------------------------
 # 3. CLASSES E FUNÇÕES AUXILIARES
 # --------------------------------------------------------------------------
@@ -77,6 +110,16 @@ class Logger(object):
     def flush(self):
         self.terminal.flush(); self.log.flush()
 
+class CapturaSaida(object):
+    """Repete a saída no terminal e guarda uma cópia em memória (processos paralelos não têm o Logger)."""
+    def __init__(self):
+        self.terminal = sys.stdout
+        self.texto = io.StringIO()
+    def write(self, message):
+        self.terminal.write(message); self.texto.write(message)
+    def flush(self):
+        self.terminal.flush()
+
 def preprocessamento_padrao(texto: str) -> str:
     """Aplica uma limpeza básica no texto: minúsculas e remoção de quebras de linha."""
     if not isinstance(texto, str): return ""
@@ -87,95 +130,281 @@ def preprocessamento_padrao(texto: str) -> str:
 # --------------------------------------------------------------------------
 # 4. FUNÇÃO PRINCIPAL DE TREINAMENTO E AVALIAÇÃO
 # --------------------------------------------------------------------------
-def treinar_e_avaliar(df_amostra: pd.DataFrame, device: torch.device) -> float:
-    """Recebe uma amostra do dataframe, treina, avalia o modelo e retorna o melhor F1-Score."""
-    textos = df_amostra[NOME_COLUNA_TEXTO].astype(str).tolist()
-    rotulos = df_amostra[NOME_COLUNA_ROTULO].tolist()
+def avaliar(model: BertForSequenceClassification, val_dataloader, device: torch.device) -> tuple:
+    """Avalia o modelo no conjunto de validação e retorna (loss média, F1 da classe 1)."""
+    model.eval()
+    val_loss = 0.0
+    all_preds, all_labels = [], []
+    with torch.no_grad():
+        for batch in val_dataloader:
+            b_input_ids, b_input_mask, b_labels = [t.to(device) for t in batch]
+            output = model(b_input_ids,
+                           attention_mask=b_input_mask,
+                           labels=b_labels)
 
-    tokenizer = BertTokenizer.from_pretrained(NOME_MODELO_BERT, do_lower_case=False)
-    
-    encoded_data = tokenizer.batch_encode_plus(
-        textos, add_special_tokens=True, return_attention_mask=True,
-        padding='max_length', max_length=MAX_LENGTH, truncation=True, return_tensors='pt'
-    )
-    input_ids, attention_masks, labels = encoded_data['input_ids'], encoded_data['attention_mask'], torch.tensor(rotulos)
+            loss = output.loss
+            val_loss += loss.item()
+
+            logits = output.logits
+            preds = np.argmax(logits.detach().cpu().numpy(), axis=1)
+            labels = b_labels.cpu().numpy()
+            all_preds.extend(preds)
+            all_labels.extend(labels)
+    model.train()
+
+    avg_val_loss = val_loss / len(val_dataloader)
+    f1 = f1_score(all_labels, all_preds, pos_label=1, average='binary', zero_division=0)
+    if not np.isfinite(f1):
+        f1 = 0.0
+    return avg_val_loss, f1
+
+class ParadaAntecipada(object):
+    """Indica quando parar o treino: `paciencia` avaliações seguidas sem melhora da métrica."""
+    def __init__(self, paciencia, metrica='f1', tolerancia=1e-4):
+        if metrica not in ('f1', 'loss'):
+            raise ValueError(f"Métrica de parada inválida: '{metrica}'. Use 'f1' ou 'loss'.")
+        self.paciencia = paciencia
+        self.metrica = metrica
+        self.tolerancia = tolerancia
+        self.melhor = None
+        self.sem_melhora = 0
+
+    def deve_parar(self, f1, loss_val):
+        """Registra uma avaliação e retorna True se a paciência se esgotou."""
+        valor = f1 if self.metrica == 'f1' else -loss_val
+        if self.melhor is None or valor > self.melhor + self.tolerancia:
+            self.melhor = valor
+            self.sem_melhora = 0
+        else:
+            self.sem_melhora += 1
+        return self.paciencia is not None and self.sem_melhora >= self.paciencia
+
+def criar_perfilador(dir_perfil: str, device: torch.device):
+    """Cria um `torch.profiler` que grava, em formato do TensorBoard, alguns passos de treino."""
+    from torch.profiler import ProfilerActivity, profile, schedule, tensorboard_trace_handler
+
+    atividades = [ProfilerActivity.CPU] + ([ProfilerActivity.CUDA] if device.type == 'cuda' else [])
+    return profile(activities=atividades, schedule=schedule(wait=1, warmup=1, active=5, repeat=1),
+                   on_trace_ready=tensorboard_trace_handler(dir_perfil), record_shapes=True, profile_memory=True)
+
+def treinar_e_avaliar(input_ids: torch.Tensor, attention_masks: torch.Tensor, labels: torch.Tensor,
+                      device: torch.device, modelo_base: BertForSequenceClassification, semente: int,
+                      prefixo: str = "", arquivo_metricas: str = None, dir_perfil: str = None) -> dict:
+    """
+    Recebe os tensores de uma amostra já tokenizada, treina e avalia o modelo.
+
+    O modelo da réplica é uma cópia de `modelo_base` (pesos já em memória), com a camada
+    de classificação inicializada a partir de `semente`. A mesma semente fixa a ordem dos
+    lotes de treino, então a réplica é reprodutível.
+
+    A validação roda ao fim de cada época e, se AVALIAR_A_CADA_N_PASSOS for definido,
+    também a cada N passos de treino. Com PACIENCIA_EARLY_STOPPING, o treino para
+    quando a métrica METRICA_EARLY_STOPPING não melhora por esse número de avaliações.
+
+    Se `arquivo_metricas` for informado, cada época gera uma linha JSON com os tempos
+    de criação do modelo (só na primeira época), forward, backward, otimizador e
+    avaliação, a vazão, a fração de padding e o pico de memória. Se `dir_perfil` for
+    informado, alguns passos de treino são perfilados.
+
+    Returns:
+        Dicionário com o melhor F1-Score (`melhor_f1`); por época, o F1 (`f1_por_epoca`),
+        as losses de treino e validação e o tempo em segundos; todas as avaliações
+        (`avaliacoes`); a época/passo em que o treino terminou (`epoca_parada`,
+        `passo_parada`, `parada_antecipada`); e o tempo de criação do modelo
+        (`tempo_criacao_modelo`).
+    """
+    torch.manual_seed(semente)
 
     train_inputs, val_inputs, train_labels, val_labels, train_masks, val_masks = train_test_split(
         input_ids, labels, attention_masks, random_state=RANDOM_STATE,
         test_size=TEST_SIZE, stratify=labels
     )
 
-    train_data = TensorDataset(train_inputs, train_masks, train_labels)
-    train_sampler = RandomSampler(train_data)
-    train_dataloader = DataLoader(train_data, sampler=train_sampler, batch_size=BATCH_SIZE)
+    # Padding dinâmico: cada lote é cortado no comprimento da sua maior mensagem
+    train_dataloader = criar_dataloader(train_inputs, train_masks, train_labels, BATCH_SIZE, treino=True,
+                                        agrupar_por_comprimento=AGRUPAR_POR_COMPRIMENTO)
+    val_dataloader = criar_dataloader(val_inputs, val_masks, val_labels, BATCH_SIZE, treino=False,
+                                      agrupar_por_comprimento=AGRUPAR_POR_COMPRIMENTO)
 
-    val_data = TensorDataset(val_inputs, val_masks, val_labels)
-    val_sampler = SequentialSampler(val_data)
-    val_dataloader = DataLoader(val_data, sampler=val_sampler, batch_size=BATCH_SIZE)
-
-    model = BertForSequenceClassification.from_pretrained(
-        NOME_MODELO_BERT, num_labels=2, output_attentions=False, output_hidden_states=False,
-    )
+    # Cópia do modelo base e nova camada de classificação: custo fixo de cada réplica
+    t0 = time.perf_counter()
+    model = criar_modelo_da_base(modelo_base, semente)
     model.to(device)
+    sincronizar(device)
+    tempo_criacao_modelo = time.perf_counter() - t0
 
     optimizer = AdamW(model.parameters(), lr=2e-5, eps=1e-8)
     total_steps = len(train_dataloader) * EPOCHS
     scheduler = get_linear_schedule_with_warmup(optimizer, num_warmup_steps=0, num_training_steps=total_steps)
     
     best_f1_score = 0.0
+    historico = {'f1_por_epoca': [], 'loss_treino_por_epoca': [], 'loss_val_por_epoca': [], 'tempo_por_epoca': [],
+                 'avaliacoes': []}
+    parada = ParadaAntecipada(PACIENCIA_EARLY_STOPPING, METRICA_EARLY_STOPPING)
+    passo = 0
+    parar = False
+    perfilador = criar_perfilador(dir_perfil, device) if dir_perfil else None
+    if perfilador is not None:
+        perfilador.start()
+    tempos = {}
+
+    def registrar_avaliacao(epoch_i):
+        nonlocal best_f1_score
+        t0 = time.perf_counter()
+        avg_val_loss, f1 = avaliar(model, val_dataloader, device)
+        tempos['avaliacao'] += time.perf_counter() - t0
+        best_f1_score = max(best_f1_score, f1)
+        historico['avaliacoes'].append({'epoca': epoch_i + 1, 'passo': passo, 'loss_val': float(avg_val_loss),
+                                        'f1': float(f1)})
+        return avg_val_loss, f1, parada.deve_parar(f1, avg_val_loss)
 
     for epoch_i in range(EPOCHS):
-        print(f"\n---- Época {epoch_i + 1}/{EPOCHS} ----")
+        t0_epoca = time.time()
+        print(f"\n{prefixo}---- Época {epoch_i + 1}/{EPOCHS} ----")
 
         model.train()
         train_loss = 0.0
+        passos_na_epoca = 0
+        tempos.update(forward=0.0, backward=0.0, otimizador=0.0, avaliacao=0.0)
+        amostras = tokens_reais = tokens_totais = 0
         for batch in train_dataloader:
             b_input_ids, b_input_mask, b_labels = [t.to(device) for t in batch]
+            amostras += len(b_labels)
+            tokens_reais += int(b_input_mask.sum())
+            tokens_totais += b_input_mask.numel()
 
+            t0 = time.perf_counter()
             optimizer.zero_grad()
+            t_forward = time.perf_counter()
             output = model(b_input_ids,
                            attention_mask=b_input_mask,
                            labels=b_labels)
             loss = output.loss
             train_loss += loss.item()
+            t1 = time.perf_counter()
 
             loss.backward()
+            sincronizar(device)
+            t2 = time.perf_counter()
+
             torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
             optimizer.step()
             scheduler.step()
+            sincronizar(device)
+            t3 = time.perf_counter()
+            tempos['forward'] += t1 - t_forward
+            tempos['backward'] += t2 - t1
+            tempos['otimizador'] += (t_forward - t0) + (t3 - t2)  # zero_grad + clip + step
+
+            passo += 1
+            passos_na_epoca += 1
+            if perfilador is not None:
+                perfilador.step()
+
+            # Avaliação intermediária (a do último passo da época é feita abaixo)
+            if (AVALIAR_A_CADA_N_PASSOS and passo % AVALIAR_A_CADA_N_PASSOS == 0
+                    and passos_na_epoca < len(train_dataloader)):
+                avg_val_loss, f1, parar = registrar_avaliacao(epoch_i)
+                print(f"{prefixo}Passo {passo}: Loss Val: {avg_val_loss:.4f} | F1 Val: {f1:.4f}")
+                if parar:
+                    break
+
+        avg_train_loss = train_loss / passos_na_epoca
+        if not parar:
+            avg_val_loss, f1, parar = registrar_avaliacao(epoch_i)
+
+        print(f"{prefixo}Loss Treino: {avg_train_loss:.4f} | Loss Val: {avg_val_loss:.4f} | F1 Val: {f1:.4f}")
+        historico['f1_por_epoca'].append(float(f1))
+        historico['loss_treino_por_epoca'].append(float(avg_train_loss))
+        historico['loss_val_por_epoca'].append(float(avg_val_loss))
+        historico['tempo_por_epoca'].append(time.time() - t0_epoca)
+
+        tempo_treino = tempos['forward'] + tempos['backward'] + tempos['otimizador']
+        pico_rss, pico_gpu = pico_memoria_mb(device)
+        metricas = {
+            'replica': semente, 'epoca': epoch_i + 1, 'passos': passos_na_epoca,
+            'tempo_epoca': time.time() - t0_epoca,
+            # Criação do modelo conta só na primeira época, para que a soma das épocas dê o total da réplica
+            'tempo_criacao_modelo': tempo_criacao_modelo if epoch_i == 0 else 0.0, 'tempo_forward': tempos['forward'],
+            'tempo_backward': tempos['backward'], 'tempo_otimizador': tempos['otimizador'],
+            'tempo_avaliacao': tempos['avaliacao'],
+            'amostras_por_segundo': amostras / tempo_treino if tempo_treino > 0 else None,
+            'tokens_por_segundo': tokens_reais / tempo_treino if tempo_treino > 0 else None,
+            'fracao_padding': 1 - tokens_reais / tokens_totais if tokens_totais else None,
+            'pico_rss_mb': pico_rss, 'pico_gpu_mb': pico_gpu,
+            'loss_treino': float(avg_train_loss), 'loss_val': float(avg_val_loss), 'f1': float(f1),
+        }
+        if epoch_i == 0:
+            print(f"{prefixo}Criação do modelo da réplica: {tempo_criacao_modelo:.1f}s")
+        print(f"{prefixo}Tempos (s): forward {tempos['forward']:.1f} | backward {tempos['backward']:.1f} | "
+              f"otimizador {tempos['otimizador']:.1f} | avaliação {tempos['avaliacao']:.1f} | "
+              f"{metricas['amostras_por_segundo'] or 0:.1f} amostras/s | padding {metricas['fracao_padding'] or 0:.1%}")
+        if arquivo_metricas:
+            anexar_metricas(arquivo_metricas, metricas)
+
+        if parar:
+            print(f"{prefixo}Parada antecipada na época {epoch_i + 1} (passo {passo}): "
+                  f"{METRICA_EARLY_STOPPING} sem melhora em {PACIENCIA_EARLY_STOPPING} avaliações.")
+            break
+
+    if perfilador is not None:
+        perfilador.stop()
+        print(f"{prefixo}Trace do profiler salvo em '{os.path.basename(dir_perfil)}'. Operações mais custosas:")
+        print(perfilador.key_averages().table(sort_by="self_cpu_time_total", row_limit=15))
+
+    historico.update(epoca_parada=epoch_i + 1, passo_parada=passo, parada_antecipada=parar,
+                     tempo_criacao_modelo=tempo_criacao_modelo)
+    return {'melhor_f1': float(best_f1_score), **historico}
+
+
+# Dados compartilhados pelas repetições de um processo (preenchido por `inicializar_processo`)
+_ESTADO_PROCESSO = {}
+
+def inicializar_processo(input_ids: torch.Tensor, attention_masks: torch.Tensor, labels: torch.Tensor,
+                         modelo_base: BertForSequenceClassification, device: torch.device, n_threads=None,
+                         arquivo_metricas: str = None, dir_perfil: str = None):
+    """
+    Guarda os tensores e o modelo base no processo e limita as threads do PyTorch.
+
+    Os caminhos de saída são recebidos do processo principal, já que os nomes
+    com timestamp seriam outros se calculados de novo em cada processo.
+    """
+    if n_threads:
+        torch.set_num_threads(n_threads)
+    _ESTADO_PROCESSO.update(input_ids=input_ids, attention_masks=attention_masks, labels=labels,
+                            modelo_base=modelo_base, device=device, arquivo_metricas=arquivo_metricas,
+                            dir_perfil=dir_perfil)
+
+def rodar_replica(i: int, paralelo: bool = False) -> dict:
+    """
+    Sorteia a amostra de bootstrap da repetição `i` (semente i), treina e avalia.
+
+    Em paralelo, o que a repetição imprime é devolvido em `saida`, para que o
+    processo principal o grave no arquivo de log.
+    """
+    t0 = time.time()
+    if paralelo:
+        sys.stdout = CapturaSaida()
+    estado = _ESTADO_PROCESSO
+    n = len(estado['labels'])
+
+    # Mesmas linhas que resample(df_original, ..., random_state=i) sortearia
+    indices = torch.from_numpy(resample(np.arange(n), replace=True, n_samples=n, random_state=i))
 
-        avg_train_loss = train_loss / len(train_dataloader)
-
-        model.eval()
-        val_loss = 0.0
-        all_preds, all_labels = [], []
-        with torch.no_grad():
-            for batch in val_dataloader:
-                b_input_ids, b_input_mask, b_labels = [t.to(device) for t in batch]
-                output = model(b_input_ids,
-                               attention_mask=b_input_mask,
-                               labels=b_labels)
-
-                loss = output.loss
-                val_loss += loss.item()
-
-                logits = output.logits
-                preds = np.argmax(logits.detach().cpu().numpy(), axis=1)
-                labels = b_labels.cpu().numpy()
-                all_preds.extend(preds)
-                all_labels.extend(labels)
-
-        avg_val_loss = val_loss / len(val_dataloader)
-        f1 = f1_score(all_labels, all_preds, pos_label=1, average='binary', zero_division=0)
-
-        print(f"Loss Treino: {avg_train_loss:.4f} | Loss Val: {avg_val_loss:.4f} | F1 Val: {f1:.4f}")
-
-        if f1 > best_f1_score:
-            if not np.isfinite(f1):
-                f1 = 0.0
-            best_f1_score = max(best_f1_score, f1)
-       
-    return float(best_f1_score)
+    try:
+        resultado = treinar_e_avaliar(estado['input_ids'][indices], estado['attention_masks'][indices],
+                                      estado['labels'][indices], estado['device'], estado['modelo_base'],
+                                      semente=i, prefixo=f"[Repetição {i + 1}] " if paralelo else "",
+                                      arquivo_metricas=estado['arquivo_metricas'],
+                                      dir_perfil=estado['dir_perfil'] if i == REPLICA_PERFILADA else None)
+    finally:
+        if paralelo:
+            captura, sys.stdout = sys.stdout, sys.stdout.terminal
+    if paralelo:
+        resultado['saida'] = captura.texto.getvalue()
+    resultado['replica'] = i
+    resultado['tempo_segundos'] = time.time() - t0
+    return resultado
 
 
 # --------------------------------------------------------------------------
@@ -195,6 +424,18 @@ def main():
         print("Aplicando pré-processamento padrão na coluna de mensagens...")
         df_original[NOME_COLUNA_TEXTO] = df_original[NOME_COLUNA_TEXTO].apply(preprocessamento_padrao)
         print("Pré-processamento aplicado com sucesso.\n")
+
+    # Tokeniza uma única vez cada mensagem distinta; as linhas e as réplicas apenas indexam os tensores
+    textos_unicos, inverso, _ = deduplicar(df_original[NOME_COLUNA_TEXTO].astype(str), canonizar_textos=CANONIZAR_MENSAGENS)
+    print(f"{len(df_original)} mensagens, {len(textos_unicos)} distintas"
+          f"{' após a forma canônica' if CANONIZAR_MENSAGENS else ''}.")
+    t0 = time.perf_counter()
+    tensores = tokenizar_com_cache(textos_unicos, NOME_MODELO_BERT, MAX_LENGTH, TIPO_PREPROCESSAMENTO, DIR_CACHE_TOKENS)
+    tempo_tokenizacao = time.perf_counter() - t0
+    inverso = torch.from_numpy(inverso)
+    input_ids, attention_masks = tensores['input_ids'][inverso], tensores['attention_mask'][inverso]
+    labels = torch.tensor(df_original[NOME_COLUNA_ROTULO].tolist())
+    print()
     
     if torch.cuda.is_available():
         device = torch.device("cuda")
@@ -203,23 +444,78 @@ def main():
         device = torch.device("cpu")
         print('Nenhuma GPU encontrada, usando CPU.\n')
 
-    lista_de_f1_scores = []
-    
-    print(f"--- Iniciando {N_REPLICACOES} repetições de Bootstrap ---")
-    
-    for i in range(N_REPLICACOES):
-        t0 = time.time()
-        print(f"\n--- Repetição {i + 1}/{N_REPLICACOES} ---")
-        
-        amostra_bootstrap = resample(df_original, replace=True, n_samples=len(df_original), random_state=i)
-        
-        melhor_f1 = treinar_e_avaliar(amostra_bootstrap, device)
-        lista_de_f1_scores.append(melhor_f1)
-        
-        tempo_da_replica = time.strftime("%H:%M:%S", time.gmtime(time.time() - t0))
-        print(f"Melhor F1-Score da repetição: {melhor_f1:.4f}")
+    # Identifica a configuração; N_REPLICACOES fica de fora para que aumentar o número de
+    # repetições aproveite as já concluídas
+    hash_config = hash_configuracao({
+        'modelo': NOME_MODELO_BERT, 'preprocessamento': TIPO_PREPROCESSAMENTO, 'max_length': MAX_LENGTH,
+        'batch_size': BATCH_SIZE, 'test_size': TEST_SIZE, 'random_state': RANDOM_STATE, 'epochs': EPOCHS,
+        'agrupar_por_comprimento': AGRUPAR_POR_COMPRIMENTO, 'canonizar_mensagens': CANONIZAR_MENSAGENS,
+        'paciencia': PACIENCIA_EARLY_STOPPING, 'metrica_parada': METRICA_EARLY_STOPPING,
+        'avaliar_a_cada_n_passos': AVALIAR_A_CADA_N_PASSOS,
+    }, NOME_ARQUIVO_DADOS)
+    resultados = {i: r for i, r in carregar_replicas_concluidas(ARQUIVO_RESULTADOS, hash_config).items()
+                  if i < N_REPLICACOES}
+    pendentes = [i for i in range(N_REPLICACOES) if i not in resultados]
+    print(f"Configuração: {hash_config} | Resultados em '{os.path.basename(ARQUIVO_RESULTADOS)}'")
+    if resultados:
+        print(f"{len(resultados)} repetições já concluídas serão reaproveitadas: {sorted(r + 1 for r in resultados)}")
+
+    print(f"--- Iniciando {len(pendentes)} de {N_REPLICACOES} repetições de Bootstrap ---")
+
+    def registrar(resultado):
+        resultado = {'hash_config': hash_config, 'semente': resultado['replica'], **resultado,
+                     'concluida_em': datetime.datetime.now().isoformat(timespec='seconds')}
+        registrar_replica(ARQUIVO_RESULTADOS, resultado)
+        resultados[resultado['replica']] = resultado
+        tempo_da_replica = time.strftime("%H:%M:%S", time.gmtime(resultado['tempo_segundos']))
+        print(f"Melhor F1-Score da repetição: {resultado['melhor_f1']:.4f}")
+        print(f"Treino encerrado na época {resultado['epoca_parada']}/{EPOCHS}"
+              f"{' (parada antecipada)' if resultado['parada_antecipada'] else ''}")
         print(f"Tempo da repetição: {tempo_da_replica}")
 
+    if pendentes:
+        # Os pesos pré-treinados são lidos do disco uma única vez para todo o experimento
+        t0 = time.perf_counter()
+        modelo_base = carregar_modelo_base(NOME_MODELO_BERT)
+        tempo_carregar_modelo = time.perf_counter() - t0
+        print(f"Tokenização: {tempo_tokenizacao:.1f}s | Carregamento do modelo: {tempo_carregar_modelo:.1f}s")
+        anexar_metricas(ARQUIVO_METRICAS, {'etapa': 'preparacao', 'tempo_tokenizacao': tempo_tokenizacao,
+                                           'tempo_carregar_modelo': tempo_carregar_modelo,
+                                           'mensagens': len(labels), 'mensagens_distintas': len(textos_unicos)})
+        print(f"Métricas de desempenho por época em '{os.path.basename(ARQUIVO_METRICAS)}'")
+
+    if not pendentes:
+        print("Todas as repetições já estavam concluídas.")
+    elif N_PROCESSOS_PARALELOS <= 1:
+        inicializar_processo(input_ids, attention_masks, labels, modelo_base, device, THREADS_POR_PROCESSO,
+                             ARQUIVO_METRICAS, DIR_PERFIL)
+        for i in pendentes:
+            print(f"\n--- Repetição {i + 1}/{N_REPLICACOES} ---")
+            registrar(rodar_replica(i))
+    else:
+        n_threads = THREADS_POR_PROCESSO or max(1, (os.cpu_count() or 1) // N_PROCESSOS_PARALELOS)
+        print(f"Rodando {N_PROCESSOS_PARALELOS} repetições em paralelo, com {n_threads} threads cada.")
+        # 'spawn' evita herdar o estado de threads do PyTorch; os tensores e o modelo
+        # base são enviados uma vez por processo, em memória compartilhada
+        contexto = torch.multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=N_PROCESSOS_PARALELOS, mp_context=contexto,
+                                 initializer=inicializar_processo,
+                                 initargs=(input_ids, attention_masks, labels, modelo_base, device, n_threads,
+                                           ARQUIVO_METRICAS, DIR_PERFIL)) as executor:
+            futuros = [executor.submit(rodar_replica, i, True) for i in pendentes]
+            for concluidas, futuro in enumerate(as_completed(futuros), start=1):
+                resultado = futuro.result()
+                # As linhas da repetição já apareceram no terminal; aqui vão só para o log
+                saida = resultado.pop('saida', '')
+                if isinstance(sys.stdout, Logger):
+                    sys.stdout.log.write(saida)
+                print(f"\n--- Repetição {resultado['replica'] + 1} concluída ({concluidas}/{len(pendentes)}) ---")
+                print(f"F1 por época: {[round(f, 4) for f in resultado['f1_por_epoca']]}")
+                registrar(resultado)
+
+    # Resultados na ordem das sementes, independentemente da ordem de conclusão
+    lista_de_f1_scores = [resultados[i]['melhor_f1'] for i in range(N_REPLICACOES)]
+
     f1_medio = np.mean(lista_de_f1_scores)
     f1_std = np.std(lista_de_f1_scores)
     
@@ -230,6 +526,8 @@ def main():
     print(f"Pré-processamento: {TIPO_PREPROCESSAMENTO}")
     print(f"Número de Replicações: {N_REPLICACOES}")
     print(f"F1-Scores individuais (arredondado): {[round(f, 4) for f in lista_de_f1_scores]}")
+    if PACIENCIA_EARLY_STOPPING is not None:
+        print(f"Época de parada de cada repetição: {[resultados[i]['epoca_parada'] for i in range(N_REPLICACOES)]}")
     print("\n" + "-"*50)
     print(f"F1-SCORE MÉDIO (BINÁRIO, CLASSE 1): {f1_medio:.4f}")
     print(f"Desvio Padrão dos F1-Scores: {f1_std:.4f}")
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Modo rápido do experimento com BERT: encoder congelado + classificador leve.
+
+O BERT pré-treinado (sem ajuste fino) é aplicado uma única vez às mensagens
+únicas da amostra rotulada, e os embeddings ([CLS] ou média dos tokens) ficam
+em cache em disco. Cada repetição de Bootstrap treina apenas uma regressão
+logística ou uma MLP pequena sobre esses vetores, então milhares de repetições
+rodam em minutos na CPU.
+
+O protocolo de cada repetição é o mesmo do `4-bert_rodar_experimento.py`
+(amostra com `resample(..., random_state=i)` e divisão treino/validação com
+RANDOM_STATE e TEST_SIZE), permitindo comparar com o ajuste fino completo.
+"""
+# --------------------------------------------------------------------------
+# 1. IMPORTAÇÃO DAS BIBLIOTECAS
+# --------------------------------------------------------------------------
+import sys
+import time
+import datetime
+import pandas as pd
+import torch
+import numpy as np
+import re
+import os
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.utils import resample
+from threadpoolctl import threadpool_limits
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.canonicalizacao import deduplicar
+from utilitarios_bert import calcular_embeddings_com_cache
+
+# --------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES GLOBAIS DO EXPERIMENTO
+# --------------------------------------------------------------------------
+
+# !! INTERRUPTOR PRINCIPAL !! Altere entre 'bruto' e 'padrao' para cada execução.
+TIPO_PREPROCESSAMENTO = 'padrao'
+POOLING = 'cls' # 'cls' (vetor do token [CLS]) ou 'media' (média dos tokens)
+CLASSIFICADOR = 'logistica' # 'logistica' ou 'mlp'
+CANONIZAR_MENSAGENS = False # Reduz risadas, emojis repetidos e espaços antes do encoder (altera o experimento)
+
+# --- Definição dinâmica dos caminhos dos arquivos ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+NOME_ARQUIVO_DADOS = os.path.join(script_dir, 'amostra_rotulada.csv')
+ARQUIVO_DE_LOG = os.path.join(script_dir, f'log_embeddings_{TIPO_PREPROCESSAMENTO}_{POOLING}_{CLASSIFICADOR}_{timestamp}.txt')
+ARQUIVO_F1S = os.path.join(script_dir, f'f1s_embeddings_{TIPO_PREPROCESSAMENTO}_{POOLING}_{CLASSIFICADOR}_{timestamp}.csv')
+DIR_CACHE_TOKENS = os.path.join(script_dir, '.cache_tokens')
+
+# Parâmetros do modelo
+NOME_COLUNA_TEXTO = 'mensagem'
+NOME_COLUNA_ROTULO = 'classificacao_binaria'
+NOME_MODELO_BERT = 'neuralmind/bert-base-portuguese-cased'
+
+# Parâmetros do experimento
+MAX_LENGTH = 128
+BATCH_SIZE_EMBEDDINGS = 64
+TEST_SIZE = 0.15
+RANDOM_STATE = 42
+N_REPLICACOES = 1000
+N_PROCESSOS = None # Processos para as repetições. None = todos os núcleos da CPU
+
+# Parâmetros dos classificadores
+C_LOGISTICA = 1.0
+TAMANHO_CAMADA_MLP = 128
+MAX_ITER_MLP = 200
+
+# --------------------------------------------------------------------------
+# 3. CLASSES E FUNÇÕES AUXILIARES
+# --------------------------------------------------------------------------
+class Logger(object):
+    """Classe para redirecionar a saída (print) para o terminal e um arquivo de log."""
+    def __init__(self, filename="log.txt"):
+        self.terminal = sys.stdout
+        self.log = open(filename, "w", encoding='utf-8')
+    def write(self, message):
+        self.terminal.write(message); self.log.write(message)
+    def flush(self):
+        self.terminal.flush(); self.log.flush()
+
+def preprocessamento_padrao(texto: str) -> str:
+    """Aplica uma limpeza básica no texto: minúsculas e remoção de quebras de linha."""
+    if not isinstance(texto, str): return ""
+    texto = texto.lower()
+    texto = re.sub(r'[\n\r]+', ' ', texto)
+    return texto.strip()
+
+def criar_classificador(semente: int):
+    """Cria o classificador leve configurado em CLASSIFICADOR (com padronização dos embeddings)."""
+    if CLASSIFICADOR == 'logistica':
+        modelo = LogisticRegression(C=C_LOGISTICA, max_iter=1000)
+    elif CLASSIFICADOR == 'mlp':
+        modelo = MLPClassifier(hidden_layer_sizes=(TAMANHO_CAMADA_MLP,), max_iter=MAX_ITER_MLP, random_state=semente)
+    else:
+        raise ValueError(f"Classificador inválido: '{CLASSIFICADOR}'. Use 'logistica' ou 'mlp'.")
+    return make_pipeline(StandardScaler(), modelo)
+
+# --------------------------------------------------------------------------
+# 4. REPETIÇÕES DE BOOTSTRAP
+# --------------------------------------------------------------------------
+# Embeddings e rótulos de cada linha da amostra (preenchido por `inicializar_processo`)
+_ESTADO_PROCESSO = {}
+
+def inicializar_processo(X: np.ndarray, y: np.ndarray):
+    """Guarda os dados no processo e usa uma thread de BLAS, já que o paralelismo é entre processos."""
+    threadpool_limits(limits=1)
+    _ESTADO_PROCESSO.update(X=X, y=y)
+
+def rodar_replica(i: int) -> float:
+    """Sorteia a amostra de bootstrap da repetição `i`, treina o classificador e retorna o F1 de validação."""
+    X, y = _ESTADO_PROCESSO['X'], _ESTADO_PROCESSO['y']
+    indices = resample(np.arange(len(y)), replace=True, n_samples=len(y), random_state=i)
+    idx_treino, idx_val = train_test_split(
+        indices, random_state=RANDOM_STATE, test_size=TEST_SIZE, stratify=y[indices]
+    )
+    modelo = criar_classificador(semente=i)
+    modelo.fit(X[idx_treino], y[idx_treino])
+    preds = modelo.predict(X[idx_val])
+    return float(f1_score(y[idx_val], preds, pos_label=1, average='binary', zero_division=0))
+
+# --------------------------------------------------------------------------
+# 5. ORQUESTRADOR DO EXPERIMENTO
+# --------------------------------------------------------------------------
+def main():
+    """Calcula (ou carrega) os embeddings e executa as repetições de Bootstrap."""
+    try:
+        df_original = pd.read_csv(NOME_ARQUIVO_DADOS)
+    except FileNotFoundError:
+        print(f"ERRO: O arquivo de dados '{os.path.basename(NOME_ARQUIVO_DADOS)}' não foi encontrado.")
+        print(f"Por favor, certifique-se de que ele está na mesma pasta que o script.")
+        return
+    if len(df_original) == 0:
+        print(f"ERRO: O arquivo de dados '{os.path.basename(NOME_ARQUIVO_DADOS)}' não tem mensagens.")
+        return
+
+    print(f"Modo de pré-processamento selecionado: '{TIPO_PREPROCESSAMENTO}'")
+    if TIPO_PREPROCESSAMENTO == 'padrao':
+        df_original[NOME_COLUNA_TEXTO] = df_original[NOME_COLUNA_TEXTO].apply(preprocessamento_padrao)
+
+    # O encoder é aplicado apenas uma vez a cada mensagem distinta
+    textos_unicos, codigos, _ = deduplicar(df_original[NOME_COLUNA_TEXTO].astype(str), canonizar_textos=CANONIZAR_MENSAGENS)
+    print(f"{len(df_original)} mensagens, {len(textos_unicos)} distintas"
+          f"{' após a forma canônica' if CANONIZAR_MENSAGENS else ''}.")
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    t0 = time.time()
+    cls, media = calcular_embeddings_com_cache(
+        textos_unicos, NOME_MODELO_BERT, MAX_LENGTH, TIPO_PREPROCESSAMENTO, DIR_CACHE_TOKENS,
+        batch_size=BATCH_SIZE_EMBEDDINGS, device=device,
+    )
+    print(f"Embeddings prontos em {time.time() - t0:.1f}s.\n")
+
+    X = np.ascontiguousarray((cls if POOLING == 'cls' else media)[codigos])
+    y = df_original[NOME_COLUNA_ROTULO].to_numpy()
+
+    print(f"--- Iniciando {N_REPLICACOES} repetições de Bootstrap ({CLASSIFICADOR}, pooling '{POOLING}') ---")
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=N_PROCESSOS, initializer=inicializar_processo, initargs=(X, y)) as executor:
+        lista_de_f1_scores = list(executor.map(rodar_replica, range(N_REPLICACOES), chunksize=10))
+    tempo_total = time.strftime("%H:%M:%S", time.gmtime(time.time() - t0))
+
+    pd.DataFrame({'replica': range(N_REPLICACOES), 'f1': lista_de_f1_scores}).to_csv(ARQUIVO_F1S, index=False)
+
+    f1_medio = np.mean(lista_de_f1_scores)
+    f1_std = np.std(lista_de_f1_scores)
+    ic_inferior, ic_superior = np.quantile(lista_de_f1_scores, [0.025, 0.975])
+
+    print("\n" + "="*50)
+    print("---     RESULTADO FINAL (ENCODER CONGELADO)     ---")
+    print("="*50)
+    print(f"Modelo: {NOME_MODELO_BERT} (congelado) + {CLASSIFICADOR}")
+    print(f"Pooling: {POOLING}")
+    print(f"Pré-processamento: {TIPO_PREPROCESSAMENTO}")
+    print(f"Número de Replicações: {N_REPLICACOES}")
+    print(f"Tempo das repetições: {tempo_total}")
+    print("\n" + "-"*50)
+    print(f"F1-SCORE MÉDIO (BINÁRIO, CLASSE 1): {f1_medio:.4f}")
+    print(f"Desvio Padrão dos F1-Scores: {f1_std:.4f}")
+    print(f"Intervalo de 95% (percentil): [{ic_inferior:.4f}, {ic_superior:.4f}]")
+    print(f"F1-Scores individuais salvos em: '{os.path.basename(ARQUIVO_F1S)}'")
+    print("="*50)
+
+# --------------------------------------------------------------------------
+# 6. PONTO DE ENTRADA DO SCRIPT
+# --------------------------------------------------------------------------
+if __name__ == '__main__':
+    sys.stdout = Logger(ARQUIVO_DE_LOG)
+    print(f"Iniciando execução do script: {datetime.datetime.now()}")
+    print("-" * 30)
+    main()
+    print("-" * 30)
+    print(f"Execução finalizada: {datetime.datetime.now()}")
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Aplica o BERT ajustado (salvo por `3-bert_teste_treino_unico.py`) a todas as
+mensagens do `dataset_unificado.csv`, na CPU e com memória limitada.
+
+- O dataset é lido em lotes (`comum.dataset.iterar_lotes`), sem ser carregado inteiro.
+- Cada mensagem distinta é pontuada uma única vez (`comum.canonicalizacao`):
+  por padrão só mensagens idênticas são agrupadas, pois o modelo foi treinado
+  com o texto original; com CANONIZAR_MENSAGENS, mensagens com a mesma forma
+  canônica também são. Os scores das primeiras MAX_SCORES_GUARDADOS mensagens
+  distintas ficam guardados entre os lotes.
+- Em cada lote, as mensagens são tokenizadas sem padding e ordenadas por
+  comprimento; os lotes do modelo recebem padding só até a maior mensagem.
+- A inferência roda em `torch.inference_mode`.
+- Os scores são gravados incrementalmente em um arquivo Parquet, um grupo de
+  linhas por lote lido. O arquivo só recebe o nome final ao término.
+"""
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import torch
+from transformers import BertForSequenceClassification, BertTokenizerFast
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from comum.canonicalizacao import deduplicar, expandir
+from comum.dataset import iterar_lotes
+from utilitarios_bert import pontuar_em_lotes
+
+# --- CONFIGURAÇÕES ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+ARQUIVO_DE_DADOS = "dataset_unificado.csv"
+DIR_MODELO_TREINADO = os.path.join(script_dir, 'modelo_treinado')
+ARQUIVO_SAIDA = os.path.join(script_dir, 'scores_bert_dataset.parquet')
+
+COLUNAS_SAIDA = ['canal', 'id_video', 'autor', 'timestamp'] # Copiadas do dataset para facilitar as análises
+MAX_LENGTH = 128
+BATCH_SIZE_INFERENCIA = 64
+TAMANHO_LOTE_LEITURA = 50_000 # Linhas lidas do dataset por vez
+N_THREADS = None # Threads do PyTorch. None = padrão do PyTorch
+CANONIZAR_MENSAGENS = False # True: agrupa também mensagens com a mesma forma canônica. O modelo foi treinado com o texto original
+MAX_SCORES_GUARDADOS = 500_000 # Scores de mensagens já vistas mantidos entre os lotes
+
+
+def main():
+    if not os.path.isdir(DIR_MODELO_TREINADO):
+        print(f"ERRO: Modelo treinado não encontrado em '{DIR_MODELO_TREINADO}'.")
+        print("Execute antes o script '3-bert_teste_treino_unico.py'.")
+        return
+
+    if N_THREADS:
+        torch.set_num_threads(N_THREADS)
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    print(f"Usando dispositivo: {device} | Threads do PyTorch: {torch.get_num_threads()}")
+
+    tokenizer = BertTokenizerFast.from_pretrained(DIR_MODELO_TREINADO)
+    model = BertForSequenceClassification.from_pretrained(DIR_MODELO_TREINADO).to(device).eval()
+
+    def prever(input_ids, attention_mask):
+        return model(input_ids.to(device), attention_mask=attention_mask.to(device)).logits
+
+    try:
+        lotes = iterar_lotes(ARQUIVO_DE_DADOS, colunas=COLUNAS_SAIDA + ['mensagem'], tamanho_lote=TAMANHO_LOTE_LEITURA)
+        lote = next(lotes, None)
+    except FileNotFoundError:
+        print(f"ERRO: O arquivo '{ARQUIVO_DE_DADOS}' não foi encontrado.")
+        return
+    if lote is None:
+        print(f"ERRO: O arquivo '{ARQUIVO_DE_DADOS}' não tem mensagens para pontuar.")
+        return
+
+    temporario = ARQUIVO_SAIDA + ".tmp"
+    escritor = None
+    linha_inicial = 0
+    pontuadas = 0 # Mensagens que de fato passaram pelo modelo
+    scores_guardados = {}
+    t0 = time.time()
+    try:
+        with torch.inference_mode():
+            while lote is not None:
+                unicos, inverso, _ = deduplicar(lote['mensagem'], canonizar_textos=CANONIZAR_MENSAGENS)
+                novos = [t for t in unicos if t not in scores_guardados]
+                scores_novos = pontuar_em_lotes(novos, tokenizer, prever, MAX_LENGTH, BATCH_SIZE_INFERENCIA)
+                scores_por_texto = dict(zip(novos, scores_novos.tolist()))
+                scores_unicos = np.array([scores_por_texto[t] if t in scores_por_texto else scores_guardados[t]
+                                          for t in unicos], dtype=np.float32)
+                scores = expandir(scores_unicos, inverso)
+                pontuadas += len(novos)
+
+                # Guarda os scores novos até o limite (mensagens frequentes aparecem cedo)
+                for texto, score in scores_por_texto.items():
+                    if len(scores_guardados) >= MAX_SCORES_GUARDADOS:
+                        break
+                    scores_guardados[texto] = score
+
+                # Categorias viram texto: o dicionário de cada lote é diferente, e o esquema
+                # do arquivo precisa ser o mesmo em todos os grupos de linhas
+                saida = lote[COLUNAS_SAIDA].astype({c: object for c in COLUNAS_SAIDA if c != 'timestamp'})
+                saida.insert(0, 'linha', np.arange(linha_inicial, linha_inicial + len(lote), dtype=np.int64))
+                saida['score_bert'] = scores
+                tabela = pa.Table.from_pandas(saida, preserve_index=False)
+                if escritor is None:
+                    # Uma coluna toda vazia no primeiro lote seria inferida como nula
+                    esquema = pa.schema([campo.with_type(pa.string()) if pa.types.is_null(campo.type) else campo
+                                         for campo in tabela.schema])
+                    escritor = pq.ParquetWriter(temporario, esquema)
+                escritor.write_table(tabela.cast(escritor.schema))
+
+                linha_inicial += len(lote)
+                decorrido = time.time() - t0
+                print(f"{linha_inicial} mensagens pontuadas ({pontuadas} passaram pelo modelo) | "
+                      f"{linha_inicial / decorrido:.1f} mensagens/s | tempo: {datetime.timedelta(seconds=int(decorrido))}")
+                lote = next(lotes, None)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+    os.replace(temporario, ARQUIVO_SAIDA)
+    print(f"\nScores salvos em '{os.path.basename(ARQUIVO_SAIDA)}' ({linha_inicial} linhas).")
+
+
+if __name__ == '__main__':
+    main()
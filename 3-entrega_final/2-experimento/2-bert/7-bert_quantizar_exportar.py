@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Exporta o BERT ajustado para inferência rápida na CPU e compara as versões.
+
+A partir do modelo salvo por `3-bert_teste_treino_unico.py`, gera:
+- um modelo PyTorch com quantização dinâmica int8 das camadas lineares;
+- se `onnx` e `onnxruntime` estiverem instalados, um modelo ONNX (fp32) e
+  sua versão quantizada em int8 pelo próprio ONNX Runtime.
+
+Em seguida mede, no conjunto de validação da amostra rotulada (mesma divisão
+dos scripts de treino), a vazão (mensagens/s) e o F1-Score de cada versão em
+relação ao modelo fp32 original.
+"""
+# --------------------------------------------------------------------------
+# 1. IMPORTAÇÃO DAS BIBLIOTECAS
+# --------------------------------------------------------------------------
+import sys
+import time
+import datetime
+import pandas as pd
+import torch
+import numpy as np
+import os
+from transformers import BertForSequenceClassification, BertTokenizerFast
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import f1_score
+from utilitarios_bert import pontuar_em_lotes
+
+# --------------------------------------------------------------------------
+# 2. CONFIGURAÇÕES GLOBAIS
+# --------------------------------------------------------------------------
+script_dir = os.path.dirname(os.path.abspath(__file__))
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+NOME_ARQUIVO_DADOS = os.path.join(script_dir, 'amostra_rotulada.csv')
+DIR_MODELO_TREINADO = os.path.join(script_dir, 'modelo_treinado')
+ARQUIVO_MODELO_INT8 = os.path.join(DIR_MODELO_TREINADO, 'modelo_int8.pt')
+ARQUIVO_ONNX = os.path.join(DIR_MODELO_TREINADO, 'modelo.onnx')
+ARQUIVO_ONNX_INT8 = os.path.join(DIR_MODELO_TREINADO, 'modelo_int8.onnx')
+ARQUIVO_DE_LOG = os.path.join(script_dir, f'log_quantizacao_{timestamp}.txt')
+ARQUIVO_BENCHMARK = os.path.join(script_dir, f'benchmark_quantizacao_{timestamp}.csv')
+
+NOME_COLUNA_TEXTO = 'mensagem'
+NOME_COLUNA_ROTULO = 'classificacao_binaria'
+
+# Mesma divisão de validação dos scripts de treino
+MAX_LENGTH = 128
+TEST_SIZE = 0.15
+RANDOM_STATE = 42
+
+BATCH_SIZE_INFERENCIA = 64
+N_REPETICOES_MEDICAO = 3 # A vazão reportada é a melhor entre as repetições
+N_THREADS = None # Threads usadas por PyTorch e ONNX Runtime. None = padrão de cada biblioteca
+
+# --------------------------------------------------------------------------
+# 3. CLASSES E FUNÇÕES AUXILIARES
+# --------------------------------------------------------------------------
+class Logger(object):
+    """Redireciona a saída (print) para o terminal e um arquivo de log."""
+    def __init__(self, filename="log.txt"):
+        self.terminal = sys.stdout
+        self.log = open(filename, "w", encoding='utf-8')
+    def write(self, message):
+        self.terminal.write(message); self.log.write(message)
+    def flush(self):
+        self.terminal.flush(); self.log.flush()
+
+def tamanho_mb(caminho: str) -> float:
+    """Tamanho em disco de um arquivo ou diretório, em MB."""
+    if os.path.isfile(caminho):
+        return os.path.getsize(caminho) / 1e6
+    return sum(os.path.getsize(os.path.join(raiz, nome))
+               for raiz, _, nomes in os.walk(caminho) for nome in nomes
+               if nome.endswith(('.bin', '.safetensors'))) / 1e6
+
+def exportar_onnx(model: BertForSequenceClassification, tokenizer: BertTokenizerFast):
+    """Exporta o modelo para ONNX com lote e comprimento de sequência variáveis."""
+    exemplo = tokenizer(["exemplo de mensagem"], return_tensors='pt')
+    torch.onnx.export(
+        model, (exemplo['input_ids'], exemplo['attention_mask']), ARQUIVO_ONNX,
+        input_names=['input_ids', 'attention_mask'], output_names=['logits'],
+        dynamic_axes={'input_ids': {0: 'lote', 1: 'sequencia'},
+                      'attention_mask': {0: 'lote', 1: 'sequencia'},
+                      'logits': {0: 'lote'}},
+        opset_version=14,
+    )
+
+def criar_sessao_onnx(caminho: str):
+    """Abre uma sessão do ONNX Runtime na CPU e retorna a função de predição."""
+    import onnxruntime as ort
+
+    opcoes = ort.SessionOptions()
+    if N_THREADS:
+        opcoes.intra_op_num_threads = N_THREADS
+    sessao = ort.InferenceSession(caminho, opcoes, providers=['CPUExecutionProvider'])
+
+    def prever(input_ids, attention_mask):
+        return sessao.run(['logits'], {'input_ids': input_ids.numpy(), 'attention_mask': attention_mask.numpy()})[0]
+    return prever
+
+def medir(nome: str, prever, textos: list, rotulos: np.ndarray, tokenizer, caminho: str) -> tuple:
+    """Pontua o conjunto de validação e retorna (métricas de vazão, F1 e tamanho, predições)."""
+    melhor_tempo = float('inf')
+    with torch.inference_mode():
+        for _ in range(N_REPETICOES_MEDICAO):
+            t0 = time.perf_counter()
+            scores = pontuar_em_lotes(textos, tokenizer, prever, MAX_LENGTH, BATCH_SIZE_INFERENCIA)
+            melhor_tempo = min(melhor_tempo, time.perf_counter() - t0)
+    preds = (scores > 0.5).astype(int)
+    resultado = {
+        'modelo': nome,
+        'mensagens_por_segundo': len(textos) / melhor_tempo,
+        'f1': f1_score(rotulos, preds, pos_label=1, average='binary', zero_division=0),
+        'tamanho_mb': tamanho_mb(caminho),
+    }
+    print(f"{nome:<12} | {resultado['mensagens_por_segundo']:8.1f} mensagens/s | "
+          f"F1: {resultado['f1']:.4f} | {resultado['tamanho_mb']:.0f} MB")
+    return resultado, preds
+
+# --------------------------------------------------------------------------
+# 4. FUNÇÃO PRINCIPAL DO SCRIPT
+# --------------------------------------------------------------------------
+def main():
+    if not os.path.isdir(DIR_MODELO_TREINADO):
+        print(f"ERRO: Modelo treinado não encontrado em '{DIR_MODELO_TREINADO}'.")
+        print("Execute antes o script '3-bert_teste_treino_unico.py'.")
+        return
+    try:
+        df = pd.read_csv(NOME_ARQUIVO_DADOS)
+    except FileNotFoundError:
+        print(f"ERRO: Arquivo '{os.path.basename(NOME_ARQUIVO_DADOS)}' não encontrado.")
+        return
+
+    _, val_textos, _, val_rotulos = train_test_split(
+        df[NOME_COLUNA_TEXTO].astype(str).tolist(), df[NOME_COLUNA_ROTULO].to_numpy(),
+        random_state=RANDOM_STATE, test_size=TEST_SIZE, stratify=df[NOME_COLUNA_ROTULO],
+    )
+    print(f"Conjunto de validação: {len(val_textos)} mensagens\n")
+
+    if N_THREADS:
+        torch.set_num_threads(N_THREADS)
+    tokenizer = BertTokenizerFast.from_pretrained(DIR_MODELO_TREINADO)
+    model = BertForSequenceClassification.from_pretrained(DIR_MODELO_TREINADO).eval()
+
+    # --- Exportação ---
+    print("--- Exportando modelos ---")
+    model_int8 = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    torch.save(model_int8, ARQUIVO_MODELO_INT8)
+    print(f"PyTorch int8 salvo em '{os.path.basename(ARQUIVO_MODELO_INT8)}'")
+
+    # A etapa ONNX depende de 'onnx' (e, em versões recentes do PyTorch, 'onnxscript') e de 'onnxruntime'
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        exportar_onnx(model, tokenizer)
+        print(f"ONNX fp32 salvo em '{os.path.basename(ARQUIVO_ONNX)}'")
+        quantize_dynamic(ARQUIVO_ONNX, ARQUIVO_ONNX_INT8, weight_type=QuantType.QInt8)
+        print(f"ONNX int8 salvo em '{os.path.basename(ARQUIVO_ONNX_INT8)}'")
+        tem_onnxruntime = True
+    except ImportError as e:
+        print(f"Aviso: exportação ONNX ignorada ({e}); apenas as versões PyTorch serão avaliadas.")
+        tem_onnxruntime = False
+
+    # --- Benchmark ---
+    print(f"\n--- Benchmark na CPU (melhor de {N_REPETICOES_MEDICAO} execuções) ---")
+    versoes = [
+        ('fp32', lambda ids, mask: model(ids, attention_mask=mask).logits, DIR_MODELO_TREINADO),
+        ('torch_int8', lambda ids, mask: model_int8(ids, attention_mask=mask).logits, ARQUIVO_MODELO_INT8),
+    ]
+    if tem_onnxruntime:
+        versoes += [
+            ('onnx_fp32', criar_sessao_onnx(ARQUIVO_ONNX), ARQUIVO_ONNX),
+            ('onnx_int8', criar_sessao_onnx(ARQUIVO_ONNX_INT8), ARQUIVO_ONNX_INT8),
+        ]
+
+    resultados, preds_fp32 = [], None
+    for nome, prever, caminho in versoes:
+        resultado, preds = medir(nome, prever, val_textos, val_rotulos, tokenizer, caminho)
+        if preds_fp32 is None:
+            preds_fp32 = preds
+        # Fração das mensagens em que a versão decide igual ao modelo fp32
+        resultado['concordancia_fp32'] = float((preds == preds_fp32).mean())
+        resultados.append(resultado)
+
+    tabela = pd.DataFrame(resultados)
+    tabela['aceleracao'] = tabela['mensagens_por_segundo'] / tabela.loc[0, 'mensagens_por_segundo']
+    tabela.to_csv(ARQUIVO_BENCHMARK, index=False)
+
+    print("\n" + "="*50)
+    print(tabela.to_string(index=False, float_format=lambda x: f"{x:.4f}"))
+    print("="*50)
+    print(f"Resultados salvos em '{os.path.basename(ARQUIVO_BENCHMARK)}'")
+
+# --------------------------------------------------------------------------
+# 5. PONTO DE ENTRADA DO SCRIPT
+# --------------------------------------------------------------------------
+if __name__ == '__main__':
+    sys.stdout = Logger(ARQUIVO_DE_LOG)
+    print(f"Iniciando execução do script de quantização: {datetime.datetime.now()}")
+    print("-" * 30)
+    main()
+    print("-" * 30)
+    print(f"Execução finalizada: {datetime.datetime.now()}")
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Funções compartilhadas pelos scripts do experimento com BERT.
+
+Tokenização com cache: o dataset rotulado é tokenizado uma única vez por
+combinação de modelo, MAX_LENGTH e tipo de pré-processamento, e os tensores
+são salvos em `.cache_tokens/`. As réplicas de bootstrap apenas indexam esses
+tensores com as linhas sorteadas, sem recarregar o tokenizador.
+
+Padding dinâmico: os tensores ficam salvos com padding até MAX_LENGTH, mas
+cada lote é cortado no comprimento da maior sequência do próprio lote. Como
+o padding fica à direita e é mascarado pela attention mask, o resultado do
+modelo é o mesmo; só deixa de ser gasto processamento com tokens de padding.
+Opcionalmente, os lotes de treino agrupam mensagens de comprimento parecido.
+
+Modelo base em memória: os pesos pré-treinados são lidos do disco uma única
+vez por processo; cada réplica parte de uma cópia desse modelo, com a camada
+de classificação reinicializada a partir de uma semente conhecida.
+
+Embeddings congelados: para experimentos rápidos, o encoder pré-treinado é
+aplicado uma única vez às mensagens e os vetores ([CLS] e média dos tokens)
+ficam salvos em um `.npy` lido por memory-map, sobre o qual são treinados
+classificadores leves.
+
+Resultados retomáveis: cada réplica concluída é anexada a um arquivo JSONL,
+junto com o hash da configuração do experimento. Ao reiniciar, as réplicas
+já registradas com o mesmo hash são puladas.
+"""
+import copy
+import hashlib
+import json
+import os
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, RandomSampler, Sampler, SequentialSampler, TensorDataset
+
+# Versão do formato do cache. Incrementar ao mudar a tokenização.
+VERSAO_CACHE_TOKENS = 1
+
+
+def _chave_cache(textos, nome_modelo, max_length, tipo_preprocessamento):
+    h = hashlib.sha256()
+    h.update(json.dumps({
+        'versao': VERSAO_CACHE_TOKENS,
+        'modelo': nome_modelo,
+        'max_length': max_length,
+        'preprocessamento': tipo_preprocessamento,
+    }, sort_keys=True).encode('utf-8'))
+    for texto in textos:
+        h.update(texto.encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()[:16]
+
+
+def tokenizar_com_cache(textos, nome_modelo, max_length, tipo_preprocessamento, dir_cache):
+    """
+    Tokeniza `textos` uma única vez e reaproveita o resultado nas execuções seguintes.
+
+    Args:
+        textos: lista de mensagens (já pré-processadas).
+        nome_modelo: nome do modelo no Hugging Face (define o tokenizador).
+        max_length: comprimento máximo das sequências.
+        tipo_preprocessamento: 'bruto' ou 'padrao' (faz parte da chave do cache).
+        dir_cache: diretório onde os tensores são salvos.
+
+    Returns:
+        Dicionário com os tensores `input_ids` e `attention_mask`, uma linha por texto.
+    """
+    chave = _chave_cache(textos, nome_modelo, max_length, tipo_preprocessamento)
+    nome_seguro = nome_modelo.replace('/', '_')
+    caminho = os.path.join(dir_cache, f"tokens_{nome_seguro}_{max_length}_{tipo_preprocessamento}_{chave}.pt")
+
+    if os.path.exists(caminho):
+        print(f"Tokens carregados do cache: '{os.path.basename(caminho)}'")
+        return torch.load(caminho)
+
+    from transformers import BertTokenizer
+
+    print(f"Tokenizando {len(textos)} textos (resultado será salvo em cache)...")
+    tokenizer = BertTokenizer.from_pretrained(nome_modelo, do_lower_case=False)
+    encoded_data = tokenizer.batch_encode_plus(
+        textos, add_special_tokens=True, return_attention_mask=True,
+        padding='max_length', max_length=max_length, truncation=True, return_tensors='pt'
+    )
+    tensores = {
+        'input_ids': encoded_data['input_ids'],
+        'attention_mask': encoded_data['attention_mask'],
+    }
+
+    os.makedirs(dir_cache, exist_ok=True)
+    temporario = caminho + ".tmp"
+    torch.save(tensores, temporario)
+    os.replace(temporario, caminho)
+    return tensores
+
+
+def calcular_embeddings_com_cache(textos, nome_modelo, max_length, tipo_preprocessamento, dir_cache,
+                                  batch_size=64, device=None):
+    """
+    Aplica o encoder pré-treinado (sem ajuste fino) a `textos` e salva os embeddings em cache.
+
+    Os textos são processados em lotes ordenados por comprimento, com padding
+    cortado no maior texto do lote, e os vetores são escritos direto no arquivo.
+
+    Returns:
+        (cls, media): arrays float32 (len(textos) x dimensão) abertos por memory-map,
+        com o vetor do token [CLS] e a média dos tokens (ignorando o padding).
+    """
+    chave = _chave_cache(textos, nome_modelo, max_length, tipo_preprocessamento)
+    nome_seguro = nome_modelo.replace('/', '_')
+    caminho = os.path.join(dir_cache, f"embeddings_{nome_seguro}_{max_length}_{tipo_preprocessamento}_{chave}.npy")
+
+    if not os.path.exists(caminho):
+        from numpy.lib.format import open_memmap
+        from tqdm import tqdm
+        from transformers import BertModel
+
+        tensores = tokenizar_com_cache(textos, nome_modelo, max_length, tipo_preprocessamento, dir_cache)
+        input_ids, attention_masks = tensores['input_ids'], tensores['attention_mask']
+        device = device or torch.device('cpu')
+        modelo = BertModel.from_pretrained(nome_modelo, add_pooling_layer=False).to(device).eval()
+
+        comprimentos = attention_masks.sum(dim=1)
+        ordem = torch.argsort(comprimentos, stable=True)
+        temporario = caminho + ".tmp"
+        saida = open_memmap(temporario, mode='w+', dtype=np.float32,
+                            shape=(len(textos), 2, modelo.config.hidden_size))
+        with torch.inference_mode():
+            for inicio in tqdm(range(0, len(textos), batch_size), desc="Calculando embeddings"):
+                indices = ordem[inicio:inicio + batch_size]
+                comprimento = int(comprimentos[indices].max())
+                mascara = attention_masks[indices, :comprimento].to(device)
+                estados = modelo(input_ids[indices, :comprimento].to(device), attention_mask=mascara).last_hidden_state
+                peso = mascara.unsqueeze(-1).to(estados.dtype)
+                media = (estados * peso).sum(dim=1) / peso.sum(dim=1)
+                linhas = indices.numpy()
+                saida[linhas, 0] = estados[:, 0].float().cpu().numpy()
+                saida[linhas, 1] = media.float().cpu().numpy()
+        saida.flush()
+        del saida
+        os.replace(temporario, caminho)
+    else:
+        print(f"Embeddings carregados do cache: '{os.path.basename(caminho)}'")
+
+    embeddings = np.load(caminho, mmap_mode='r')
+    return embeddings[:, 0], embeddings[:, 1]
+
+
+def colar_com_padding_dinamico(lote):
+    """`collate_fn` que corta o padding do lote no comprimento da maior sequência."""
+    input_ids, attention_masks, labels = (torch.stack(t) for t in zip(*lote))
+    comprimento = int(attention_masks.sum(dim=1).max())
+    return input_ids[:, :comprimento], attention_masks[:, :comprimento], labels
+
+
+def pontuar_em_lotes(textos, tokenizer, prever, max_length, batch_size=64):
+    """
+    Retorna a probabilidade da classe 1 para cada texto, na ordem recebida.
+
+    Os textos são tokenizados sem padding e ordenados por comprimento; cada lote
+    recebe padding só até a sua maior sequência. `prever(input_ids, attention_mask)`
+    recebe tensores int64 e retorna os logits (tensor ou array), o que permite
+    usar o mesmo laço com o modelo PyTorch, quantizado ou ONNX.
+    """
+    if not textos:
+        return np.empty(0, dtype=np.float32)
+    tokens = tokenizer(textos, truncation=True, max_length=max_length)
+    comprimentos = np.fromiter((len(ids) for ids in tokens['input_ids']), dtype=np.int64, count=len(textos))
+    ordem = np.argsort(comprimentos, kind='stable')
+
+    scores = np.empty(len(textos), dtype=np.float32)
+    for inicio in range(0, len(textos), batch_size):
+        indices = ordem[inicio:inicio + batch_size]
+        lote = tokenizer.pad(
+            {'input_ids': [tokens['input_ids'][i] for i in indices],
+             'attention_mask': [tokens['attention_mask'][i] for i in indices]},
+            return_tensors='pt',
+        )
+        logits = torch.as_tensor(prever(lote['input_ids'], lote['attention_mask']))
+        scores[indices] = torch.softmax(logits.float(), dim=1)[:, 1].cpu().numpy()
+    return scores
+
+
+class AmostradorPorComprimento(Sampler):
+    """
+    Gera lotes de índices com sequências de comprimento parecido.
+
+    Os índices são embaralhados e divididos em grupos de `batch_size * tamanho_grupo`;
+    cada grupo é ordenado por comprimento e cortado em lotes, e a ordem dos lotes
+    é embaralhada. Assim os lotes continuam aleatórios, mas com pouco padding.
+    Com `embaralhar=False`, os lotes seguem a ordem crescente de comprimento.
+    """
+    def __init__(self, comprimentos, batch_size, tamanho_grupo=50, embaralhar=True):
+        self.comprimentos = torch.as_tensor(comprimentos)
+        self.batch_size = batch_size
+        self.tamanho_grupo = tamanho_grupo
+        self.embaralhar = embaralhar
+
+    def __iter__(self):
+        n = len(self.comprimentos)
+        if not self.embaralhar:
+            ordem = torch.argsort(self.comprimentos, stable=True)
+            return iter([ordem[i:i + self.batch_size].tolist() for i in range(0, n, self.batch_size)])
+
+        ordem = torch.randperm(n)
+        tamanho = self.batch_size * self.tamanho_grupo
+        lotes = []
+        for inicio in range(0, n, tamanho):
+            grupo = ordem[inicio:inicio + tamanho]
+            grupo = grupo[torch.argsort(self.comprimentos[grupo], stable=True)]
+            lotes.extend(grupo[i:i + self.batch_size].tolist() for i in range(0, len(grupo), self.batch_size))
+        return iter([lotes[i] for i in torch.randperm(len(lotes)).tolist()])
+
+    def __len__(self):
+        return (len(self.comprimentos) + self.batch_size - 1) // self.batch_size
+
+
+def criar_dataloader(input_ids, attention_masks, labels, batch_size, treino, agrupar_por_comprimento=False):
+    """
+    Monta o DataLoader de treino (ordem aleatória) ou de validação (ordem fixa) com padding dinâmico.
+
+    Com `agrupar_por_comprimento=True`, os lotes reúnem sequências de comprimento parecido.
+    """
+    dados = TensorDataset(input_ids, attention_masks, labels)
+    if agrupar_por_comprimento:
+        amostrador = AmostradorPorComprimento(attention_masks.sum(dim=1), batch_size, embaralhar=treino)
+        return DataLoader(dados, batch_sampler=amostrador, collate_fn=colar_com_padding_dinamico)
+    sampler = RandomSampler(dados) if treino else SequentialSampler(dados)
+    return DataLoader(dados, sampler=sampler, batch_size=batch_size, collate_fn=colar_com_padding_dinamico)
+
+
+def carregar_modelo_base(nome_modelo, num_labels=2):
+    """Lê os pesos pré-treinados uma única vez. O modelo base fica na CPU e nunca é treinado."""
+    from transformers import BertForSequenceClassification
+
+    print(f"Carregando pesos pré-treinados de '{nome_modelo}' (uma única vez)...")
+    return BertForSequenceClassification.from_pretrained(
+        nome_modelo, num_labels=num_labels, output_attentions=False, output_hidden_states=False,
+    )
+
+
+def criar_modelo_da_base(modelo_base, semente):
+    """
+    Cria uma cópia independente do modelo base para uma réplica.
+
+    O encoder mantém os pesos pré-treinados e a camada de classificação é
+    reinicializada como no `from_pretrained` (normal com desvio
+    `initializer_range` e bias zero), usando `semente` para ser reprodutível.
+    """
+    modelo = copy.deepcopy(modelo_base)
+    gerador = torch.Generator().manual_seed(semente)
+    with torch.no_grad():
+        modelo.classifier.weight.normal_(mean=0.0, std=modelo.config.initializer_range, generator=gerador)
+        modelo.classifier.bias.zero_()
+    return modelo
+
+
+def hash_configuracao(configuracao, caminho_dados):
+    """Hash curto que identifica o experimento: parâmetros de `configuracao` e conteúdo do arquivo de dados."""
+    h = hashlib.sha256()
+    h.update(json.dumps(configuracao, sort_keys=True).encode('utf-8'))
+    with open(caminho_dados, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()[:16]
+
+
+def carregar_replicas_concluidas(caminho, hash_config):
+    """
+    Lê o arquivo de resultados e retorna {réplica: registro} das réplicas com o hash informado.
+
+    Linhas incompletas (por exemplo, se o processo foi interrompido no meio da
+    escrita) são ignoradas; a réplica correspondente é executada novamente.
+    """
+    concluidas = {}
+    if not os.path.exists(caminho):
+        return concluidas
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+            if registro.get('hash_config') == hash_config:
+                concluidas[registro['replica']] = registro
+    return concluidas
+
+
+def registrar_replica(caminho, registro):
+    """Anexa o resultado de uma réplica ao arquivo JSONL e força a gravação em disco."""
+    linha = json.dumps(registro, ensure_ascii=False) + "\n"
+    if os.path.exists(caminho) and os.path.getsize(caminho) > 0:
+        # Não emenda no final de uma linha incompleta deixada por uma interrupção
+        with open(caminho, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                linha = "\n" + linha
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write(linha)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def anexar_metricas(caminho, registro):
+    """
+    Anexa um registro de métricas (uma linha JSON) ao arquivo.
+
+    A linha é escrita em uma única chamada em modo append, então processos
+    paralelos podem registrar no mesmo arquivo sem misturar as linhas.
+    """
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+def sincronizar(device):
+    """Espera as operações pendentes na GPU terminarem, para que os tempos medidos sejam reais."""
+    if device.type == 'cuda':
+        torch.cuda.synchronize(device)
+
+
+def pico_memoria_mb(device):
+    """Retorna (pico de RSS do processo, pico de memória alocada na GPU ou None), em MB."""
+    import resource
+    import sys
+
+    pico_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if sys.platform == 'darwin':
+        pico_rss /= 1024  # No macOS o valor vem em bytes
+    pico_gpu = torch.cuda.max_memory_allocated(device) / 2**20 if device.type == 'cuda' else None
+    return pico_rss, pico_gpu
@@ -0,0 +1,128 @@
+"""
+Gerador de chats sintéticos com o mesmo formato do `dataset_unificado.csv`.
+
+O volume de cada live segue uma distribuição log-normal (poucas lives muito
+grandes, muitas pequenas). Dentro de cada live, parte das mensagens chega em
+ritmo constante e parte em rajadas curtas ao redor de momentos de pico, como
+acontece nos hotspots reais. Os textos são sorteados de um conjunto de
+mensagens com frequência do tipo Zipf (muitas repetições de "k", "kkkk",
+emojis e frases curtas), e uma fração contém termos do dicionário.
+
+Tudo é gerado com NumPy a partir de uma semente, então o mesmo tamanho e a
+mesma semente sempre produzem o mesmo arquivo.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+PALAVRAS = (
+    "mano vc q pra ta tá não sim que isso ai aí cara muito bom ruim jogo live chat "
+    "boa noite salve fala tmj top demais nada nunca sempre agora hoje mais menos "
+    "olha vai foi viu quem onde como porque então tipo slk pqp oxi eita nossa"
+).split()
+RISADAS = ["k", "kk", "kkk", "kkkk", "kkkkkkkk", "kkkkkkkkkkkkkkkk", "KKKKKKK", "hahaha", "rsrs"]
+EMOJIS = ["😂", "🤣", "❤️", "🔥", "👍", "😭", "💀", "😡"]
+TERMOS_PADRAO = ["burro", "merda", "macaco", "doente", "maldade"]
+
+
+def _gerar_conjunto_mensagens(rng, n_distintas, termos, fracao_termos):
+    """Cria `n_distintas` mensagens sintéticas; as primeiras (mais frequentes) são curtas."""
+    mensagens = []
+    for i in range(n_distintas):
+        tipo = rng.random()
+        if i < 20 or tipo < 0.15:
+            mensagens.append(RISADAS[rng.integers(len(RISADAS))])
+        elif tipo < 0.25:
+            mensagens.append(EMOJIS[rng.integers(len(EMOJIS))] * int(rng.integers(1, 8)))
+        else:
+            n_palavras = int(rng.integers(1, 12))
+            palavras = [PALAVRAS[j] for j in rng.integers(len(PALAVRAS), size=n_palavras)]
+            if rng.random() < fracao_termos:
+                palavras.insert(int(rng.integers(n_palavras + 1)), termos[rng.integers(len(termos))])
+            if rng.random() < 0.3:
+                palavras.append(RISADAS[rng.integers(len(RISADAS))])
+            mensagens.append(" ".join(palavras))
+    return np.array(mensagens, dtype=object)
+
+
+def _indices_zipf(rng, n, tamanho, expoente=1.1):
+    """Sorteia `tamanho` índices em [0, n) com probabilidade proporcional a 1 / (posição + 1) ** expoente."""
+    pesos = 1.0 / np.arange(1, n + 1) ** expoente
+    return rng.choice(n, size=tamanho, p=pesos / pesos.sum())
+
+
+def gerar_chat(n_mensagens, n_canais=8, mensagens_por_live=5_000, fracao_rajada=0.3,
+               termos=None, fracao_termos=0.05, semente=0):
+    """
+    Gera um DataFrame de chat sintético.
+
+    Args:
+        n_mensagens: número total de mensagens.
+        n_canais: número de canais.
+        mensagens_por_live: volume médio de uma live (a distribuição é log-normal).
+        fracao_rajada: fração das mensagens que chega em rajadas (hotspots).
+        termos: termos do dicionário a inserir em algumas mensagens.
+        fracao_termos: fração das frases que recebe um termo do dicionário.
+        semente: semente do gerador.
+
+    Returns:
+        DataFrame com `id_video`, `titulo`, `canal`, `autor`, `timestamp` e `mensagem`,
+        ordenado por live e horário.
+    """
+    rng = np.random.default_rng(semente)
+    termos = list(termos) if termos else TERMOS_PADRAO
+
+    # Volume de cada live (log-normal), ajustado para somar exatamente n_mensagens
+    n_lives = max(1, int(round(n_mensagens / mensagens_por_live)))
+    volumes = rng.lognormal(mean=0.0, sigma=1.0, size=n_lives)
+    volumes = np.maximum(1, np.floor(volumes / volumes.sum() * n_mensagens)).astype(np.int64)
+    volumes[np.argmax(volumes)] += n_mensagens - volumes.sum()
+    live_da_mensagem = np.repeat(np.arange(n_lives), volumes)
+
+    # Cada live começa em um dia diferente e dura entre 1 e 6 horas
+    inicio_live = (pd.Timestamp("2025-01-01", tz="UTC").value
+                   + rng.integers(0, 180, size=n_lives) * 86_400 * 10**9
+                   + rng.integers(0, 86_400, size=n_lives) * 10**9)
+    duracao_live = rng.uniform(3_600, 6 * 3_600, size=n_lives)
+
+    # Ritmo constante: instante uniforme na live. Rajada: normal (desvio de 3 a 20 s) ao redor de um pico
+    offsets = rng.random(n_mensagens) * duracao_live[live_da_mensagem]
+    em_rajada = rng.random(n_mensagens) < fracao_rajada
+    n_picos = np.maximum(1, (duracao_live / 600).astype(np.int64))  # cerca de um pico a cada 10 minutos
+    pico = (rng.random(n_mensagens) * n_picos[live_da_mensagem]).astype(np.int64)
+    centro_pico = (pico + 0.5) / n_picos[live_da_mensagem] * duracao_live[live_da_mensagem]
+    desvio_pico = rng.uniform(3, 20, size=n_mensagens)
+    offsets[em_rajada] = np.clip(centro_pico[em_rajada] + rng.normal(0, 1, em_rajada.sum()) * desvio_pico[em_rajada],
+                                 0, duracao_live[live_da_mensagem][em_rajada])
+    timestamps = inicio_live[live_da_mensagem] + (offsets * 10**9).astype(np.int64)
+
+    canal_da_live = rng.integers(0, n_canais, size=n_lives)
+    ids_video = np.array([f"vid{i:08d}" for i in range(n_lives)], dtype=object)
+    canais = np.array([f"CANAL{c:02d}" for c in range(n_canais)], dtype=object)
+
+    n_distintas = int(min(200_000, max(1_000, n_mensagens // 20)))
+    conjunto = _gerar_conjunto_mensagens(rng, n_distintas, termos, fracao_termos)
+    n_autores = int(max(100, n_mensagens // 50))
+
+    df = pd.DataFrame({
+        'id_video': ids_video[live_da_mensagem],
+        'titulo': np.char.add("LIVE ", ids_video.astype(str))[live_da_mensagem],
+        'canal': canais[canal_da_live][live_da_mensagem],
+        'autor': np.char.add("@usuario", _indices_zipf(rng, n_autores, n_mensagens).astype(str)),
+        'timestamp': pd.to_datetime(timestamps, utc=True),
+        'mensagem': conjunto[_indices_zipf(rng, n_distintas, n_mensagens)],
+    })
+    return df.sort_values(['id_video', 'timestamp'], kind='mergesort', ignore_index=True)
+
+
+def obter_csv_sintetico(n_mensagens, dir_dados, semente=0, **kwargs):
+    """Retorna o caminho do CSV sintético de `n_mensagens`, gerando-o apenas se ainda não existir."""
+    caminho = os.path.join(dir_dados, f"chat_sintetico_{n_mensagens}_s{semente}.csv")
+    if not os.path.exists(caminho):
+        os.makedirs(dir_dados, exist_ok=True)
+        print(f"Gerando chat sintético com {n_mensagens} mensagens...")
+        temporario = caminho + ".tmp"
+        gerar_chat(n_mensagens, semente=semente, **kwargs).to_csv(temporario, index=False)
+        os.replace(temporario, caminho)
+    return caminho
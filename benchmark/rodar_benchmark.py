@@ -0,0 +1,211 @@
+"""
+Benchmark das etapas do pipeline sobre chats sintéticos de vários tamanhos.
+
+Para cada tamanho em TAMANHOS, um CSV sintético é gerado (uma única vez, em
+DIR_DADOS) e cada etapa de ETAPAS roda em um processo novo. Assim, o pico de
+memória (RSS máximo, via `resource.getrusage`) de uma etapa não é afetado
+pelas anteriores. Os tempos, a vazão (mensagens/s) e o pico de memória de
+cada etapa são salvos em JSON, para comparar execuções ao longo do tempo.
+
+Etapas que dependem de bibliotecas ou recursos ausentes (NLTK punkt, torch,
+transformers) são registradas com o erro, sem interromper as demais.
+"""
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(RAIZ)
+from gerador_chat import obter_csv_sintetico
+
+# --- CONFIGURAÇÕES ---
+script_dir = os.path.dirname(os.path.abspath(__file__))
+timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+TAMANHOS = [10_000, 100_000, 1_000_000] # Acrescente 10_000_000 para o teste completo (~1 GB de CSV)
+ETAPAS = ['carregar_csv', 'carregar_cache', 'hotspots', 'coletar_janelas', 'dicionario', 'frequencia',
+          'bert_tokenizacao', 'bert_passo_treino']
+SEMENTE = 0
+DIR_DADOS = os.path.join(script_dir, '.dados_benchmark')
+ARQUIVO_RESULTADOS = os.path.join(script_dir, f'resultados_benchmark_{timestamp}.json')
+ARQUIVO_DICIONARIO = os.path.join(RAIZ, '3-entrega_final', '1-rotulagem', '3-rotulagem_dicionario_termos', 'dicionario.txt')
+SCRIPT_HOTSPOTS = os.path.join(RAIZ, '3-entrega_final', '1-rotulagem', '2-rotulagem_por_hotspots', '1-encontrar_hotspots.py')
+
+# Etapas do BERT usam apenas uma amostra (o custo por mensagem é o que interessa)
+NOME_MODELO_BERT = 'neuralmind/bert-base-portuguese-cased'
+MAX_MENSAGENS_BERT = 10_000
+BATCH_SIZE_BERT = 16
+PASSOS_TREINO_BERT = 5
+
+
+def _importar_script(caminho, nome):
+    """Importa um script do repositório cujo nome não é um identificador Python válido."""
+    especificacao = importlib.util.spec_from_file_location(nome, caminho)
+    modulo = importlib.util.module_from_spec(especificacao)
+    especificacao.loader.exec_module(modulo)
+    return modulo
+
+
+# --- ETAPAS ---
+# Cada etapa recebe o caminho do CSV e retorna o número de mensagens processadas.
+
+def etapa_carregar_csv(caminho):
+    import pandas as pd
+    return len(pd.read_csv(caminho))
+
+
+def etapa_carregar_cache(caminho):
+    from comum.dataset import carregar_dataset, garantir_cache
+    garantir_cache(caminho)  # A conversão para Parquet é feita fora da medição
+    inicio = time.perf_counter()
+    n = len(carregar_dataset(caminho))
+    return n, time.perf_counter() - inicio
+
+
+def etapa_hotspots(caminho):
+    from comum.dataset import carregar_dataset
+    script = _importar_script(SCRIPT_HOTSPOTS, 'encontrar_hotspots')
+    df = carregar_dataset(caminho, colunas=script.COLUNAS_NECESSARIAS)
+    inicio = time.perf_counter()
+    script.encontrar_hotspots(df, canais=None)
+    return len(df), time.perf_counter() - inicio
+
+
+def etapa_coletar_janelas(caminho):
+    import pandas as pd
+    from comum.dataset import carregar_dataset
+    from comum.hotspots import calcular_densidade, coletar_janelas, ordenar_por_live, top_hotspots_por_live
+    df = ordenar_por_live(carregar_dataset(caminho))
+    eventos = top_hotspots_por_live(df[['id_video', 'timestamp']], calcular_densidade(df), 10)
+    eventos = eventos.rename(columns={'timestamp': 'timestamp_hotspot'})
+    inicio = time.perf_counter()
+    coletar_janelas(df, eventos, pd.Timedelta(minutes=1))
+    return len(df), time.perf_counter() - inicio
+
+
+def etapa_dicionario(caminho):
+    from comum.dataset import carregar_dataset
+    from comum.dicionario import CasadorDeTermos, carregar_dicionario
+    df = carregar_dataset(caminho, colunas=['mensagem'])
+    inicio = time.perf_counter()
+    CasadorDeTermos(carregar_dicionario(ARQUIVO_DICIONARIO)).encontrar_em_serie(df['mensagem'])
+    return len(df), time.perf_counter() - inicio
+
+
+def etapa_frequencia(caminho):
+    from comum.dataset import iterar_lotes
+    from comum.frequencia import contar_palavras
+    # Versão serial: o pico de memória medido é o de um único processo
+    n = 0
+    def lotes():
+        nonlocal n
+        for lote in iterar_lotes(caminho, colunas=['mensagem']):
+            n += len(lote)
+            yield lote['mensagem']
+    contar_palavras(lotes(), stop_words={'q', 'pra', 'ta'}, tamanho_minimo=2, ignorar_risadas=True)
+    return n
+
+
+def etapa_bert_tokenizacao(caminho):
+    from comum.dataset import carregar_dataset
+    from transformers import BertTokenizerFast
+    textos = carregar_dataset(caminho, colunas=['mensagem'])['mensagem'].astype(str).head(MAX_MENSAGENS_BERT).tolist()
+    tokenizer = BertTokenizerFast.from_pretrained(NOME_MODELO_BERT)
+    inicio = time.perf_counter()
+    tokenizer(textos, truncation=True, max_length=128)
+    return len(textos), time.perf_counter() - inicio
+
+
+def etapa_bert_passo_treino(caminho):
+    import torch
+    from comum.dataset import carregar_dataset
+    from transformers import BertForSequenceClassification, BertTokenizerFast
+    n = BATCH_SIZE_BERT * PASSOS_TREINO_BERT
+    textos = carregar_dataset(caminho, colunas=['mensagem'])['mensagem'].astype(str).head(n).tolist()
+    tokenizer = BertTokenizerFast.from_pretrained(NOME_MODELO_BERT)
+    model = BertForSequenceClassification.from_pretrained(NOME_MODELO_BERT, num_labels=2)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=2e-5)
+    torch.manual_seed(SEMENTE)
+    model.train()
+    inicio = time.perf_counter()
+    for i in range(0, n, BATCH_SIZE_BERT):
+        lote = tokenizer(textos[i:i + BATCH_SIZE_BERT], truncation=True, max_length=128, padding=True, return_tensors='pt')
+        rotulos = torch.randint(0, 2, (len(lote['input_ids']),))
+        optimizer.zero_grad()
+        model(**lote, labels=rotulos).loss.backward()
+        optimizer.step()
+    return len(textos), time.perf_counter() - inicio
+
+
+def executar_etapa(nome, caminho):
+    """Roda uma etapa no processo atual e retorna tempo, vazão e pico de memória."""
+    inicio = time.perf_counter()
+    try:
+        retorno = globals()[f'etapa_{nome}'](caminho)
+        erro = None
+    except Exception as e:  # A etapa falhou (ex.: dependência ausente); o benchmark continua
+        retorno, erro = 0, f"{type(e).__name__}: {e}"
+    total = time.perf_counter() - inicio
+
+    # Etapas que têm preparação (ex.: carregar os dados) informam o tempo só da parte medida
+    n_mensagens, segundos = retorno if isinstance(retorno, tuple) else (retorno, total)
+    pico_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        pico_kb /= 1024  # No macOS o valor vem em bytes
+    return {
+        'etapa': nome,
+        'mensagens': n_mensagens,
+        'segundos': segundos,
+        'segundos_total': total,
+        'mensagens_por_segundo': n_mensagens / segundos if segundos > 0 and n_mensagens else None,
+        'pico_rss_mb': pico_kb / 1024,
+        'erro': erro,
+    }
+
+
+def main():
+    contexto = get_context('spawn')
+    relatorio = {
+        'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'n_cpus': os.cpu_count(),
+        'semente': SEMENTE,
+        'resultados': [],
+    }
+
+    for tamanho in TAMANHOS:
+        caminho = obter_csv_sintetico(tamanho, DIR_DADOS, semente=SEMENTE)
+        print(f"\n--- {tamanho} mensagens ---")
+        for nome in ETAPAS:
+            # Um processo novo por etapa, para medir o pico de memória de cada uma separadamente
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+                resultado = executor.submit(executar_etapa, nome, caminho).result()
+            resultado['tamanho'] = tamanho
+            relatorio['resultados'].append(resultado)
+
+            if resultado['erro']:
+                print(f"{nome:<20} ERRO: {next(l for l in resultado['erro'].splitlines() if l.strip()).strip()}")
+            else:
+                # Sem mensagens ou sem tempo medido, a vazão fica indefinida (None)
+                vazao = resultado['mensagens_por_segundo']
+                vazao = f"{vazao:12.0f}" if vazao is not None else f"{'-':>12}"
+                print(f"{nome:<20} {resultado['segundos']:9.3f}s | "
+                      f"{vazao} mensagens/s | pico {resultado['pico_rss_mb']:8.1f} MB")
+
+            # Salva a cada etapa, para não perder resultados de execuções longas
+            with open(ARQUIVO_RESULTADOS, 'w', encoding='utf-8') as f:
+                json.dump(relatorio, f, indent=2, ensure_ascii=False)
+
+    print(f"\nResultados salvos em '{os.path.basename(ARQUIVO_RESULTADOS)}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+"""
+Código compartilhado entre os scripts de análise, rotulagem e experimento.
+
+Os scripts deste repositório são executados diretamente (ex.: `python
+1-encontrar_hotspots.py`) e adicionam a raiz do repositório ao `sys.path`
+para importar este pacote.
+"""
@@ -0,0 +1,232 @@
+"""
+Tabelas agregadas por live, por canal e por canal/dia, calculadas em uma passada e guardadas em cache.
+
+A análise exploratória só precisa de estatísticas por live ou por canal. Em
+vez de agrupar o dataset inteiro a cada gráfico (e de juntar a quantidade
+de mensagens da live de volta em cada linha), `carregar_agregados` calcula
+uma única vez:
+
+- `por_live`: canal, título, início/fim, quantidade de mensagens, autores
+  únicos, intervalo entre mensagens (média, mediana, desvio, máximo),
+  tamanho das mensagens e quantas têm risada ("kkkk") ou emoji;
+- `por_canal_dia`: quantidade e tamanho das mensagens por canal e dia (dias
+  em UTC, como no heatmap original; outro fuso pode ser passado em `fuso`);
+- `por_canal`: totais por canal, incluindo autores únicos e o intervalo
+  médio entre mensagens do canal.
+
+O texto das mensagens é percorrido em lotes (`iterar_lotes`), e cada mensagem
+distinta é analisada uma única vez. As tabelas ficam em
+`.cache_dataset/<nome>.agregados.parquet` e são refeitas quando o CSV muda.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from comum.dataset import (
+    _caminhos_cache, _gravar_json_atomico, _ler_metadados, assinatura_dataset, carregar_dataset, iterar_lotes,
+)
+
+# Versão das tabelas. Incrementar ao mudar colunas ou definições.
+VERSAO_AGREGADOS = 1
+
+FUSO_HORARIO = 'UTC'  # Fuso usado para definir o dia em `por_canal_dia`
+PADRAO_RISADA = 'kkkk'  # Sem diferenciar maiúsculas
+PADRAO_EMOJI = ('[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F700-\U0001F77F'
+                '\U0001F780-\U0001F7FF\U0001F800-\U0001F8FF\U0001F900-\U0001F9FF\U0001FA00-\U0001FA6F'
+                '\U0001FA70-\U0001FAFF\U00002702-\U000027B0\U000024C2-\U0001F251]')
+TABELAS = ('por_live', 'por_canal_dia', 'por_canal')
+
+
+def caracteristicas_mensagens(mensagens):
+    """
+    Tamanho (em caracteres) e presença de risada e de emoji de cada mensagem.
+
+    Mensagens repetidas são analisadas uma única vez. Mensagens ausentes têm
+    tamanho NaN e não contam como risada nem emoji.
+    """
+    codigos, unicas = pd.factorize(pd.Series(mensagens, dtype=object))
+    unicas = pd.Series(unicas, dtype=object).astype(str)
+    tamanho = np.append(unicas.str.len().to_numpy(dtype=float), np.nan)
+    risada = np.append(unicas.str.contains(PADRAO_RISADA, case=False, regex=False).to_numpy(dtype=bool), False)
+    emoji = np.append(unicas.str.contains(PADRAO_EMOJI, regex=True).to_numpy(dtype=bool), False)
+    # O código -1 (mensagem ausente) aponta para o último elemento
+    return pd.DataFrame({
+        'tamanho_mensagem': tamanho[codigos],
+        'tem_risada': risada[codigos],
+        'tem_emoji': emoji[codigos],
+    })
+
+
+def _segundos(timestamps):
+    """Timestamps em segundos desde a época, com NaN para valores ausentes."""
+    return (timestamps - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy()
+
+
+def agregar_por_live(df):
+    """
+    Calcula a tabela `por_live`.
+
+    Args:
+        df: mensagens com `id_video`, `canal`, `titulo`, `autor`, `timestamp` e as
+            colunas de `caracteristicas_mensagens`.
+    """
+    df = df.sort_values(['id_video', 'timestamp'], kind='mergesort', ignore_index=True)
+    codigos = pd.factorize(df['id_video'])[0]
+    segundos = _segundos(df['timestamp'])
+    intervalo = np.full(len(df), np.nan)
+    if len(df) > 1:
+        mesma_live = codigos[1:] == codigos[:-1]
+        intervalo[1:] = np.where(mesma_live, np.diff(segundos), np.nan)
+
+    tabela = df.assign(intervalo_s=intervalo).groupby('id_video', observed=True, sort=False).agg(
+        canal=('canal', 'first'),
+        titulo=('titulo', 'first'),
+        inicio=('timestamp', 'min'),
+        fim=('timestamp', 'max'),
+        quantidade_mensagens=('timestamp', 'size'),
+        autores_unicos=('autor', 'nunique'),
+        intervalo_medio_s=('intervalo_s', 'mean'),
+        intervalo_mediano_s=('intervalo_s', 'median'),
+        intervalo_desvio_s=('intervalo_s', 'std'),
+        intervalo_max_s=('intervalo_s', 'max'),
+        tamanho_medio=('tamanho_mensagem', 'mean'),
+        tamanho_mediano=('tamanho_mensagem', 'median'),
+        tamanho_max=('tamanho_mensagem', 'max'),
+        mensagens_com_risada=('tem_risada', 'sum'),
+        mensagens_com_emoji=('tem_emoji', 'sum'),
+    ).reset_index()
+    tabela['duracao_s'] = (tabela['fim'] - tabela['inicio']).dt.total_seconds()
+    tabela['taxa_risadas'] = tabela['mensagens_com_risada'] / tabela['quantidade_mensagens']
+    tabela['taxa_emojis'] = tabela['mensagens_com_emoji'] / tabela['quantidade_mensagens']
+    return tabela
+
+
+def agregar_por_canal_dia(df, fuso=FUSO_HORARIO):
+    """Calcula a tabela `por_canal_dia` (dia no fuso horário `fuso`)."""
+    dia = df['timestamp'].dt.tz_convert(fuso).dt.date
+    tabela = df.assign(dia=dia).groupby(['canal', 'dia'], observed=True).agg(
+        quantidade_mensagens=('timestamp', 'size'),
+        autores_unicos=('autor', 'nunique'),
+        soma_tamanho=('tamanho_mensagem', 'sum'),
+        mensagens_com_texto=('tamanho_mensagem', 'count'),
+        mensagens_com_risada=('tem_risada', 'sum'),
+        mensagens_com_emoji=('tem_emoji', 'sum'),
+    ).reset_index()
+    tabela['tamanho_medio'] = tabela['soma_tamanho'] / tabela['mensagens_com_texto']
+    return tabela
+
+
+def agregar_por_canal(df, por_live):
+    """
+    Calcula a tabela `por_canal`.
+
+    `intervalo_medio_s` é a média dos intervalos entre mensagens consecutivas
+    do canal (todas as lives em ordem de horário), isto é,
+    (fim - início) / (mensagens com horário - 1).
+    """
+    tabela = df.groupby('canal', observed=True).agg(
+        quantidade_mensagens=('timestamp', 'size'),
+        mensagens_com_horario=('timestamp', 'count'),
+        mensagens_com_autor=('autor', 'count'),
+        autores_unicos=('autor', 'nunique'),
+        inicio=('timestamp', 'min'),
+        fim=('timestamp', 'max'),
+        soma_tamanho=('tamanho_mensagem', 'sum'),
+        mensagens_com_texto=('tamanho_mensagem', 'count'),
+        mensagens_com_risada=('tem_risada', 'sum'),
+        mensagens_com_emoji=('tem_emoji', 'sum'),
+    )
+    lives = por_live.groupby('canal', observed=True)['quantidade_mensagens']
+    tabela['quantidade_lives'] = lives.size()
+    tabela['media_mensagens_por_live'] = lives.mean()
+    # Média sobre as mensagens (cada live pesa pelo seu volume), como a média de
+    # `quantidade_mensagens` calculada linha a linha no dataset
+    tabela['media_mensagens_por_live_ponderada'] = lives.apply(lambda q: (q.astype(float) ** 2).sum() / q.sum())
+    tabela['mensagens_por_autor'] = tabela['mensagens_com_autor'] / tabela['autores_unicos']
+    tabela['intervalo_medio_s'] = ((tabela['fim'] - tabela['inicio']).dt.total_seconds()
+                                   / (tabela['mensagens_com_horario'] - 1).where(lambda n: n > 0))
+    tabela['tamanho_medio'] = tabela['soma_tamanho'] / tabela['mensagens_com_texto']
+    tabela['taxa_risadas'] = tabela['mensagens_com_risada'] / tabela['quantidade_mensagens']
+    tabela['taxa_emojis'] = tabela['mensagens_com_emoji'] / tabela['quantidade_mensagens']
+    return tabela.reset_index()
+
+
+def calcular_agregados(df, fuso=FUSO_HORARIO):
+    """Calcula as três tabelas a partir das mensagens (com as colunas de `caracteristicas_mensagens`)."""
+    df = df.assign(canal=df['canal'].astype(str).str.strip())
+    por_live = agregar_por_live(df)
+    return {
+        'por_live': por_live,
+        'por_canal_dia': agregar_por_canal_dia(df, fuso),
+        'por_canal': agregar_por_canal(df, por_live),
+    }
+
+
+def _caminhos_agregados(caminho_csv, dir_cache=None):
+    caminho_parquet, _ = _caminhos_cache(caminho_csv, dir_cache)
+    base = caminho_parquet[:-len('.parquet')]
+    return {tabela: f"{base}.agregados_{tabela}.parquet" for tabela in TABELAS}, f"{base}.agregados.meta.json"
+
+
+def carregar_agregados(caminho_csv, fuso=FUSO_HORARIO, dir_cache=None, tamanho_lote=200_000):
+    """
+    Retorna as tabelas agregadas do dataset, calculando-as apenas quando o CSV muda.
+
+    Returns:
+        Dicionário com os DataFrames `por_live`, `por_canal_dia` e `por_canal`.
+    """
+    caminhos, caminho_meta = _caminhos_agregados(caminho_csv, dir_cache)
+    assinatura = assinatura_dataset(caminho_csv, dir_cache)
+    meta = _ler_metadados(caminho_meta)
+    if (meta is not None and meta.get('versao') == VERSAO_AGREGADOS and meta.get('sha256') == assinatura
+            and meta.get('fuso') == fuso and all(os.path.exists(c) for c in caminhos.values())):
+        return {tabela: pd.read_parquet(caminho, engine="pyarrow") for tabela, caminho in caminhos.items()}
+
+    print("Calculando as tabelas agregadas (executado apenas quando o CSV muda)...")
+    df = carregar_dataset(caminho_csv, colunas=['id_video', 'canal', 'titulo', 'autor', 'timestamp'], dir_cache=dir_cache)
+    # O texto é lido em lotes; só as características de cada mensagem ficam em memória
+    caracteristicas = pd.concat(
+        [caracteristicas_mensagens(lote['mensagem'])
+         for lote in iterar_lotes(caminho_csv, colunas=['mensagem'], tamanho_lote=tamanho_lote, dir_cache=dir_cache)],
+        ignore_index=True,
+    )
+    tabelas = calcular_agregados(pd.concat([df, caracteristicas], axis=1), fuso)
+
+    for tabela, caminho in caminhos.items():
+        tabelas[tabela].to_parquet(caminho + ".tmp", engine="pyarrow", index=False)
+        os.replace(caminho + ".tmp", caminho)
+    _gravar_json_atomico(caminho_meta, {'versao': VERSAO_AGREGADOS, 'sha256': assinatura, 'fuso': fuso})
+    return tabelas
+
+
+def comparar_grupos(agregados, grupos):
+    """
+    Compara grupos de canais (ex.: grandes x pequenos) a partir das tabelas agregadas.
+
+    Args:
+        agregados: resultado de `carregar_agregados`.
+        grupos: dicionário `nome do grupo -> lista de canais`.
+
+    Returns:
+        DataFrame com uma linha por grupo: volume médio por live, média (entre os
+        canais) de mensagens por usuário, tempo médio entre mensagens e
+        percentual de mensagens com risada e com emoji.
+    """
+    por_live, por_canal = agregados['por_live'], agregados['por_canal']
+    linhas = []
+    for nome, canais in grupos.items():
+        lives = por_live[por_live['canal'].isin(canais)]
+        canal = por_canal[por_canal['canal'].isin(canais)]
+        intervalos = (canal['mensagens_com_horario'] - 1).clip(lower=0).sum()
+        duracao = (canal['fim'] - canal['inicio']).dt.total_seconds().sum()
+        n = canal['quantidade_mensagens'].sum()
+        linhas.append({
+            'grupo': nome,
+            'volume_medio_por_live': lives['quantidade_mensagens'].mean(),
+            'mensagens_por_usuario': canal['mensagens_por_autor'].mean(),
+            'tempo_medio_entre_mensagens_s': duracao / intervalos if intervalos else np.nan,
+            'percentual_risadas': 100 * canal['mensagens_com_risada'].sum() / n if n else np.nan,
+            'percentual_emojis': 100 * canal['mensagens_com_emoji'].sum() / n if n else np.nan,
+        })
+    return pd.DataFrame(linhas).fillna(0)
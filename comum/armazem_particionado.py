@@ -0,0 +1,347 @@
+"""
+Armazém do dataset particionado por live, com inclusão incremental de novas lives.
+
+Em vez de um único `dataset_unificado.csv`, cada live fica em um arquivo
+Parquet próprio, em `dados/canal=<canal>/id_video=<id>.parquet`. O arquivo
+`manifesto.json` lista as partições com o número de linhas, o intervalo de
+tempo e um hash do conteúdo. Incluir uma live nova grava apenas a partição
+dela; uma live que já existe só é regravada se o conteúdo mudou.
+
+Os artefatos derivados (mensagens por live, hotspots, frequência de palavras
+e as tabelas de `comum.agregados`) são `Agregado`s: cada um é calculado por
+partição e guardado em `agregados/<nome>/`, junto com o hash da partição que
+o originou. Ao atualizar, apenas as partições novas ou alteradas são
+recalculadas e os resultados parciais são combinados no resultado global
+(`agregados/<nome>.parquet`).
+"""
+import hashlib
+import os
+import shutil
+from urllib.parse import quote
+
+import pandas as pd
+
+from comum.dataset import COLUNA_TIMESTAMP, COLUNAS_CATEGORICAS, _gravar_json_atomico, _ler_metadados
+
+# Versão do formato do armazém. Incrementar ao mudar o layout ou o hash das partições.
+VERSAO_ARMAZEM = 1
+
+
+def _nome_seguro(valor):
+    """Codifica um nome (canal ou id do vídeo) para uso em caminhos de arquivo."""
+    return quote(str(valor), safe='-_')
+
+
+def hash_conteudo(df):
+    """Hash SHA-256 das linhas de um DataFrame, independente do arquivo em que foi gravado."""
+    h = hashlib.sha256()
+    h.update(",".join(df.columns).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def preparar_live(df):
+    """
+    Ajusta os tipos de uma live para gravação: texto nas colunas categóricas,
+    timestamp em UTC e linhas em ordem de horário (ordenação estável).
+    """
+    df = df.copy()
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype(object).where(df[coluna].notna(), None)
+    if COLUNA_TIMESTAMP in df.columns:
+        df[COLUNA_TIMESTAMP] = pd.to_datetime(df[COLUNA_TIMESTAMP], format="ISO8601", utc=True, errors="coerce")
+        df = df.sort_values(COLUNA_TIMESTAMP, kind='mergesort', na_position='last')
+    return df.reset_index(drop=True)
+
+
+class Agregado:
+    """
+    Resultado derivado calculado por partição e combinado entre partições.
+
+    Args:
+        nome: nome do agregado (também é o nome do diretório do cache).
+        calcular: função `(df_da_live) -> DataFrame` com o resultado parcial.
+        combinar: função `(lista de DataFrames) -> DataFrame`. Por padrão, concatena.
+        colunas: colunas da partição necessárias para `calcular`. `None` lê todas.
+        parametros: texto que identifica a configuração (ex.: tamanho da janela).
+            Se mudar, todos os resultados parciais são recalculados.
+    """
+
+    def __init__(self, nome, calcular, combinar=None, colunas=None, parametros=''):
+        self.nome = nome
+        self.calcular = calcular
+        self.combinar = combinar or (lambda partes: pd.concat(partes, ignore_index=True))
+        self.colunas = colunas
+        self.parametros = str(parametros)
+
+
+class ArmazemParticionado:
+    """Dataset particionado por (`canal`, `id_video`) em `raiz`, com manifesto e agregados incrementais."""
+
+    def __init__(self, raiz):
+        self.raiz = os.path.abspath(raiz)
+        self.caminho_manifesto = os.path.join(self.raiz, 'manifesto.json')
+        manifesto = _ler_metadados(self.caminho_manifesto)
+        if manifesto is not None and manifesto.get('versao') != VERSAO_ARMAZEM:
+            raise ValueError(f"Armazém em '{self.raiz}' tem versão {manifesto.get('versao')}; "
+                             f"esperada {VERSAO_ARMAZEM}.")
+        self.manifesto = manifesto or {'versao': VERSAO_ARMAZEM, 'particoes': {}}
+
+    @property
+    def particoes(self):
+        """Dicionário `id_video -> metadados` das partições registradas."""
+        return self.manifesto['particoes']
+
+    def _salvar_manifesto(self):
+        os.makedirs(self.raiz, exist_ok=True)
+        _gravar_json_atomico(self.caminho_manifesto, self.manifesto)
+
+    def _caminho_particao(self, canal, id_video):
+        return os.path.join(self.raiz, 'dados', f"canal={_nome_seguro(canal)}", f"id_video={_nome_seguro(id_video)}.parquet")
+
+    # --- INCLUSÃO DE LIVES ---
+
+    def adicionar(self, df, acrescentar=False):
+        """
+        Inclui ou atualiza as lives presentes em `df` (uma partição por `id_video`).
+
+        Args:
+            df: mensagens no formato do dataset unificado; precisa de `id_video` e `canal`.
+            acrescentar: se True, as mensagens de uma live já existente são somadas às
+                gravadas (linhas idênticas são descartadas); se False, substituem a partição.
+
+        Returns:
+            (novas, alteradas): listas de `id_video` incluídos e regravados. Lives
+            cujo conteúdo não mudou não são regravadas.
+        """
+        novas, alteradas = [], []
+        for id_video, live in df.groupby('id_video', sort=False, observed=True, dropna=True):
+            id_video = str(id_video)
+            registro = self.particoes.get(id_video)
+            # Tipos normalizados antes de comparar: timestamps lidos como texto nunca
+            # seriam iguais aos já gravados
+            live = preparar_live(live)
+            if acrescentar and registro is not None:
+                gravada = preparar_live(self.ler_particao(id_video))
+                live = preparar_live(pd.concat([gravada, live], ignore_index=True).drop_duplicates())
+            hash_live = hash_conteudo(live)
+            if registro is not None and registro['hash'] == hash_live:
+                continue
+
+            canal = live['canal'].dropna().iloc[0] if live['canal'].notna().any() else ''
+            caminho = self._caminho_particao(canal, id_video)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            temporario = caminho + ".tmp"
+            live.to_parquet(temporario, engine="pyarrow", index=False)
+            os.replace(temporario, caminho)
+            if registro is not None and registro['arquivo'] != os.path.relpath(caminho, self.raiz):
+                # A live mudou de canal: remove o arquivo antigo
+                antigo = os.path.join(self.raiz, registro['arquivo'])
+                if os.path.exists(antigo):
+                    os.remove(antigo)
+
+            tempos = live[COLUNA_TIMESTAMP] if COLUNA_TIMESTAMP in live else pd.Series(dtype='datetime64[ns, UTC]')
+            self.particoes[id_video] = {
+                'canal': canal,
+                'arquivo': os.path.relpath(caminho, self.raiz),
+                'linhas': len(live),
+                'inicio': None if tempos.isna().all() else tempos.min().isoformat(),
+                'fim': None if tempos.isna().all() else tempos.max().isoformat(),
+                'hash': hash_live,
+            }
+            (alteradas if registro is not None else novas).append(id_video)
+            # O manifesto é salvo a cada live, para que uma interrupção não perca as já gravadas
+            self._salvar_manifesto()
+        return novas, alteradas
+
+    def remover(self, id_video):
+        """Remove uma live do armazém (os agregados a descartam na próxima atualização)."""
+        registro = self.particoes.pop(str(id_video), None)
+        if registro is None:
+            return False
+        caminho = os.path.join(self.raiz, registro['arquivo'])
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        self._salvar_manifesto()
+        return True
+
+    # --- LEITURA ---
+
+    def ler_particao(self, id_video, colunas=None):
+        """Lê as mensagens de uma live (colunas categóricas como texto)."""
+        caminho = os.path.join(self.raiz, self.particoes[str(id_video)]['arquivo'])
+        return pd.read_parquet(caminho, engine="pyarrow", columns=colunas)
+
+    def lives(self, canais=None):
+        """Lista os `id_video` registrados, opcionalmente apenas dos `canais` indicados."""
+        return [id_video for id_video, registro in self.particoes.items()
+                if canais is None or registro['canal'] in canais]
+
+    def carregar(self, colunas=None, canais=None):
+        """
+        Carrega as lives (de todos os canais ou apenas de `canais`) em um único DataFrame.
+
+        Retorna os mesmos tipos de `comum.dataset.carregar_dataset`: `canal`,
+        `id_video` e `autor` categóricos e `timestamp` em UTC.
+        """
+        partes = [self.ler_particao(id_video, colunas) for id_video in self.lives(canais)]
+        if not partes:
+            return pd.DataFrame(columns=colunas)
+        df = pd.concat(partes, ignore_index=True)
+        for coluna in COLUNAS_CATEGORICAS:
+            if coluna in df.columns:
+                df[coluna] = df[coluna].astype("category")
+        return df
+
+    # --- AGREGADOS ---
+
+    def atualizar_agregado(self, agregado):
+        """
+        Atualiza um agregado e retorna o resultado global.
+
+        Apenas as partições novas ou alteradas desde a última atualização (ou
+        todas, se `agregado.parametros` mudou) são recalculadas; as lives
+        removidas do armazém saem do resultado.
+        """
+        dir_agregado = os.path.join(self.raiz, 'agregados', agregado.nome)
+        caminho_meta = os.path.join(dir_agregado, 'manifesto.json')
+        caminho_global = os.path.join(self.raiz, 'agregados', f"{agregado.nome}.parquet")
+
+        meta = _ler_metadados(caminho_meta)
+        if meta is None or meta.get('parametros') != agregado.parametros:
+            shutil.rmtree(dir_agregado, ignore_errors=True)
+            meta = {'parametros': agregado.parametros, 'particoes': {}}
+        os.makedirs(dir_agregado, exist_ok=True)
+
+        calculados = meta['particoes']
+        pendentes = [id_video for id_video, registro in self.particoes.items()
+                     if calculados.get(id_video) != registro['hash']]
+        removidas = [id_video for id_video in calculados if id_video not in self.particoes]
+        if not pendentes and not removidas and os.path.exists(caminho_global):
+            return pd.read_parquet(caminho_global, engine="pyarrow")
+
+        for id_video in removidas:
+            parcial = os.path.join(dir_agregado, f"{_nome_seguro(id_video)}.parquet")
+            if os.path.exists(parcial):
+                os.remove(parcial)
+            del calculados[id_video]
+
+        if pendentes:
+            print(f"Agregado '{agregado.nome}': recalculando {len(pendentes)} de {len(self.particoes)} lives...")
+        for id_video in pendentes:
+            resultado = agregado.calcular(self.ler_particao(id_video, agregado.colunas))
+            parcial = os.path.join(dir_agregado, f"{_nome_seguro(id_video)}.parquet")
+            resultado.to_parquet(parcial + ".tmp", engine="pyarrow", index=False)
+            os.replace(parcial + ".tmp", parcial)
+            calculados[id_video] = self.particoes[id_video]['hash']
+            _gravar_json_atomico(caminho_meta, meta)
+        _gravar_json_atomico(caminho_meta, meta)
+
+        # Os resultados parciais são combinados na ordem do manifesto
+        partes = [pd.read_parquet(os.path.join(dir_agregado, f"{_nome_seguro(id_video)}.parquet"), engine="pyarrow")
+                  for id_video in self.particoes]
+        resultado = agregado.combinar(partes) if partes else pd.DataFrame()
+        resultado.to_parquet(caminho_global + ".tmp", engine="pyarrow", index=False)
+        os.replace(caminho_global + ".tmp", caminho_global)
+        return resultado
+
+
+# --- AGREGADOS PADRÃO ---
+
+def _resumo_live(df):
+    return pd.DataFrame({
+        'id_video': [df['id_video'].iloc[0]],
+        'canal': [df['canal'].iloc[0]],
+        'titulo': [df['titulo'].iloc[0] if 'titulo' in df else None],
+        'quantidade_mensagens': [len(df)],
+    })
+
+
+def agregado_mensagens_por_live():
+    """Quantidade de mensagens de cada live, com canal e título (a tabela `mensagens_por_live` da análise)."""
+    return Agregado('mensagens_por_live', _resumo_live, colunas=['id_video', 'canal', 'titulo'])
+
+
+def agregado_hotspots(tamanho_janela='10s', top_n=10):
+    """Os `top_n` instantes de maior densidade de cada live, no formato de `1-encontrar_hotspots.py`."""
+    from comum.hotspots import calcular_densidade, top_hotspots_por_live
+
+    def calcular(df):
+        # A partição já está em ordem de horário e tem uma única live; mensagens sem horário (NaT) ficam de fora
+        canal, titulo = df['canal'].iloc[0], df['titulo'].iloc[0]
+        df = df.dropna(subset=['timestamp'])
+        top = top_hotspots_por_live(df[['id_video', 'timestamp']], calcular_densidade(df, tamanho_janela), top_n)
+        top = top.assign(canal=canal, titulo_live=titulo)
+        top = top.rename(columns={'timestamp': 'timestamp_hotspot'})
+        top['mensagens_na_janela'] = top['mensagens_na_janela'].astype(int)
+        return top[['canal', 'titulo_live', 'timestamp_hotspot', 'mensagens_na_janela', 'id_video']]
+
+    return Agregado('hotspots', calcular, colunas=['id_video', 'canal', 'titulo', 'timestamp'],
+                    parametros=f"janela={tamanho_janela};top={top_n}")
+
+
+def agregado_estatisticas_por_live():
+    """A tabela `por_live` de `comum.agregados` (autores, intervalos, tamanho, risadas e emojis de cada live)."""
+    from comum.agregados import VERSAO_AGREGADOS, agregar_por_live, caracteristicas_mensagens
+
+    def calcular(df):
+        df = df.reset_index(drop=True)
+        df = pd.concat([df.drop(columns='mensagem'), caracteristicas_mensagens(df['mensagem'])], axis=1)
+        return agregar_por_live(df.assign(canal=df['canal'].astype(str).str.strip()))
+
+    return Agregado('estatisticas_por_live', calcular,
+                    colunas=['id_video', 'canal', 'titulo', 'autor', 'timestamp', 'mensagem'],
+                    parametros=f"v{VERSAO_AGREGADOS}")
+
+
+def agregado_por_canal_dia(fuso=None):
+    """
+    A tabela `por_canal_dia` de `comum.agregados`, somada entre as lives.
+
+    Autores únicos não podem ser somados entre lives, então a coluna
+    `autores_unicos` não faz parte do resultado.
+    """
+    from comum.agregados import FUSO_HORARIO, VERSAO_AGREGADOS, agregar_por_canal_dia, caracteristicas_mensagens
+    fuso = fuso or FUSO_HORARIO
+
+    def calcular(df):
+        df = df.reset_index(drop=True)
+        df = pd.concat([df.drop(columns='mensagem'), caracteristicas_mensagens(df['mensagem'])], axis=1)
+        tabela = agregar_por_canal_dia(df.assign(canal=df['canal'].astype(str).str.strip()), fuso)
+        return tabela.drop(columns=['autores_unicos', 'tamanho_medio'])
+
+    def combinar(partes):
+        tabela = pd.concat(partes, ignore_index=True).groupby(['canal', 'dia'], sort=True).sum().reset_index()
+        tabela['tamanho_medio'] = tabela['soma_tamanho'] / tabela['mensagens_com_texto']
+        return tabela
+
+    return Agregado('por_canal_dia', calcular, combinar=combinar,
+                    colunas=['canal', 'autor', 'timestamp', 'mensagem'], parametros=f"v{VERSAO_AGREGADOS};fuso={fuso}")
+
+
+def _contar_tokens(df):
+    from comum.frequencia import contar_lote
+    # Contagem sem filtros: stop words e tamanho mínimo são aplicados na leitura (`filtrar_frequencia`)
+    contagem = contar_lote(df['mensagem'], stop_words=frozenset(), tamanho_minimo=1)
+    return pd.DataFrame({'palavra': list(contagem.keys()), 'contagem': list(contagem.values())})
+
+
+def _somar_contagens(partes):
+    todas = pd.concat(partes, ignore_index=True)
+    return todas.groupby('palavra', sort=False)['contagem'].sum().reset_index()
+
+
+def agregado_frequencia_palavras():
+    """Frequência das palavras alfabéticas (em minúsculas) somada sobre todas as lives."""
+    return Agregado('frequencia_palavras', _contar_tokens, combinar=_somar_contagens, colunas=['mensagem'])
+
+
+def filtrar_frequencia(frequencia, stop_words, tamanho_minimo=2, ignorar_risadas=False):
+    """Aplica a `frequencia_palavras` os mesmos filtros de `comum.frequencia` e retorna um `Counter`."""
+    from collections import Counter
+    from comum.frequencia import filtrar_tokens
+
+    contagens = dict(zip(frequencia['palavra'], frequencia['contagem']))
+    return Counter({palavra: int(contagens[palavra])
+                    for palavra in filtrar_tokens(contagens, stop_words, tamanho_minimo, ignorar_risadas)})
@@ -0,0 +1,94 @@
+"""
+Bootstrap vetorizado do F1-Score (classe 1) para muitos limiares ao mesmo tempo.
+
+Em vez de sortear uma amostra e chamar `f1_score` em cada réplica, as réplicas
+são representadas por uma matriz de índices sorteados (réplicas x linhas),
+convertida em uma matriz de contagens: quantas vezes cada linha aparece em
+cada réplica. TP, FP e FN de todas as réplicas e limiares saem de produtos de
+matrizes com as predições de cada limiar, numa única passada do NumPy.
+As réplicas são processadas em blocos para limitar a memória.
+"""
+import numpy as np
+import pandas as pd
+
+
+def contagens_bootstrap(n, n_replicacoes, random_state=0, tamanho_bloco=500):
+    """
+    Gera, em blocos, a matriz de contagens das réplicas de bootstrap.
+
+    Yields:
+        Arrays float64 (réplicas do bloco x n): quantas vezes cada linha foi sorteada.
+    """
+    rng = np.random.default_rng(random_state)
+    for inicio in range(0, n_replicacoes, tamanho_bloco):
+        b = min(tamanho_bloco, n_replicacoes - inicio)
+        indices = rng.integers(0, n, size=(b, n))
+        deslocados = indices + (np.arange(b) * n)[:, None]
+        yield np.bincount(deslocados.ravel(), minlength=b * n).reshape(b, n).astype(np.float64)
+
+
+def _f1(tp, fp, fn):
+    """F1 binário com `zero_division=0`, como no `sklearn.metrics.f1_score`."""
+    denominador = 2 * tp + fp + fn
+    return np.divide(2 * tp, denominador, out=np.zeros_like(denominador, dtype=np.float64), where=denominador > 0)
+
+
+def f1_por_limiar(y_true, scores, limiares):
+    """F1 na amostra completa para cada limiar (predição = score > limiar)."""
+    y = np.asarray(y_true).astype(bool)
+    predicoes = np.asarray(scores)[:, None] > np.asarray(limiares)[None, :]
+    tp = (predicoes & y[:, None]).sum(axis=0)
+    fp = (predicoes & ~y[:, None]).sum(axis=0)
+    fn = y.sum() - tp
+    return _f1(tp, fp, fn)
+
+
+def f1_bootstrap_limiares(y_true, scores, limiares, n_replicacoes=1000, random_state=0, tamanho_bloco=500):
+    """
+    Calcula o F1 de cada réplica de bootstrap para cada limiar.
+
+    Args:
+        y_true: rótulos verdadeiros (0/1).
+        scores: scores do classificador; a predição é `score > limiar`.
+        limiares: limiares a avaliar.
+        n_replicacoes: número de réplicas de bootstrap.
+        random_state: semente do sorteio.
+        tamanho_bloco: réplicas processadas por vez.
+
+    Returns:
+        Array (n_replicacoes x len(limiares)) com os F1-Scores.
+    """
+    y = np.asarray(y_true).astype(bool)
+    predicoes = np.asarray(scores)[:, None] > np.asarray(limiares)[None, :]
+    acertos = (predicoes & y[:, None]).astype(np.float64)
+    falsos_positivos = (predicoes & ~y[:, None]).astype(np.float64)
+    positivos = y.astype(np.float64)
+
+    resultados = []
+    for contagens in contagens_bootstrap(len(y), n_replicacoes, random_state, tamanho_bloco):
+        tp = contagens @ acertos
+        fp = contagens @ falsos_positivos
+        fn = (contagens @ positivos)[:, None] - tp
+        resultados.append(_f1(tp, fp, fn))
+    return np.vstack(resultados)
+
+
+def resumir_curva(f1s, limiares, f1_completo=None, nivel=0.95):
+    """
+    Resume as réplicas em uma curva F1 x limiar com intervalo de confiança percentil.
+
+    Returns:
+        DataFrame com `limiar`, `f1_medio`, `f1_desvio`, `ic_inferior`, `ic_superior`
+        e, se informado, `f1_amostra_completa`.
+    """
+    alfa = (1 - nivel) / 2
+    curva = pd.DataFrame({
+        'limiar': limiares,
+        'f1_medio': f1s.mean(axis=0),
+        'f1_desvio': f1s.std(axis=0),
+        'ic_inferior': np.quantile(f1s, alfa, axis=0),
+        'ic_superior': np.quantile(f1s, 1 - alfa, axis=0),
+    })
+    if f1_completo is not None:
+        curva['f1_amostra_completa'] = f1_completo
+    return curva
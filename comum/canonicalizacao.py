@@ -0,0 +1,71 @@
+"""
+Forma canônica das mensagens de chat e deduplicação.
+
+O chat é dominado por mensagens repetidas ("k", "kkkkkkkk", o mesmo emoji
+várias vezes). `canonizar` reduz variações que não mudam o sentido:
+
+- risadas longas ("kkkkkkk", "hahahaha", "rsrsrs") viram três repetições
+  da unidade ("kkk", "hahaha", "rsrsrs");
+- o mesmo emoji ou símbolo repetido em sequência fica com no máximo três cópias;
+- espaços e quebras de linha consecutivos viram um único espaço, e o texto
+  é normalizado em NFC e sem espaços nas pontas.
+
+`deduplicar` agrupa as mensagens iguais (após a forma canônica, se pedida)
+com uma tabela hash, devolvendo as mensagens únicas, o mapa inverso e o peso
+de cada uma. Assim, tokenização, inferência e consultas à API rodam uma vez
+por mensagem única e os resultados voltam às linhas originais com `expandir`.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Unidade da risada repetida 3 ou mais vezes (sem diferenciar maiúsculas)
+PADRAO_RISADA = re.compile(r'\b(k|ha|he|hi|rs)\1{2,}[hr]?\b', re.IGNORECASE)
+# Mesmo símbolo/emoji (com seletor de variação ou tom de pele opcional) repetido 4 ou mais vezes
+PADRAO_SIMBOLO_REPETIDO = re.compile(r'([^\w\s][\ufe0f\U0001F3FB-\U0001F3FF]?)\1{3,}')
+PADRAO_ESPACOS = re.compile(r'\s+')
+
+
+def canonizar(texto):
+    """Retorna a forma canônica de uma mensagem. Valores que não são texto viram ''."""
+    if not isinstance(texto, str):
+        return ''
+    texto = unicodedata.normalize('NFC', texto)
+    texto = PADRAO_RISADA.sub(lambda m: m.group(1) * 3, texto)
+    texto = PADRAO_SIMBOLO_REPETIDO.sub(lambda m: m.group(1) * 3, texto)
+    return PADRAO_ESPACOS.sub(' ', texto).strip()
+
+
+def deduplicar(textos, canonizar_textos=True):
+    """
+    Agrupa mensagens iguais.
+
+    Args:
+        textos: sequência ou Series de mensagens.
+        canonizar_textos: se True, compara as mensagens pela forma canônica;
+            se False, apenas mensagens idênticas são agrupadas.
+
+    Returns:
+        (unicos, inverso, pesos): `unicos` é a lista de mensagens únicas, na ordem
+        da primeira ocorrência; `inverso[i]` é a posição de `textos[i]` em `unicos`;
+        `pesos[j]` é quantas linhas correspondem a `unicos[j]`.
+    """
+    serie = pd.Series(textos, dtype=object)
+    if canonizar_textos:
+        # Textos repetidos são canonizados uma única vez
+        codigos, originais = pd.factorize(serie)
+        canonicos = np.array([canonizar(t) for t in originais] + [''], dtype=object)
+        serie = pd.Series(canonicos[codigos], dtype=object)
+    else:
+        serie = serie.where(serie.notna(), '').astype(str)
+
+    inverso, unicos = pd.factorize(serie)
+    pesos = np.bincount(inverso, minlength=len(unicos))
+    return list(unicos), inverso.astype(np.int64), pesos
+
+
+def expandir(valores_unicos, inverso):
+    """Leva os valores calculados para as mensagens únicas de volta às linhas originais."""
+    return np.asarray(valores_unicos)[inverso]
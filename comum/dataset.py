@@ -0,0 +1,215 @@
+"""
+Carregamento do `dataset_unificado.csv` através de um cache colunar (Parquet).
+
+Na primeira execução o CSV é lido uma única vez, os tipos são ajustados
+(colunas categóricas e timestamps já convertidos para UTC) e o resultado é
+gravado em `.cache_dataset/<nome>.parquet`, ao lado do CSV. As execuções
+seguintes leem apenas o Parquet, e somente as colunas pedidas.
+
+O cache é reconstruído automaticamente quando o CSV muda: primeiro compara
+tamanho e data de modificação; se forem diferentes, compara o hash SHA-256
+do arquivo antes de decidir refazer a conversão.
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# Versão do formato do cache. Incrementar ao mudar a conversão de tipos ou o layout do arquivo.
+VERSAO_CACHE = 2
+# Linhas por row group do Parquet: leituras de linhas esparsas descomprimem só os grupos necessários
+LINHAS_POR_GRUPO = 100_000
+
+NOME_DIR_CACHE = ".cache_dataset"
+COLUNAS_CATEGORICAS = ["canal", "id_video", "autor"]
+COLUNA_TIMESTAMP = "timestamp"
+
+
+def _caminhos_cache(caminho_csv, dir_cache=None):
+    """Retorna os caminhos do arquivo Parquet e do arquivo de metadados do cache."""
+    caminho_csv = os.path.abspath(caminho_csv)
+    if dir_cache is None:
+        dir_cache = os.path.join(os.path.dirname(caminho_csv), NOME_DIR_CACHE)
+    nome_base = os.path.splitext(os.path.basename(caminho_csv))[0]
+    return (
+        os.path.join(dir_cache, f"{nome_base}.parquet"),
+        os.path.join(dir_cache, f"{nome_base}.meta.json"),
+    )
+
+
+def calcular_hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    """Calcula o SHA-256 de um arquivo lendo-o em blocos."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _ler_metadados(caminho_meta):
+    try:
+        with open(caminho_meta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _gravar_json_atomico(caminho, dados):
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, indent=2)
+    os.replace(temporario, caminho)
+
+
+def converter_tipos(df):
+    """
+    Aplica os tipos usados no cache: categorias e timestamp em UTC.
+
+    Timestamps ausentes ou inválidos viram NaT. As linhas são mantidas para
+    preservar as posições do dataset; quem depende do horário (ex.:
+    `comum.hotspots.ordenar_por_live`) descarta essas linhas explicitamente.
+    """
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].astype("category")
+    if COLUNA_TIMESTAMP in df.columns:
+        df[COLUNA_TIMESTAMP] = pd.to_datetime(
+            df[COLUNA_TIMESTAMP], format="ISO8601", utc=True, errors="coerce"
+        )
+    return df
+
+
+def cache_valido(caminho_csv, dir_cache=None):
+    """
+    Verifica se o cache corresponde ao CSV atual.
+
+    Retorna True se o cache pode ser usado. Quando apenas a data de modificação
+    mudou mas o conteúdo é o mesmo (ex.: arquivo copiado), atualiza os
+    metadados e considera o cache válido.
+    """
+    caminho_parquet, caminho_meta = _caminhos_cache(caminho_csv, dir_cache)
+    meta = _ler_metadados(caminho_meta)
+    if meta is None or meta.get("versao") != VERSAO_CACHE or not os.path.exists(caminho_parquet):
+        return False
+
+    info = os.stat(caminho_csv)
+    if meta["tamanho"] == info.st_size and meta["mtime_ns"] == info.st_mtime_ns:
+        return True
+
+    if meta["tamanho"] != info.st_size or meta["sha256"] != calcular_hash_arquivo(caminho_csv):
+        return False
+
+    meta["mtime_ns"] = info.st_mtime_ns
+    _gravar_json_atomico(caminho_meta, meta)
+    return True
+
+
+def construir_cache(caminho_csv, dir_cache=None):
+    """Lê o CSV completo, converte os tipos e grava o cache Parquet."""
+    caminho_parquet, caminho_meta = _caminhos_cache(caminho_csv, dir_cache)
+    os.makedirs(os.path.dirname(caminho_parquet), exist_ok=True)
+
+    print(f"Construindo cache colunar de '{os.path.basename(caminho_csv)}' (executado apenas quando o CSV muda)...")
+    info = os.stat(caminho_csv)
+    sha256 = calcular_hash_arquivo(caminho_csv)
+    df = converter_tipos(pd.read_csv(caminho_csv))
+    invalidos = int(df[COLUNA_TIMESTAMP].isna().sum()) if COLUNA_TIMESTAMP in df.columns else 0
+    if invalidos:
+        print(f"Aviso: {invalidos} mensagens com timestamp ausente ou inválido (gravadas como NaT).")
+
+    temporario = caminho_parquet + ".tmp"
+    df.to_parquet(temporario, engine="pyarrow", index=False, row_group_size=LINHAS_POR_GRUPO)
+    os.replace(temporario, caminho_parquet)
+
+    _gravar_json_atomico(caminho_meta, {
+        "versao": VERSAO_CACHE,
+        "csv": os.path.abspath(caminho_csv),
+        "tamanho": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "sha256": sha256,
+        "linhas": len(df),
+        "timestamps_invalidos": invalidos,
+    })
+    return caminho_parquet
+
+
+def garantir_cache(caminho_csv, dir_cache=None):
+    """Retorna o caminho do Parquet, (re)construindo o cache se necessário."""
+    if not os.path.exists(caminho_csv):
+        raise FileNotFoundError(caminho_csv)
+    if not cache_valido(caminho_csv, dir_cache):
+        return construir_cache(caminho_csv, dir_cache)
+    return _caminhos_cache(caminho_csv, dir_cache)[0]
+
+
+def carregar_dataset(caminho_csv, colunas=None, dir_cache=None):
+    """
+    Carrega o dataset a partir do cache colunar.
+
+    Args:
+        caminho_csv: caminho do `dataset_unificado.csv` original.
+        colunas: lista de colunas a carregar. `None` carrega todas.
+        dir_cache: diretório do cache. Por padrão, `.cache_dataset/` ao lado do CSV.
+
+    Returns:
+        DataFrame com `canal`, `id_video` e `autor` categóricos e `timestamp`
+        já convertido para datetime em UTC.
+    """
+    caminho_parquet = garantir_cache(caminho_csv, dir_cache)
+    return pd.read_parquet(caminho_parquet, engine="pyarrow", columns=colunas)
+
+
+def assinatura_dataset(caminho_csv, dir_cache=None):
+    """
+    Retorna o hash SHA-256 do CSV registrado no cache.
+
+    Serve para invalidar artefatos derivados (ex.: índices) que guardam
+    posições de linhas do dataset.
+    """
+    garantir_cache(caminho_csv, dir_cache)
+    return _ler_metadados(_caminhos_cache(caminho_csv, dir_cache)[1])["sha256"]
+
+
+def iterar_lotes(caminho_csv, colunas=None, tamanho_lote=100_000, dir_cache=None):
+    """
+    Percorre o dataset em lotes de até `tamanho_lote` linhas, sem carregá-lo inteiro.
+
+    Yields:
+        DataFrames com as colunas pedidas, na ordem do dataset.
+    """
+    import pyarrow.parquet as pq
+
+    arquivo = pq.ParquetFile(garantir_cache(caminho_csv, dir_cache))
+    for lote in arquivo.iter_batches(batch_size=tamanho_lote, columns=colunas):
+        yield lote.to_pandas()
+
+
+def carregar_linhas(caminho_csv, linhas, colunas=None, dir_cache=None):
+    """
+    Carrega apenas as linhas `linhas` (posições no dataset) a partir do cache colunar.
+
+    Só os row groups do Parquet que contêm alguma das linhas pedidas são lidos.
+    As linhas são devolvidas na ordem de `linhas`, com os mesmos tipos de
+    `carregar_dataset` e com as posições originais como índice.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    linhas = np.asarray(linhas, dtype=np.int64)
+    arquivo = pq.ParquetFile(garantir_cache(caminho_csv, dir_cache))
+    tamanhos = [arquivo.metadata.row_group(i).num_rows for i in range(arquivo.num_row_groups)]
+    inicios = np.concatenate(([0], np.cumsum(tamanhos)))
+    if len(linhas) and (linhas.min() < 0 or linhas.max() >= inicios[-1]):
+        raise IndexError("Linha fora do intervalo do dataset.")
+
+    grupo_da_linha = np.searchsorted(inicios, linhas, side='right') - 1
+    grupos = np.unique(grupo_da_linha)
+    tabela = arquivo.read_row_groups(grupos.tolist(), columns=colunas)
+    # Posição de cada linha pedida dentro da tabela formada pelos grupos lidos
+    inicio_na_tabela = np.concatenate(([0], np.cumsum([tamanhos[g] for g in grupos])))[:-1]
+    posicoes = inicio_na_tabela[np.searchsorted(grupos, grupo_da_linha)] + linhas - inicios[grupo_da_linha]
+    df = tabela.take(pa.array(posicoes, type=pa.int64())).to_pandas()
+    df.index = linhas
+    return df
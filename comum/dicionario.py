@@ -0,0 +1,90 @@
+"""
+Busca de vários termos do dicionário ao mesmo tempo (algoritmo de Aho–Corasick).
+
+Os termos são compilados uma única vez em um autômato (uma trie com links de
+falha), e cada mensagem é percorrida uma só vez, caractere a caractere,
+independentemente do número de termos. A busca é por substring e não
+diferencia maiúsculas de minúsculas (`str.casefold`), como o
+`str.contains(..., case=False)` usado antes.
+"""
+import pandas as pd
+
+
+def carregar_dicionario(caminho):
+    """Lê o arquivo de dicionário (um termo por linha), ignorando linhas vazias."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return [linha.strip() for linha in f if linha.strip()]
+
+
+class CasadorDeTermos:
+    """Autômato de Aho–Corasick que informa quais termos aparecem em cada texto."""
+
+    def __init__(self, termos):
+        # Termos únicos após o case folding, preservando a ordem do dicionário
+        self.termos = list(dict.fromkeys(termo.casefold() for termo in termos if termo))
+        self._transicoes = [{}]
+        self._falhas = [0]
+        self._saidas = [()]
+        for indice, termo in enumerate(self.termos):
+            self._inserir(termo, indice)
+        self._construir_falhas()
+
+    def _inserir(self, termo, indice):
+        estado = 0
+        for caractere in termo:
+            proximo = self._transicoes[estado].get(caractere)
+            if proximo is None:
+                proximo = len(self._transicoes)
+                self._transicoes[estado][caractere] = proximo
+                self._transicoes.append({})
+                self._falhas.append(0)
+                self._saidas.append(())
+            estado = proximo
+        self._saidas[estado] = self._saidas[estado] + (indice,)
+
+    def _construir_falhas(self):
+        """Calcula os links de falha em largura e acumula as saídas de cada estado."""
+        fila = list(self._transicoes[0].values())
+        for estado in fila:
+            for caractere, filho in self._transicoes[estado].items():
+                falha = self._falhas[estado]
+                while falha and caractere not in self._transicoes[falha]:
+                    falha = self._falhas[falha]
+                destino = self._transicoes[falha].get(caractere, 0)
+                self._falhas[filho] = destino if destino != filho else 0
+                self._saidas[filho] = self._saidas[filho] + self._saidas[self._falhas[filho]]
+                fila.append(filho)
+
+    def _indices_encontrados(self, texto, parar_no_primeiro=False):
+        transicoes, falhas, saidas = self._transicoes, self._falhas, self._saidas
+        encontrados = {}
+        estado = 0
+        for caractere in texto.casefold():
+            while estado and caractere not in transicoes[estado]:
+                estado = falhas[estado]
+            estado = transicoes[estado].get(caractere, 0)
+            if saidas[estado]:
+                if parar_no_primeiro:
+                    return saidas[estado][:1]
+                for indice in saidas[estado]:
+                    encontrados.setdefault(indice, None)
+        return tuple(encontrados)
+
+    def encontrar(self, texto):
+        """Retorna os termos presentes em `texto`, na ordem da primeira ocorrência."""
+        if not isinstance(texto, str):
+            return ()
+        return tuple(self.termos[i] for i in self._indices_encontrados(texto))
+
+    def contem(self, texto):
+        """Retorna True se `texto` contém ao menos um termo (para na primeira ocorrência)."""
+        if not isinstance(texto, str):
+            return False
+        return bool(self._indices_encontrados(texto, parar_no_primeiro=True))
+
+    def encontrar_em_serie(self, serie):
+        """Aplica `encontrar` a uma Series de textos. Mensagens repetidas são buscadas uma única vez."""
+        codigos, unicos = pd.factorize(serie)
+        resultados_unicos = [self.encontrar(texto) for texto in unicos]
+        resultados_unicos.append(())  # código -1 (valores ausentes)
+        return pd.Series([resultados_unicos[c] for c in codigos], index=serie.index, dtype=object)
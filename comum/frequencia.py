@@ -0,0 +1,100 @@
+"""
+Contagem de frequência de palavras em streaming.
+
+As mensagens são processadas lote a lote: cada lote é tokenizado com o
+`word_tokenize` do NLTK, filtrado e somado a um `Counter`. Nem o texto
+completo do corpus nem a lista de todos os tokens chegam a existir em
+memória, então o pico de memória depende do tamanho do lote e do
+vocabulário, não do número de mensagens.
+
+`contar_palavras_paralelo` distribui os lotes entre processos e soma os
+`Counter` parciais na ordem dos lotes, o que dá exatamente o mesmo resultado
+(inclusive a ordem de desempate do `most_common`) que a versão serial.
+"""
+import multiprocessing
+import os
+import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from nltk.tokenize import word_tokenize
+
+PADRAO_RISADA = re.compile(r'k{2,}')
+
+
+def filtrar_tokens(tokens, stop_words, tamanho_minimo=2, ignorar_risadas=False):
+    """Mantém tokens alfabéticos com ao menos `tamanho_minimo` letras e fora de `stop_words`."""
+    for palavra in tokens:
+        if ignorar_risadas and PADRAO_RISADA.fullmatch(palavra):
+            continue
+        if palavra.isalpha() and len(palavra) >= tamanho_minimo and palavra not in stop_words:
+            yield palavra
+
+
+def contar_lote(mensagens, stop_words, tamanho_minimo=2, ignorar_risadas=False):
+    """Tokeniza um lote de mensagens (em minúsculas) e conta as palavras que passam pelo filtro."""
+    texto = ' '.join(pd.Series(mensagens, dtype=object).dropna().astype(str).tolist())
+    tokens = word_tokenize(texto.lower())
+    return Counter(filtrar_tokens(tokens, stop_words, tamanho_minimo, ignorar_risadas))
+
+
+def contar_palavras(lotes, stop_words, tamanho_minimo=2, ignorar_risadas=False):
+    """
+    Soma as contagens de palavras de todos os lotes.
+
+    Args:
+        lotes: iterável de coleções de mensagens (ex.: `lote['mensagem']` de `iterar_lotes`).
+        stop_words: conjunto de palavras a descartar.
+        tamanho_minimo: número mínimo de letras de uma palavra.
+        ignorar_risadas: descarta tokens como 'kk', 'kkkk' etc.
+
+    Returns:
+        `Counter` com a frequência de cada palavra. As palavras aparecem na ordem
+        da primeira ocorrência, então `most_common` desempata como o `FreqDist`
+        calculado sobre o texto inteiro.
+    """
+    frequencia = Counter()
+    for mensagens in lotes:
+        frequencia.update(contar_lote(mensagens, stop_words, tamanho_minimo, ignorar_risadas))
+    return frequencia
+
+
+def _contexto_processos():
+    """
+    Prefere o método 'fork', que não reimporta o script principal nos processos filhos.
+
+    Com 'spawn' (Windows, macOS) o script que chama `contar_palavras_paralelo`
+    precisa estar protegido por `if __name__ == '__main__':`.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def contar_palavras_paralelo(lotes, stop_words, tamanho_minimo=2, ignorar_risadas=False, n_processos=None):
+    """
+    Versão de `contar_palavras` que tokeniza e filtra cada lote em um processo separado.
+
+    No máximo `2 * n_processos` lotes ficam em processamento ao mesmo tempo, então a
+    memória continua limitada. Os resultados são somados na ordem dos lotes.
+
+    Args:
+        n_processos: número de processos. `None` usa todos os núcleos; 1 executa em série.
+    """
+    n_processos = n_processos or os.cpu_count() or 1
+    if n_processos == 1:
+        return contar_palavras(lotes, stop_words, tamanho_minimo, ignorar_risadas)
+
+    frequencia = Counter()
+    pendentes = deque()
+    with ProcessPoolExecutor(max_workers=n_processos, mp_context=_contexto_processos()) as executor:
+        for mensagens in lotes:
+            pendentes.append(executor.submit(
+                contar_lote, list(mensagens), stop_words, tamanho_minimo, ignorar_risadas
+            ))
+            if len(pendentes) >= 2 * n_processos:
+                frequencia.update(pendentes.popleft().result())
+        while pendentes:
+            frequencia.update(pendentes.popleft().result())
+    return frequencia
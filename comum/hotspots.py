@@ -0,0 +1,149 @@
+"""
+Detecção de hotspots (picos de densidade de mensagens) em todas as lives de uma vez.
+
+Em vez de filtrar e copiar o DataFrame de cada live, os dados são ordenados
+uma única vez por (`id_video`, `timestamp`) e a contagem da janela deslizante
+é calculada com busca binária (`np.searchsorted`) sobre os timestamps em
+int64. A contagem de cada mensagem é igual à de
+`Series.rolling('10s').sum()` do pandas: mensagens no intervalo (t - janela, t].
+"""
+import numpy as np
+import pandas as pd
+
+
+def ordenar_por_live(df):
+    """
+    Ordena o DataFrame por (`id_video`, `timestamp`) com uma ordenação estável.
+
+    Mensagens sem timestamp (NaT) não têm posição no eixo do tempo e quebrariam
+    os deslocamentos de `tempos_continuos`; elas são descartadas com um aviso.
+    """
+    sem_horario = df['timestamp'].isna()
+    if sem_horario.any():
+        print(f"Aviso: {int(sem_horario.sum())} mensagens sem timestamp válido foram descartadas.")
+        df = df[~sem_horario]
+    return df.sort_values(by=['id_video', 'timestamp'], kind='mergesort', ignore_index=True)
+
+
+def _limites_por_live(codigos):
+    """Retorna os índices de início e fim de cada live em um array de códigos já ordenado."""
+    if len(codigos) == 0:
+        vazio = np.array([], dtype=np.int64)
+        return vazio, vazio
+    mudancas = np.flatnonzero(np.diff(codigos)) + 1
+    inicios = np.concatenate(([0], mudancas))
+    fins = np.concatenate((mudancas, [len(codigos)]))
+    return inicios, fins
+
+
+def tempos_continuos(codigos, tempos_ns, folga_ns):
+    """
+    Desloca os timestamps de cada live para que fiquem em sequência em um único eixo.
+
+    Cada live passa a começar depois do fim da anterior mais `folga_ns`, de modo
+    que uma busca binária em todo o array nunca ultrapassa o limite da live. Os
+    dados devem estar ordenados por (live, tempo).
+    """
+    if len(tempos_ns) == 0:
+        return tempos_ns.astype(np.int64)
+    inicios, fins = _limites_por_live(codigos)
+    minimos = tempos_ns[inicios]
+    duracoes = tempos_ns[fins - 1] - minimos
+    deslocamentos = np.concatenate(([0], np.cumsum(duracoes + folga_ns + 1)[:-1]))
+    tamanhos = fins - inicios
+    return tempos_ns - np.repeat(minimos, tamanhos) + np.repeat(deslocamentos, tamanhos)
+
+
+def calcular_densidade(df, tamanho_janela='10s'):
+    """
+    Calcula, para cada mensagem, quantas mensagens da mesma live caem na janela (t - janela, t].
+
+    Args:
+        df: DataFrame ordenado por (`id_video`, `timestamp`), ver `ordenar_por_live`.
+        tamanho_janela: tamanho da janela em qualquer formato aceito por `pd.Timedelta`.
+
+    Returns:
+        Array int64 com a densidade de cada linha, na ordem do DataFrame.
+    """
+    janela_ns = pd.Timedelta(tamanho_janela).value
+    codigos = pd.factorize(df['id_video'], sort=False)[0]
+    tempos = tempos_continuos(codigos, df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64), janela_ns)
+    posicoes = np.arange(len(tempos))
+    inicio_janela = np.searchsorted(tempos, tempos - janela_ns, side='right')
+    return posicoes - inicio_janela + 1
+
+
+def top_hotspots_por_live(df, densidade, top_n):
+    """
+    Seleciona os `top_n` instantes de maior densidade de cada live.
+
+    Empates são resolvidos pela ordem temporal, como em `Series.nlargest`.
+    """
+    resultado = df.assign(mensagens_na_janela=densidade)
+    resultado = resultado.sort_values(
+        by=['id_video', 'mensagens_na_janela'], ascending=[True, False], kind='mergesort'
+    )
+    return resultado.groupby('id_video', sort=False, observed=True).head(top_n)
+
+
+def mesclar_intervalos(inicios, fins):
+    """
+    Une intervalos semiabertos [inicio, fim) que se sobrepõem ou se tocam.
+
+    Returns:
+        Dois arrays (inicios, fins) com os intervalos disjuntos, em ordem crescente.
+    """
+    inicios = np.asarray(inicios, dtype=np.int64)
+    fins = np.asarray(fins, dtype=np.int64)
+    validos = fins > inicios
+    inicios, fins = inicios[validos], fins[validos]
+    if len(inicios) == 0:
+        return inicios, fins
+
+    ordem = np.argsort(inicios, kind='mergesort')
+    inicios, fins = inicios[ordem], fins[ordem]
+    fim_acumulado = np.maximum.accumulate(fins)
+    novo_grupo = np.concatenate(([True], inicios[1:] > fim_acumulado[:-1]))
+    return inicios[novo_grupo], np.maximum.reduceat(fins, np.flatnonzero(novo_grupo))
+
+
+def coletar_janelas(df, eventos, raio):
+    """
+    Coleta as mensagens em [centro - raio, centro + raio] ao redor de cada evento.
+
+    Args:
+        df: DataFrame ordenado por (`id_video`, `timestamp`), ver `ordenar_por_live`.
+        eventos: DataFrame com as colunas `id_video` e `timestamp_hotspot`.
+        raio: metade do tamanho da janela (`pd.Timedelta` ou string como '1min').
+
+    Returns:
+        As linhas de `df` que caem em alguma janela, sem repetições e na ordem de `df`.
+        Janelas sobrepostas da mesma live são unidas como intervalos.
+    """
+    raio_ns = pd.Timedelta(raio).value
+    codigos, lives = pd.factorize(df['id_video'], sort=False)
+    lives = pd.Index(lives)
+    tempos_ns = df['timestamp'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    tempos = tempos_continuos(codigos, tempos_ns, raio_ns)
+
+    # Posição de cada live no eixo contínuo
+    inicios_live, fins_live = _limites_por_live(codigos)
+    deslocamento_live = tempos[inicios_live] - tempos_ns[inicios_live]
+
+    codigo_evento = lives.get_indexer(eventos['id_video'])
+    encontrados = codigo_evento >= 0
+    codigo_evento = codigo_evento[encontrados]
+    centros = pd.to_datetime(eventos['timestamp_hotspot'], utc=True).to_numpy(dtype='datetime64[ns]').view(np.int64)
+    centros = centros[encontrados] + deslocamento_live[codigo_evento]
+
+    # Busca binária dos limites, restrita às linhas da própria live
+    inicio = np.searchsorted(tempos, centros - raio_ns, side='left')
+    fim = np.searchsorted(tempos, centros + raio_ns, side='right')
+    inicio = np.clip(inicio, inicios_live[codigo_evento], fins_live[codigo_evento])
+    fim = np.clip(fim, inicios_live[codigo_evento], fins_live[codigo_evento])
+
+    inicios, fins = mesclar_intervalos(inicio, fim)
+    tamanhos = fins - inicios
+    # Concatena os índices de todos os intervalos sem laço em Python
+    posicoes = np.arange(tamanhos.sum()) + np.repeat(inicios - (np.cumsum(tamanhos) - tamanhos), tamanhos)
+    return df.iloc[posicoes]
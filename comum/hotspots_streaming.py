@@ -0,0 +1,138 @@
+"""
+Detecção incremental de hotspots para chats que ainda estão sendo coletados.
+
+`comum.hotspots` precisa do DataFrame completo e ordenado. Aqui as mensagens
+chegam uma a uma (ex.: lendo o fim de um arquivo que o coletor vai
+aumentando) e cada live mantém:
+
+- uma fila (`collections.deque`) com os instantes das mensagens da janela
+  (t - janela, t]: cada mensagem entra e sai da fila uma única vez, então o
+  custo amortizado por mensagem é O(1);
+- um min-heap com os `top_n` instantes de maior densidade vistos até agora,
+  de custo O(log top_n) por mensagem.
+
+Com as mensagens de cada live em ordem de horário, a densidade e o top-N são
+os mesmos de `calcular_densidade` e `top_hotspots_por_live` (inclusive o
+desempate pela mensagem mais antiga).
+"""
+import heapq
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class _EstadoLive:
+    """Janela deslizante e top-N de uma única live."""
+    __slots__ = ('janela', 'top', 'canal', 'titulo', 'n_mensagens', 'ultimo_ns')
+
+    def __init__(self, canal, titulo):
+        self.janela = deque()
+        self.top = []  # (densidade, -ordem, timestamp_ns): a raiz é o hotspot mais fraco
+        self.canal = canal
+        self.titulo = titulo
+        self.n_mensagens = 0
+        self.ultimo_ns = None
+
+
+class DetectorDeHotspots:
+    """
+    Mantém a densidade de mensagens e os maiores picos de cada live em tempo real.
+
+    Args:
+        tamanho_janela: tamanho da janela em qualquer formato aceito por `pd.Timedelta`.
+        top_n: quantos hotspots guardar por live.
+
+    Mensagens de uma live que chegam com horário anterior ao da última
+    processada são contadas como se tivessem chegado no horário da última
+    (o total fica em `mensagens_atrasadas`).
+    """
+
+    def __init__(self, tamanho_janela='10s', top_n=10):
+        self.janela_ns = pd.Timedelta(tamanho_janela).value
+        self.top_n = top_n
+        self.lives = {}
+        self.mensagens_atrasadas = 0
+
+    def processar(self, id_video, timestamp, canal=None, titulo=None):
+        """
+        Conta uma mensagem nova.
+
+        Args:
+            id_video: live da mensagem.
+            timestamp: horário da mensagem (`pd.Timestamp`, string ISO ou inteiro em ns).
+            canal, titulo: guardados na primeira mensagem da live, para o relatório.
+
+        Returns:
+            (densidade, entrou_no_top): mensagens da live na janela que termina
+            nesta mensagem e se esse instante passou a fazer parte do top-N da live.
+        """
+        estado = self.lives.get(id_video)
+        if estado is None:
+            estado = self.lives[id_video] = _EstadoLive(canal, titulo)
+
+        t = int(timestamp) if isinstance(timestamp, (int, np.integer)) else pd.Timestamp(timestamp).value
+        if estado.ultimo_ns is not None and t < estado.ultimo_ns:
+            self.mensagens_atrasadas += 1
+            t = estado.ultimo_ns
+        estado.ultimo_ns = t
+
+        janela = estado.janela
+        janela.append(t)
+        limite = t - self.janela_ns
+        while janela[0] <= limite:
+            janela.popleft()
+        densidade = len(janela)
+
+        # Em empates, a mensagem mais antiga (menor ordem) fica no top
+        item = (densidade, -estado.n_mensagens, t)
+        estado.n_mensagens += 1
+        if len(estado.top) < self.top_n:
+            heapq.heappush(estado.top, item)
+            return densidade, True
+        if item > estado.top[0]:
+            heapq.heapreplace(estado.top, item)
+            return densidade, True
+        return densidade, False
+
+    def processar_lote(self, df):
+        """
+        Conta as mensagens de um DataFrame na ordem das linhas.
+
+        O DataFrame precisa das colunas `id_video` e `timestamp`; `canal` e
+        `titulo` são usados se existirem. Retorna um array com a densidade de cada linha.
+        """
+        tempos = pd.to_datetime(df['timestamp'], utc=True).to_numpy(dtype='datetime64[ns]').view('int64').tolist()
+        canais = df['canal'].tolist() if 'canal' in df else [None] * len(df)
+        titulos = df['titulo'].tolist() if 'titulo' in df else [None] * len(df)
+        return np.fromiter(
+            (self.processar(id_video, t, canal, titulo)[0]
+             for id_video, t, canal, titulo in zip(df['id_video'].tolist(), tempos, canais, titulos)),
+            dtype=np.int64, count=len(df),
+        )
+
+    def encerrar_live(self, id_video):
+        """Remove a live do detector (ex.: quando a transmissão termina) e retorna seus hotspots."""
+        hotspots = self.hotspots(lives=[id_video])
+        self.lives.pop(id_video, None)
+        return hotspots
+
+    def hotspots(self, lives=None):
+        """
+        Retorna os hotspots atuais no mesmo formato de `encontrar_hotspots`.
+
+        Colunas `canal`, `titulo_live`, `timestamp_hotspot`, `mensagens_na_janela`
+        e `id_video`; dentro de cada live, em ordem decrescente de densidade.
+        """
+        linhas = []
+        for id_video in (self.lives if lives is None else lives):
+            estado = self.lives.get(id_video)
+            if estado is None:
+                continue
+            # Maior densidade primeiro; em empates, a mensagem mais antiga
+            for densidade, _, t in sorted(estado.top, key=lambda item: (-item[0], -item[1])):
+                linhas.append((estado.canal, estado.titulo, t, densidade, id_video))
+        resultado = pd.DataFrame(linhas, columns=['canal', 'titulo_live', 'timestamp_hotspot',
+                                                  'mensagens_na_janela', 'id_video'])
+        resultado['timestamp_hotspot'] = pd.to_datetime(resultado['timestamp_hotspot'].astype('int64'), utc=True)
+        return resultado
@@ -0,0 +1,175 @@
+"""
+Índice invertido termo -> linhas do dataset, para amostrar por termo e/ou canal.
+
+O índice é construído uma única vez (uma passada do `CasadorDeTermos` sobre
+todas as mensagens) e salvo em `.npz`. As amostragens seguintes, com qualquer
+tamanho, semente ou cota, são respondidas a partir do índice, sem nova busca
+no dataset. O arquivo guarda o hash do dataset e do dicionário e é
+reconstruído quando qualquer um deles muda.
+
+Formato (CSR): as linhas do termo `i` são `linhas[ponteiros[i]:ponteiros[i + 1]]`,
+em ordem crescente. `canal_por_linha` guarda o código do canal de cada linha
+do dataset (-1 para valores ausentes), com os nomes em `canais`.
+"""
+import hashlib
+import os
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from comum.dataset import assinatura_dataset, carregar_dataset
+from comum.dicionario import CasadorDeTermos
+
+# Versão do formato do índice. Incrementar ao mudar a construção.
+VERSAO_INDICE = 1
+
+MODOS_AMOSTRAGEM = ('uniforme', 'termo', 'canal', 'termo_canal')
+
+
+def _assinatura(caminho_csv, termos):
+    h = hashlib.sha256()
+    h.update(f"v{VERSAO_INDICE}".encode())
+    h.update(assinatura_dataset(caminho_csv).encode())
+    h.update("\n".join(termos).encode('utf-8'))
+    return h.hexdigest()
+
+
+def construir_indice(termos_por_mensagem, termos, canais):
+    """
+    Monta o índice a partir do resultado de `CasadorDeTermos.encontrar_em_serie`.
+
+    Args:
+        termos_por_mensagem: Series com a tupla de termos de cada linha, na ordem do dataset.
+        termos: lista de termos do casador (`CasadorDeTermos.termos`).
+        canais: Series com o canal de cada linha, alinhada a `termos_por_mensagem`.
+    """
+    posicao_termo = {termo: i for i, termo in enumerate(termos)}
+    quantidades = termos_por_mensagem.map(len).to_numpy()
+    linhas = np.repeat(np.arange(len(termos_por_mensagem), dtype=np.int64), quantidades)
+    codigos_termo = np.fromiter(
+        (posicao_termo[t] for encontrados in termos_por_mensagem if encontrados for t in encontrados),
+        dtype=np.int64, count=int(quantidades.sum()),
+    )
+
+    # Ordena por termo mantendo as linhas em ordem crescente dentro de cada termo
+    ordem = np.argsort(codigos_termo, kind='stable')
+    ponteiros = np.concatenate(([0], np.cumsum(np.bincount(codigos_termo, minlength=len(termos)))))
+    canal_por_linha, nomes_canais = pd.factorize(canais)
+
+    return {
+        'termos': np.array(termos, dtype=str),
+        'ponteiros': ponteiros.astype(np.int64),
+        'linhas': linhas[ordem],
+        'canal_por_linha': canal_por_linha.astype(np.int32),
+        'canais': np.array([str(c) for c in nomes_canais], dtype=str),
+    }
+
+
+def obter_indice(caminho_csv, termos, caminho_indice):
+    """Carrega o índice salvo ou o (re)constrói se o dataset ou o dicionário mudaram."""
+    casador = CasadorDeTermos(termos)
+    assinatura = _assinatura(caminho_csv, casador.termos)
+
+    if os.path.exists(caminho_indice):
+        with np.load(caminho_indice, allow_pickle=False) as dados:
+            if str(dados['assinatura']) == assinatura:
+                return {chave: dados[chave] for chave in dados.files if chave != 'assinatura'}
+
+    print("Construindo índice invertido dos termos (executado apenas quando o dataset ou o dicionário mudam)...")
+    df = carregar_dataset(caminho_csv, colunas=['mensagem', 'canal'])
+    indice = construir_indice(casador.encontrar_em_serie(df['mensagem']), casador.termos, df['canal'])
+
+    temporario = caminho_indice + ".tmp.npz"
+    np.savez(temporario, assinatura=np.array(assinatura), **indice)
+    os.replace(temporario, caminho_indice)
+    return indice
+
+
+def linhas_do_termo(indice, i):
+    """Retorna as linhas do dataset que contêm o termo de posição `i`."""
+    return indice['linhas'][indice['ponteiros'][i]:indice['ponteiros'][i + 1]]
+
+
+def linhas_com_algum_termo(indice):
+    """Retorna, em ordem crescente, as linhas que contêm ao menos um termo."""
+    return np.unique(indice['linhas'])
+
+
+def _estratos(indice, modo):
+    """Divide as linhas encontradas em estratos conforme o modo de amostragem."""
+    if modo == 'canal':
+        todas = linhas_com_algum_termo(indice)
+        canais = indice['canal_por_linha'][todas]
+        return [todas[canais == c] for c in range(len(indice['canais']))]
+
+    estratos = []
+    for i in range(len(indice['termos'])):
+        linhas = linhas_do_termo(indice, i)
+        if modo == 'termo':
+            estratos.append(linhas)
+        else:
+            canais = indice['canal_por_linha'][linhas]
+            estratos.extend(linhas[canais == c] for c in range(len(indice['canais'])))
+    return estratos
+
+
+def _alocar_cotas(disponiveis, total):
+    """Divide `total` igualmente entre os estratos, redistribuindo o que os menores não conseguem cobrir."""
+    cotas = np.zeros(len(disponiveis), dtype=np.int64)
+    restante = total
+    while restante > 0:
+        abertos = np.flatnonzero(cotas < disponiveis)
+        if len(abertos) == 0:
+            break
+        parte = max(restante // len(abertos), 1)
+        for i in abertos:
+            acrescimo = min(parte, disponiveis[i] - cotas[i], restante)
+            cotas[i] += acrescimo
+            restante -= acrescimo
+            if restante == 0:
+                break
+    return cotas
+
+
+def amostrar(indice, tamanho, modo='uniforme', random_state=42):
+    """
+    Sorteia linhas do dataset a partir do índice, sem repetição.
+
+    Args:
+        tamanho: número total de linhas desejado.
+        modo: 'uniforme' (todas as linhas encontradas juntas), 'termo' (mesma cota
+            para cada termo), 'canal' (mesma cota para cada canal) ou 'termo_canal'
+            (mesma cota para cada combinação de termo e canal).
+        random_state: semente do sorteio.
+
+    Returns:
+        Array com as posições das linhas sorteadas no dataset.
+    """
+    if modo not in MODOS_AMOSTRAGEM:
+        raise ValueError(f"Modo de amostragem inválido: '{modo}'. Use um de {MODOS_AMOSTRAGEM}.")
+    rng = np.random.RandomState(random_state)
+    todas = linhas_com_algum_termo(indice)
+
+    if modo == 'uniforme':
+        # Mesmo sorteio de `df_filtrado.sample(n=tamanho, random_state=random_state)`
+        return todas[rng.choice(len(todas), size=min(tamanho, len(todas)), replace=False)]
+
+    # Uma linha com vários termos pertence a vários estratos; cada uma é sorteada no máximo uma vez
+    estratos = _estratos(indice, modo)
+    cotas = _alocar_cotas(np.array([len(e) for e in estratos], dtype=np.int64), tamanho)
+    escolhidas = set()
+    sorteadas = []
+    for estrato, cota in zip(estratos, cotas):
+        if cota == 0:
+            continue
+        candidatas = list(islice((linha for linha in rng.permutation(estrato) if linha not in escolhidas), cota))
+        escolhidas.update(candidatas)
+        sorteadas.extend(candidatas)
+
+    # Completa com linhas quaisquer caso a sobreposição entre estratos tenha reduzido o total
+    faltam = min(tamanho, len(todas)) - len(sorteadas)
+    if faltam > 0:
+        restantes = np.setdiff1d(todas, np.array(sorteadas, dtype=np.int64))
+        sorteadas.extend(rng.choice(restantes, size=faltam, replace=False))
+    return np.array(sorteadas, dtype=np.int64)
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmark')))
+from comum.armazem_particionado import ArmazemParticionado
+from gerador_chat import gerar_chat
+
+
+def _live_em_csv(tmp_path):
+    """Uma live sintética lida de CSV, como chega na ingestão (timestamps em texto)."""
+    df = gerar_chat(5_000, mensagens_por_live=5_000, semente=1)
+    caminho = tmp_path / 'live.csv'
+    df.to_csv(caminho, index=False)
+    return pd.read_csv(caminho)
+
+
+def test_acrescentar_mesma_live_nao_duplica(tmp_path):
+    live = _live_em_csv(tmp_path)
+    id_video = live['id_video'].iloc[0]
+    armazem = ArmazemParticionado(tmp_path / 'armazem')
+
+    assert armazem.adicionar(live, acrescentar=True) == ([id_video], [])
+    assert armazem.adicionar(live, acrescentar=True) == ([], [])
+    assert armazem.adicionar(live) == ([], [])
+    assert armazem.particoes[id_video]['linhas'] == len(live)
+    assert len(armazem.ler_particao(id_video)) == len(live)
+
+
+def test_acrescentar_mensagens_novas(tmp_path):
+    live = _live_em_csv(tmp_path)
+    id_video = live['id_video'].iloc[0]
+    armazem = ArmazemParticionado(tmp_path / 'armazem')
+
+    armazem.adicionar(live.iloc[:3_000])
+    assert armazem.adicionar(live.iloc[2_000:], acrescentar=True) == ([], [id_video])
+    assert armazem.particoes[id_video]['linhas'] == len(live)
+    assert armazem.adicionar(live) == ([], [])
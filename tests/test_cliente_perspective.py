@@ -0,0 +1,154 @@
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+from email.message import Message
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '3-entrega_final', '2-experimento', '1-perspective_api')))
+from cliente_perspective import ClientePerspective, ErroPerspectiveAPI, LimitadorTaxa
+
+
+class RelogioFalso(object):
+    """Relógio que só avança quando alguém 'dorme'; guarda as esperas pedidas."""
+    def __init__(self):
+        self.agora = 0.0
+        self.esperas = []
+        self._trava = threading.Lock()
+
+    def __call__(self):
+        with self._trava:
+            return self.agora
+
+    def dormir(self, segundos):
+        with self._trava:
+            self.esperas.append(segundos)
+            self.agora += segundos
+
+
+class RespostaFalsa(object):
+    def __init__(self, score):
+        self.corpo = json.dumps({'attributeScores': {'TOXICITY': {'summaryScore': {'value': score}}}}).encode('utf-8')
+
+    def read(self):
+        return self.corpo
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class SessaoFalsa(object):
+    """
+    Substitui `urllib.request.urlopen`. Cada chamada consome a próxima resposta
+    da fila (um score ou um código HTTP de erro); com a fila vazia, o score é
+    calculado a partir do texto. Guarda os textos recebidos e o horário de cada chamada.
+    """
+    def __init__(self, respostas=(), relogio=time.monotonic, atraso_maximo=0.0):
+        self.respostas = list(respostas)
+        self.relogio = relogio
+        self.atraso_maximo = atraso_maximo
+        self.textos = []
+        self.horarios = []
+        self._trava = threading.Lock()
+
+    def __call__(self, requisicao, timeout=None):
+        texto = json.loads(requisicao.data.decode('utf-8'))['comment']['text']
+        with self._trava:
+            self.textos.append(texto)
+            self.horarios.append(self.relogio())
+            resposta = self.respostas.pop(0) if self.respostas else score_esperado(texto)
+        if self.atraso_maximo:
+            time.sleep(random.uniform(0, self.atraso_maximo))
+        if isinstance(resposta, int):
+            cabecalhos = Message()
+            if resposta == 429:
+                cabecalhos['Retry-After'] = '2'
+            raise urllib.error.HTTPError(requisicao.full_url, resposta, 'erro', cabecalhos,
+                                         io.BytesIO(b'{"error": "falso"}'))
+        return RespostaFalsa(resposta)
+
+
+def score_esperado(texto):
+    return len(texto) / 100
+
+
+def criar_cliente(sessao, relogio=None, **kwargs):
+    relogio = relogio or RelogioFalso()
+    parametros = dict(qps=1.0, max_concorrencia=1, max_tentativas=3, backoff_inicial=1.0)
+    parametros.update(kwargs)
+    return ClientePerspective('chave', abrir_url=sessao, relogio=relogio, dormir=relogio.dormir, **parametros)
+
+
+def test_429_e_depois_sucesso():
+    relogio = RelogioFalso()
+    sessao = SessaoFalsa([429, 0.75], relogio=relogio)
+    cliente = criar_cliente(sessao, relogio)
+
+    assert cliente.pontuar("mensagem") == 0.75
+    assert sessao.textos == ["mensagem", "mensagem"]
+    assert 2.0 in relogio.esperas  # Respeita o Retry-After da resposta 429
+
+
+def test_erro_permanente_nao_e_repetido():
+    sessao = SessaoFalsa([400])
+    cliente = criar_cliente(sessao)
+
+    with pytest.raises(ErroPerspectiveAPI) as erro:
+        cliente.pontuar("mensagem")
+    assert erro.value.status == 400 and not erro.value.repetivel
+    assert len(sessao.textos) == 1
+
+    # Em lote, o texto recusado fica sem score e os demais seguem normalmente
+    sessao = SessaoFalsa([0.5, 400, 0.25])
+    scores, erros = criar_cliente(sessao).pontuar_lote(["a", "b", "c"])
+    assert scores == [0.5, None, 0.25]
+    assert [(i, e.status) for i, e in erros] == [(1, 400)]
+
+
+def test_tentativas_esgotadas_interrompem_o_lote():
+    sessao = SessaoFalsa([503, 503, 503])
+    with pytest.raises(ErroPerspectiveAPI) as erro:
+        criar_cliente(sessao).pontuar_lote(["a"])
+    assert erro.value.repetivel and erro.value.status == 503
+    assert len(sessao.textos) == 3
+
+
+def test_limitador_espaca_as_requisicoes():
+    relogio = RelogioFalso()
+    limitador = LimitadorTaxa(qps=4, relogio=relogio, dormir=relogio.dormir)
+    horarios = []
+    for _ in range(5):
+        limitador.adquirir()
+        horarios.append(relogio())
+    assert horarios == pytest.approx([0.0, 0.25, 0.5, 0.75, 1.0])
+
+    # O mesmo intervalo vale para as requisições feitas pelo cliente
+    relogio = RelogioFalso()
+    sessao = SessaoFalsa(relogio=relogio)
+    criar_cliente(sessao, relogio, qps=2.0).pontuar_lote(["a", "b", "c", "d"])
+    intervalos = [b - a for a, b in zip(sessao.horarios, sessao.horarios[1:])]
+    assert intervalos == pytest.approx([0.5, 0.5, 0.5])
+
+
+def test_lote_concorrente_preserva_a_ordem():
+    textos = [f"mensagem {'x' * i}" for i in range(40)] + [""]
+    sessao = SessaoFalsa(atraso_maximo=0.005)
+    cliente = ClientePerspective('chave', qps=1e6, max_concorrencia=8, abrir_url=sessao)
+    concluidos = {}
+
+    scores, erros = cliente.pontuar_lote(textos, ao_concluir=lambda i, score: concluidos.__setitem__(i, score))
+
+    esperado = [score_esperado(t) for t in textos[:-1]] + [0.0]
+    assert scores == esperado
+    assert erros == []
+    assert concluidos == dict(enumerate(esperado))
+    assert sorted(sessao.textos) == sorted(textos[:-1])  # Texto vazio não é enviado
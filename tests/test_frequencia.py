@@ -0,0 +1,69 @@
+import functools
+import os
+import re
+import sys
+
+import nltk
+import numpy as np
+import pytest
+from nltk.tokenize import word_tokenize
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmark')))
+import comum.frequencia as frequencia
+from gerador_chat import gerar_chat
+
+STOP_WORDS = {'de', 'que', 'o', 'a', 'e', 'do', 'da', 'em', 'um', 'pra', 'q', 'ta', 'tá', 'mano', 'cara'}
+TOP_N = 200  # Como em 1-encontrar_palavras_dicionario.py; inclui palavras empatadas
+
+
+@pytest.fixture
+def tokenizador(monkeypatch):
+    """Usa o `word_tokenize` do NLTK; sem o recurso 'punkt', tokeniza sem separar sentenças."""
+    try:
+        nltk.data.find('tokenizers/punkt_tab')
+        return word_tokenize
+    except LookupError:
+        tokenizar = functools.partial(word_tokenize, preserve_line=True)
+        monkeypatch.setattr(frequencia, 'word_tokenize', tokenizar)
+        return tokenizar
+
+
+@pytest.fixture
+def mensagens():
+    chat = gerar_chat(20_000, semente=3)['mensagem'].to_numpy(dtype=object)
+    extras = np.array(["Que JOGO, mano!!", "kkkk q isso", None, "a live tá boa... boa demais", "ótimo; ótimo"], dtype=object)
+    # Palavras empatadas que só aparecem em lotes do fim: o desempate depende da ordem da soma
+    return np.concatenate([extras, chat[:18_000], ["beta beta"], chat[18_000:19_600], ["alfa alfa"], chat[19_600:], extras])
+
+
+def top_serial(mensagens, tokenizar, tamanho_minimo, ignorar_risadas):
+    """O cálculo original: texto inteiro, `word_tokenize` e `FreqDist`."""
+    texto_completo = ' '.join(str(m) for m in mensagens if m is not None)
+    palavras_filtradas = []
+    for palavra in tokenizar(texto_completo.lower()):
+        if ignorar_risadas and re.fullmatch(r'k{2,}', palavra):
+            continue
+        if palavra.isalpha() and len(palavra) >= tamanho_minimo and palavra not in STOP_WORDS:
+            palavras_filtradas.append(palavra)
+    return nltk.FreqDist(palavras_filtradas).most_common(TOP_N)
+
+
+def em_lotes(mensagens, tamanho_lote=1_500):
+    return (mensagens[inicio:inicio + tamanho_lote] for inicio in range(0, len(mensagens), tamanho_lote))
+
+
+@pytest.mark.parametrize('tamanho_minimo, ignorar_risadas', [(3, False), (2, True)])
+def test_top_n_em_lotes_igual_ao_serial(mensagens, tokenizador, tamanho_minimo, ignorar_risadas):
+    esperado = top_serial(mensagens, tokenizador, tamanho_minimo, ignorar_risadas)
+    contagem = frequencia.contar_palavras(em_lotes(mensagens), STOP_WORDS, tamanho_minimo, ignorar_risadas)
+    assert nltk.FreqDist(contagem).most_common(TOP_N) == esperado
+
+
+@pytest.mark.parametrize('tamanho_minimo, ignorar_risadas', [(3, False), (2, True)])
+def test_top_n_paralelo_igual_ao_serial(mensagens, tokenizador, tamanho_minimo, ignorar_risadas):
+    esperado = top_serial(mensagens, tokenizador, tamanho_minimo, ignorar_risadas)
+    contagem = frequencia.contar_palavras_paralelo(
+        em_lotes(mensagens), STOP_WORDS, tamanho_minimo, ignorar_risadas, n_processos=3
+    )
+    assert nltk.FreqDist(contagem).most_common(TOP_N) == esperado